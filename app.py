@@ -1,24 +1,63 @@
-from flask import Flask, request, jsonify, send_from_directory, render_template_string, session, redirect, url_for, make_response
+from flask import Flask, request, jsonify, send_file, send_from_directory, abort, render_template_string, session, redirect, url_for, make_response, g, has_app_context
 from flask_cors import CORS
 from flask_mail import Mail, Message
 from flask_sqlalchemy import SQLAlchemy
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from werkzeug.security import generate_password_hash, check_password_hash
+from limits.storage import Storage as LimitsStorage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from werkzeug.http import is_resource_modified
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash, safe_join
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 import os
 import logging
 import re
 import secrets
-from datetime import datetime, date as date_type, timedelta
-from time import time
+import shutil
+import socket
+import sqlite3
+import subprocess
+from datetime import datetime, date as date_type, timedelta, timezone
+from time import perf_counter, sleep, time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import wraps
 import json
+import base64
+import gzip
+import hashlib
+import html
+import mimetypes
+import tempfile
 import threading
-from sqlalchemy import case, inspect, text
+import fcntl
+import click
+import urllib.parse
+from math import floor
+from sqlalchemy import and_, case, func, inspect, or_, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+try:
+    import brotli
+except ImportError:  # optional: without it the static build only writes .gz siblings
+    brotli = None
+
+try:
+    from PIL import Image, ImageOps, features as image_features
+except ImportError:  # optional: without Pillow uploads are stored and served as-is
+    Image = None
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError as BotoClientError
+except ImportError:  # optional: only needed for STORAGE_BACKEND=s3
+    boto3 = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,6 +89,13 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'connect_args': {'sslmode': 'require'} if 'postgresql' in app.config['SQLALCHEMY_DATABASE_URI'] else {}
 }
+# Lock file serializing `flask migrate` runs on non-PostgreSQL databases (default: beside the SQLite file)
+app.config['SCHEMA_LOCK_FILE'] = os.environ.get('SCHEMA_LOCK_FILE')
+# Files that one deployment's worker processes share on a host live under this prefix. It
+# is named after the database, so two deployments on the same host never share them.
+HOST_SCRATCH_PREFIX = os.path.join(
+    tempfile.gettempdir(), f"brightwave-{hashlib.sha256(database_url.encode()).hexdigest()[:12]}"
+)
 db = SQLAlchemy(app)
 runtime_state_lock = threading.Lock()
 runtime_state_initialized = False
@@ -79,11 +125,337 @@ if not NOTIFICATION_EMAILS:
     logger.warning("No notification emails configured")
 
 # ========== RATE LIMITING ==========
+# memory:// counters are per process, so with N gunicorn workers every limit was N
+# times looser. The default sqlite-wal://<path> keeps counters in a WAL-mode SQLite
+# file that all of this deployment's workers on a host share. Admitting a request is
+# one short write transaction: counts buffered per worker would let every worker admit
+# a full limit before flushing, which is the N-times-looser problem again. Lookups and
+# requests already over their limit only read, so a flood of throttled requests never
+# takes the write lock. resp://[:password@]host:port/db speaks the
+# Redis protocol for multi-host deploys. Both back the sliding-window-counter
+# strategy. Both also count hits (requests admitted), misses (a key's first request
+# in a window) and throttles. Those counts are buffered per worker and written to
+# the shared store in batches, at most every few seconds.
+app.config['RATELIMIT_STORAGE_URI'] = os.environ.get(
+    'RATELIMIT_STORAGE_URI', f"sqlite-wal://{HOST_SCRATCH_PREFIX}-ratelimit.db"
+)
+app.config['RATELIMIT_STRATEGY'] = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+RATE_LIMIT_METRICS = ('hits', 'misses', 'throttled')
+RATE_LIMIT_METRICS_FLUSH_SECONDS = 5
+RATE_LIMIT_PRUNE_EVERY = 500
+
+
+class SharedRateLimitStorage(LimitsStorage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Sliding-window bookkeeping and batched metrics for the shared rate-limit backends."""
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.pending_metrics = defaultdict(int)
+        self.metrics_lock = threading.Lock()
+        self.metrics_flushed_at = time()
+
+    def count_metric(self, name):
+        with self.metrics_lock:
+            self.pending_metrics[name] += 1
+            due = time() - self.metrics_flushed_at >= RATE_LIMIT_METRICS_FLUSH_SECONDS
+        if due:
+            self.flush_metrics()
+
+    def flush_metrics(self):
+        with self.metrics_lock:
+            pending, self.pending_metrics = dict(self.pending_metrics), defaultdict(int)
+            self.metrics_flushed_at = time()
+        if pending:
+            try:
+                self.write_metrics(pending)
+            except self.base_exceptions as e:
+                logger.error(f"Could not flush rate-limit metrics: {str(e)}")
+
+    def metrics(self):
+        """Totals across every worker sharing this store."""
+        self.flush_metrics()
+        stored = self.read_metrics()
+        return {name: int(stored.get(name, 0)) for name in RATE_LIMIT_METRICS}
+
+    @staticmethod
+    def window_info(previous_count, current_count, expiry, now):
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key, expiry):
+        now = time()
+        previous_count, current_count = self.get_counts(*self.sliding_window_keys(key, expiry, now), now)
+        return self.window_info(previous_count, current_count, expiry, now)
+
+    def clear_sliding_window(self, key, expiry):
+        for window_key in self.sliding_window_keys(key, expiry, time()):
+            self.clear(window_key)
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        acquired, fresh = False, False
+        if amount <= limit:
+            now = time()
+            acquired, fresh = self.acquire_counts(*self.sliding_window_keys(key, expiry, now), limit, expiry, amount, now)
+        if fresh:
+            self.count_metric('misses')
+        self.count_metric('hits' if acquired else 'throttled')
+        return acquired
+
+    def over_limit(self, previous_count, current_count, limit, expiry, now):
+        _, previous_ttl, _, _ = self.window_info(previous_count, current_count, expiry, now)
+        return floor(previous_count * previous_ttl / expiry + current_count) > limit
+
+
+class SQLiteRateLimitStorage(SharedRateLimitStorage):
+    """Counters in a WAL-mode SQLite file, shared by every worker process on the host."""
+    STORAGE_SCHEME = ['sqlite-wal']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len('sqlite-wal://'):]
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_pid = None
+        self.writes = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @contextmanager
+    def transaction(self, write=True):
+        with self.lock:
+            # Connections must not cross a gunicorn fork.
+            if self.connection is None or self.connection_pid != os.getpid():
+                self.connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+                self.connection.execute('PRAGMA journal_mode=WAL')
+                self.connection.execute('PRAGMA synchronous=NORMAL')
+                self.connection.execute('CREATE TABLE IF NOT EXISTS rate_limit '
+                                        '(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)')
+                self.connection.execute('CREATE TABLE IF NOT EXISTS rate_limit_metric '
+                                        '(name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+                self.connection_pid = os.getpid()
+            # A write takes the database lock up front; a read sees a WAL snapshot and blocks nobody.
+            self.connection.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+            try:
+                yield self.connection
+                self.connection.execute('COMMIT')
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def _count(self, connection, key, now):
+        row = connection.execute('SELECT count FROM rate_limit WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        return row[0] if row else 0
+
+    def _add(self, connection, key, amount, expiry, now):
+        count = self._count(connection, key, now) + amount
+        if count == amount:
+            connection.execute('INSERT OR REPLACE INTO rate_limit (key, count, expires_at) VALUES (?, ?, ?)',
+                               (key, count, now + expiry))
+        else:
+            connection.execute('UPDATE rate_limit SET count = ? WHERE key = ?', (count, key))
+        self.writes += 1
+        if self.writes % RATE_LIMIT_PRUNE_EVERY == 0:
+            connection.execute('DELETE FROM rate_limit WHERE expires_at <= ?', (now,))
+        return count
+
+    def acquire_counts(self, previous_key, current_key, limit, expiry, amount, now):
+        with self.transaction(write=False) as connection:
+            previous_count = self._count(connection, previous_key, now)
+            current_count = self._count(connection, current_key, now)
+        if self.over_limit(previous_count, current_count + amount, limit, expiry, now):
+            return False, not previous_count and not current_count
+        # Counted again under the write lock, since another worker may have admitted requests meanwhile
+        with self.transaction() as connection:
+            previous_count = self._count(connection, previous_key, now)
+            current_count = self._count(connection, current_key, now)
+            fresh = not previous_count and not current_count
+            if self.over_limit(previous_count, current_count + amount, limit, expiry, now):
+                return False, fresh
+            self._add(connection, current_key, amount, 2 * expiry, now)
+            return True, fresh
+
+    def get_counts(self, previous_key, current_key, now):
+        with self.transaction(write=False) as connection:
+            return self._count(connection, previous_key, now), self._count(connection, current_key, now)
+
+    def incr(self, key, expiry, amount=1):
+        with self.transaction() as connection:
+            return self._add(connection, key, amount, expiry, time())
+
+    def get(self, key):
+        with self.transaction(write=False) as connection:
+            return self._count(connection, key, time())
+
+    def get_expiry(self, key):
+        with self.transaction(write=False) as connection:
+            row = connection.execute('SELECT expires_at FROM rate_limit WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time()
+
+    def check(self):
+        try:
+            with self.transaction(write=False) as connection:
+                connection.execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self.transaction() as connection:
+            return connection.execute('DELETE FROM rate_limit').rowcount
+
+    def clear(self, key):
+        with self.transaction() as connection:
+            connection.execute('DELETE FROM rate_limit WHERE key = ?', (key,))
+
+    def write_metrics(self, pending):
+        with self.transaction() as connection:
+            connection.executemany(
+                'INSERT INTO rate_limit_metric (name, value) VALUES (?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value', list(pending.items()))
+
+    def read_metrics(self):
+        with self.transaction(write=False) as connection:
+            return dict(connection.execute('SELECT name, value FROM rate_limit_metric').fetchall())
+
+
+class RespError(Exception):
+    pass
+
+
+class RespRateLimitStorage(SharedRateLimitStorage):
+    """Counters in Redis (or anything speaking RESP), for deploys spanning several hosts."""
+    STORAGE_SCHEME = ['resp']
+    KEY_PREFIX = 'brightwave:ratelimit:'
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urllib.parse.urlparse(uri)
+        self.address = (parsed.hostname or 'localhost', parsed.port or 6379)
+        self.password = parsed.password
+        self.database = int(parsed.path.strip('/') or 0)
+        self.timeout = float(options.get('socket_timeout', 2))
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+        self.connection_pid = None
+
+    @property
+    def base_exceptions(self):
+        return (OSError, RespError)
+
+    def _connect(self):
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        self.reader = self.sock.makefile('rb')
+        self.connection_pid = os.getpid()
+        setup = ([('AUTH', self.password)] if self.password else []) + ([('SELECT', self.database)] if self.database else [])
+        if setup:
+            self._send(setup)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('RESP connection closed')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RespError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            return None if length < 0 else self.reader.read(length + 2)[:-2].decode()
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected RESP reply {line!r}")
+
+    def _send(self, commands):
+        buffer = []
+        for command in commands:
+            buffer.append(f"*{len(command)}\r\n".encode())
+            for argument in command:
+                argument = str(argument).encode()
+                buffer.append(b'$%d\r\n%s\r\n' % (len(argument), argument))
+        self.sock.sendall(b''.join(buffer))
+        return [self._read_reply() for _ in commands]
+
+    def pipeline(self, *commands):
+        """Send several commands in one round trip; reconnects once if the socket went away."""
+        with self.lock:
+            for attempt in (0, 1):
+                try:
+                    if self.sock is None or self.connection_pid != os.getpid():
+                        self._connect()
+                    return self._send(commands)
+                except OSError:
+                    self.sock = None
+                    if attempt:
+                        raise
+
+    def acquire_counts(self, previous_key, current_key, limit, expiry, amount, now):
+        previous_key, current_key = self.KEY_PREFIX + previous_key, self.KEY_PREFIX + current_key
+        previous_count, current_count = (int(value or 0) for value in self.pipeline(('GET', previous_key), ('GET', current_key)))
+        fresh = not previous_count and not current_count
+        if self.over_limit(previous_count, current_count + amount, limit, expiry, now):
+            return False, fresh
+        current_count, _ = self.pipeline(('INCRBY', current_key, amount), ('PEXPIRE', current_key, 2 * expiry * 1000))
+        # Another worker may have won the race between the read and the increment.
+        if self.over_limit(previous_count, current_count, limit, expiry, now):
+            self.pipeline(('DECRBY', current_key, amount))
+            return False, fresh
+        return True, fresh
+
+    def get_counts(self, previous_key, current_key, now):
+        replies = self.pipeline(('GET', self.KEY_PREFIX + previous_key), ('GET', self.KEY_PREFIX + current_key))
+        return tuple(int(value or 0) for value in replies)
+
+    def incr(self, key, expiry, amount=1):
+        count, ttl = self.pipeline(('INCRBY', self.KEY_PREFIX + key, amount), ('PTTL', self.KEY_PREFIX + key))
+        if ttl < 0:
+            self.pipeline(('PEXPIRE', self.KEY_PREFIX + key, expiry * 1000))
+        return count
+
+    def get(self, key):
+        return int(self.pipeline(('GET', self.KEY_PREFIX + key))[0] or 0)
+
+    def get_expiry(self, key):
+        ttl = self.pipeline(('PTTL', self.KEY_PREFIX + key))[0]
+        return time() + max(ttl, 0) / 1000
+
+    def check(self):
+        try:
+            return self.pipeline(('PING',))[0] == 'PONG'
+        except self.base_exceptions:
+            return False
+
+    def reset(self):
+        cursor, removed = '0', 0
+        while True:
+            cursor, keys = self.pipeline(('SCAN', cursor, 'MATCH', self.KEY_PREFIX + '*', 'COUNT', 500))[0]
+            if keys:
+                removed += self.pipeline(('DEL', *keys))[0]
+            if cursor == '0':
+                return removed
+
+    def clear(self, key):
+        self.pipeline(('DEL', self.KEY_PREFIX + key))
+
+    def write_metrics(self, pending):
+        self.pipeline(*[('HINCRBY', self.KEY_PREFIX + 'metrics', name, value) for name, value in pending.items()])
+
+    def read_metrics(self):
+        flat = self.pipeline(('HGETALL', self.KEY_PREFIX + 'metrics'))[0] or []
+        return dict(zip(flat[::2], flat[1::2]))
+
+
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
 )
 
 # ========== FILE UPLOAD CONFIGURATION ==========
@@ -93,18 +465,53 @@ EXPENSE_RECEIPT_FOLDER = 'assets/uploads/expense-receipts'
 ALLOWED_RECEIPT_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'pdf'}
 HERO_BG_FOLDER = 'assets/images/site'
 VIDEO_FOLDER = 'assets/videos/site'
+IMAGE_DERIVATIVE_FOLDER = 'assets/images/derivatives'
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm', 'mov', 'ogg', 'm4v'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['EXPENSE_RECEIPT_FOLDER'] = EXPENSE_RECEIPT_FOLDER
 app.config['HERO_BG_FOLDER'] = HERO_BG_FOLDER
 app.config['VIDEO_FOLDER'] = VIDEO_FOLDER
+app.config['IMAGE_DERIVATIVE_FOLDER'] = IMAGE_DERIVATIVE_FOLDER
+# Slow side effects (media post-processing, email delivery, unit reconciles) run as
+# background jobs. Each web process starts JOB_WORKER_THREADS worker threads when it
+# serves its first request; set it to 0 when dedicated `flask run-jobs` processes
+# (or `python init_app.py worker`) work the queue instead.
+# BACKGROUND_JOBS_INLINE runs jobs on the request thread (tests, single-process debugging).
+app.config['BACKGROUND_JOBS_INLINE'] = os.environ.get('BACKGROUND_JOBS_INLINE', 'False') == 'True'
+app.config['JOB_WORKER_THREADS'] = int(os.environ.get('JOB_WORKER_THREADS', '1'))
+# Chunked uploads bypass the single-request MAX_CONTENT_LENGTH; this caps the assembled file.
+app.config['MAX_CHUNKED_UPLOAD_SIZE'] = int(os.environ.get('MAX_CHUNKED_UPLOAD_SIZE', str(2 * 1024 * 1024 * 1024)))
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+# Pre-rendered public pages live outside the repo root, which is served as static files.
+app.config['RENDERED_PAGE_FOLDER'] = os.environ.get(
+    'RENDERED_PAGE_FOLDER', f"{HOST_SCRATCH_PREFIX}-rendered"
+)
+app.config['SERVER_RENDER_PAGES'] = os.environ.get('SERVER_RENDER_PAGES', 'True') == 'True'
+# Output of `flask build-static`: fingerprinted assets, rewritten pages and .br/.gz siblings.
+app.config['STATIC_BUILD_FOLDER'] = os.environ.get(
+    'STATIC_BUILD_FOLDER', os.path.join(app.root_path, 'static-build')
+)
 app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024  # 200MB (for video uploads)
+# Behind nginx, e.g. '/_protected/assets' mapped by an `internal` location onto assets/.
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'False') == 'True'
+# Where uploads live: 'local' (the folders above) or 's3' (any S3-compatible bucket, e.g. MinIO).
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local')
+app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET', '')
+app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL', '')
+app.config['S3_REGION'] = os.environ.get('S3_REGION', '')
+app.config['S3_ACCESS_KEY_ID'] = os.environ.get('S3_ACCESS_KEY_ID', '')
+app.config['S3_SECRET_ACCESS_KEY'] = os.environ.get('S3_SECRET_ACCESS_KEY', '')
+app.config['S3_KEY_PREFIX'] = os.environ.get('S3_KEY_PREFIX', '')
+# Public base URL for the bucket or a CDN in front of it; without it reads use presigned URLs.
+app.config['STORAGE_PUBLIC_URL'] = os.environ.get('STORAGE_PUBLIC_URL', '')
 
 # Ensure upload folder exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(EXPENSE_RECEIPT_FOLDER, exist_ok=True)
 os.makedirs(HERO_BG_FOLDER, exist_ok=True)
 os.makedirs(VIDEO_FOLDER, exist_ok=True)
+os.makedirs(IMAGE_DERIVATIVE_FOLDER, exist_ok=True)
 
 # ========== DATABASE MODELS ==========
 class Admin(db.Model):
@@ -162,6 +569,10 @@ class PropertyInquiry(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     property = db.relationship('Property', backref='inquiries')
 
+    __table_args__ = (
+        db.Index('ix_property_inquiry_created_id', 'created_at', 'id'),
+    )
+
 class ContactMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
@@ -173,6 +584,10 @@ class ContactMessage(db.Model):
     status = db.Column(db.String(20), default='new')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_contact_message_created_id', 'created_at', 'id'),
+    )
+
 class SiteContent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     slug = db.Column(db.String(120), unique=True, nullable=False)
@@ -282,6 +697,11 @@ class ProjectExpense(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     property = db.relationship('Property', backref='expenses')
 
+    __table_args__ = (
+        db.Index('ix_project_expense_property_status_date', 'property_id', 'approval_status', 'expense_date'),
+        db.Index('ix_project_expense_date_id', 'expense_date', 'id'),
+    )
+
 
 class VendorContact(db.Model):
     __tablename__ = 'vendor_contact'
@@ -310,6 +730,10 @@ class MaintenanceRecord(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     property = db.relationship('Property', backref='maintenance_records')
 
+    __table_args__ = (
+        db.Index('ix_maintenance_record_date_id', 'maintenance_date', 'id'),
+    )
+
 class PropertyUnitType(db.Model):
     __tablename__ = 'property_unit_type'
     id = db.Column(db.Integer, primary_key=True)
@@ -338,9 +762,20 @@ class Tenant(db.Model):
     status = db.Column(db.String(20), default='active')
     notes = db.Column(db.Text, nullable=True)
     serviced_by_id = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=True)
+    unit_id = db.Column(db.Integer, db.ForeignKey('property_unit.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     unit_type = db.relationship('PropertyUnitType', backref='tenants', foreign_keys=[unit_type_id])
     serviced_by = db.relationship('Admin', foreign_keys=[serviced_by_id])
+    property = db.relationship('Property', foreign_keys=[property_id])
+    unit = db.relationship('PropertyUnit', foreign_keys=[unit_id])
+
+    __table_args__ = (
+        db.Index('ix_tenant_serviced_by_created', 'serviced_by_id', 'created_at'),
+        db.Index('ix_tenant_property_status', 'property_id', 'status'),
+        db.Index('ix_tenant_unit_status', 'unit_id', 'status'),
+        db.Index('ix_tenant_created_id', 'created_at', 'id'),
+    )
 
 class PaymentRecord(db.Model):
     __tablename__ = 'payment_record'
@@ -354,6 +789,12 @@ class PaymentRecord(db.Model):
     recorded_by = db.Column(db.String(80), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_payment_record_payment_date', 'payment_date'),
+        db.Index('ix_payment_record_tenant_id', 'tenant_id'),
+        db.Index('ix_payment_record_created_id', 'created_at', 'id'),
+    )
+
 
 class PayrollPayment(db.Model):
     __tablename__ = 'payroll_payment'
@@ -369,6 +810,10 @@ class PayrollPayment(db.Model):
     paid_by = db.Column(db.String(80), nullable=True)
     user = db.relationship('Admin', foreign_keys=[user_id])
 
+    __table_args__ = (
+        db.Index('ix_payroll_payment_user_period', 'user_id', 'period_year', 'period_month'),
+    )
+
 
 class SalaryHistory(db.Model):
     """Records every salary change so past payroll months stay frozen."""
@@ -382,6 +827,10 @@ class SalaryHistory(db.Model):
     created_by = db.Column(db.String(80), nullable=True)
     user = db.relationship('Admin', foreign_keys=[user_id])
 
+    __table_args__ = (
+        db.Index('ix_salary_history_user_effective', 'user_id', 'effective_from'),
+    )
+
 
 class PasswordResetToken(db.Model):
     __tablename__ = 'password_reset_token'
@@ -403,6 +852,136 @@ class ContractTemplate(db.Model):
     updated_by = db.Column(db.String(80), nullable=True)
 
 
+class SchemaVersion(db.Model):
+    """One row per applied entry in SCHEMA_MIGRATIONS."""
+    __tablename__ = 'schema_version'
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(120), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CacheVersion(db.Model):
+    """Monotonic counters bumped on publish so every worker can revalidate its in-process caches."""
+    __tablename__ = 'cache_version'
+    name = db.Column(db.String(60), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MonthlyFinancialRollup(db.Model):
+    """Per-property monthly revenue and capital totals, maintained on every ledger write."""
+    __tablename__ = 'monthly_financial_rollup'
+    __table_args__ = (
+        db.Index('uq_monthly_financial_rollup_key', 'property_key', 'year', 'month', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('property.id'), nullable=True)
+    # property_id, or 0 for the unattributed bucket, so the unique key never contains NULL
+    property_key = db.Column(db.Integer, nullable=False, default=0)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    approved_capital = db.Column(db.Float, nullable=False, default=0.0)
+    pending_capital = db.Column(db.Float, nullable=False, default=0.0)
+    rejected_capital = db.Column(db.Float, nullable=False, default=0.0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UploadSession(db.Model):
+    """A resumable chunked upload. Chunks are appended to `<file_path>.part`, which finalize renames."""
+    __tablename__ = 'upload_session'
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(30), nullable=False, default='site_video')
+    original_name = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(300), nullable=False)
+    public_url = db.Column(db.String(300), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='uploading')  # uploading | processing | ready | failed
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ImageDerivative(db.Model):
+    """A resized WebP/AVIF copy of an image, keyed by the source's path under assets/."""
+    __tablename__ = 'image_derivative'
+    __table_args__ = (
+        db.UniqueConstraint('source_path', 'format', 'width', name='uq_image_derivative_variant'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(300), nullable=False)
+    source_digest = db.Column(db.String(16), nullable=False)
+    format = db.Column(db.String(10), nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(300), nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class StoredUpload(db.Model):
+    """One upload. Identical content shares a blob, so several rows can point at the same `path`."""
+    __tablename__ = 'stored_upload'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    path = db.Column(db.String(300), nullable=False, index=True)  # under assets/, e.g. images/properties/<sha256>.jpg
+    original_name = db.Column(db.String(255), nullable=True)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    mimetype = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class EmailOutbox(db.Model):
+    """An outbound email, written in the same transaction as the record that triggered it."""
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(160), unique=True, nullable=False)  # e.g. contact:<sha256>:notify
+    subject = db.Column(db.String(300), nullable=False)
+    recipients = db.Column(db.JSON, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    reply_to = db.Column(db.String(150), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending | sending | sent | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # failed delivery attempts so far
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_due', 'status', 'next_attempt_at'),
+    )
+
+
+class BackgroundJob(db.Model):
+    """One call of a @background_job function, queued for a worker."""
+    __tablename__ = 'background_job'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    args = db.Column(db.JSON, nullable=False, default=list)
+    kwargs = db.Column(db.JSON, nullable=False, default=dict)
+    dedupe_key = db.Column(db.String(300), nullable=True, index=True)  # set for unique jobs: name + args
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    locked_by = db.Column(db.String(120), nullable=True)  # host:pid:thread of the worker running it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_background_job_status_run_at', 'status', 'run_at'),
+    )
+
+
 class PendingSignup(db.Model):
     __tablename__ = 'pending_signup'
     id = db.Column(db.Integer, primary_key=True)
@@ -428,6 +1007,7 @@ DEFAULT_SITE_CONTENT = {
     'home.about_intro': 'BrightWave Habitat Enterprise is a Nigerian property business focused on student accommodation, land opportunities, residential homes, and estate growth, with BrightWave Hostel Phase 1 in Malete as the first live proof of delivery.',
     'home.hero_bg_path': '',
     'home.video_url': '',
+    'home.video_poster_url': '',
     'home.video_section_title': 'See BrightWave in Action',
     'home.video_section_enabled': 'false',
     'home.announcement_text': '',
@@ -504,14 +1084,13 @@ def allowed_receipt_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_RECEIPT_EXTENSIONS
 
 def ensure_cms_baseline():
-    """Create CMS tables and seed defaults lazily for existing deployments."""
-    db.create_all()
-    ensure_runtime_schema_updates()
+    """Seed default CMS content and team members. Runs from initialize_app_state, never per request."""
     changes_made = False
 
     try:
+        existing_items = {item.slug: item for item in SiteContent.query.all()}
         for slug, value in DEFAULT_SITE_CONTENT.items():
-            existing_item = SiteContent.query.filter_by(slug=slug).first()
+            existing_item = existing_items.get(slug)
             if not existing_item:
                 db.session.add(SiteContent(slug=slug, value=value))
                 changes_made = True
@@ -525,13 +1104,17 @@ def ensure_cms_baseline():
                 changes_made = True
 
         if changes_made:
+            bump_cache_version(SITE_CONTENT_CACHE_KEY)
+            bump_cache_version(TEAM_MEMBERS_CACHE_KEY)
             db.session.commit()
+            invalidate_published_cache(SITE_CONTENT_CACHE_KEY, TEAM_MEMBERS_CACHE_KEY)
     except Exception:
         db.session.rollback()
         raise
 
 
 def ensure_runtime_schema_updates():
+    """Add columns introduced after a table was first created. Idempotent; driven by the inspector."""
     inspector = inspect(db.engine)
     dialect = db.engine.dialect.name
     text_type = 'TEXT'
@@ -555,7 +1138,6 @@ def ensure_runtime_schema_updates():
             db.session.execute(text(f'ALTER TABLE project_expense ADD COLUMN approved_by {string_type}(80)'))
         if 'approved_at' not in expense_columns:
             db.session.execute(text(f'ALTER TABLE project_expense ADD COLUMN approved_at {timestamp_type}'))
-        db.session.execute(text("UPDATE project_expense SET approval_status = 'pending' WHERE approval_status IS NULL OR approval_status = ''"))
         if 'is_paid' not in expense_columns:
             db.session.execute(text('ALTER TABLE project_expense ADD COLUMN is_paid BOOLEAN NOT NULL DEFAULT 0'))
 
@@ -567,25 +1149,6 @@ def ensure_runtime_schema_updates():
     if inquiry_columns and 'inquiry_notes' not in inquiry_columns:
         db.session.execute(text('ALTER TABLE property_inquiry ADD COLUMN inquiry_notes TEXT'))
 
-    # Rename legacy "Hostel" property titles to "Apartment" branding
-    if inspector.has_table('property'):
-        db.session.execute(text("UPDATE property SET title = 'BrightWave Phase 1 Apartment' WHERE title = 'BrightWave Phase 1 Hostel'"))
-        db.session.execute(text("UPDATE property SET title = 'BrightWave Apartment Phase 2' WHERE title = 'BrightWave Hostel Phase 2'"))
-        db.session.execute(text("UPDATE property SET title = 'BrightWave Apartment Phase 3' WHERE title = 'BrightWave Hostel Phase 3'"))
-
-    # Clear placeholder capital_budget values from seed data on planning/pending properties
-    # that have no recorded expenses — these were example values not set by the user
-    if inspector.has_table('property') and inspector.has_table('project_expense'):
-        db.session.execute(text("""
-            UPDATE property SET capital_budget = NULL
-            WHERE construction_status IN ('planning', 'pending', 'not_started')
-            AND capital_budget IS NOT NULL
-            AND id NOT IN (SELECT DISTINCT property_id FROM project_expense WHERE property_id IS NOT NULL)
-        """))
-
-    if not inspector.has_table('maintenance_record'):
-        db.create_all()
-
     content_columns = {column['name'] for column in inspector.get_columns('site_content')} if inspector.has_table('site_content') else set()
     if content_columns and 'draft_value' not in content_columns:
         db.session.execute(text('ALTER TABLE site_content ADD COLUMN draft_value TEXT'))
@@ -600,23 +1163,702 @@ def ensure_runtime_schema_updates():
     if tenant_columns and 'serviced_by_id' not in tenant_columns:
         db.session.execute(text('ALTER TABLE tenant ADD COLUMN serviced_by_id INTEGER REFERENCES admin(id)'))
 
-    if not inspector.has_table('payroll_payment'):
-        db.create_all()
+    db.session.commit()
+
 
-    if not inspector.has_table('pending_signup'):
-        db.create_all()
+# ========== SCHEMA MIGRATIONS ==========
+# Each step runs exactly once per database and is recorded in `schema_version`.
+# Append new steps with the next version number; never renumber or edit an applied step.
+def _migrate_baseline_schema():
+    db.create_all()
+    ensure_unit_type_migrations()
+    ensure_runtime_schema_updates()
 
-    if not inspector.has_table('salary_history'):
-        db.create_all()
 
+def _migrate_default_expense_approval_status():
+    db.session.execute(text("UPDATE project_expense SET approval_status = 'pending' WHERE approval_status IS NULL OR approval_status = ''"))
     db.session.commit()
 
-def get_site_content():
-    ensure_cms_baseline()
+
+def _migrate_hostel_titles_to_apartment():
+    # Rename legacy "Hostel" property titles to "Apartment" branding
+    db.session.execute(text("UPDATE property SET title = 'BrightWave Phase 1 Apartment' WHERE title = 'BrightWave Phase 1 Hostel'"))
+    db.session.execute(text("UPDATE property SET title = 'BrightWave Apartment Phase 2' WHERE title = 'BrightWave Hostel Phase 2'"))
+    db.session.execute(text("UPDATE property SET title = 'BrightWave Apartment Phase 3' WHERE title = 'BrightWave Hostel Phase 3'"))
+    db.session.commit()
+
+
+def _migrate_create_new_tables():
+    db.create_all()
+
+
+def _migrate_monthly_financial_rollup():
+    # The table as first shipped. Its backfill reads tenant.property_id, which only exists
+    # from step 8 on, so the rebuild runs in step 15.
+    postgresql = db.engine.dialect.name == 'postgresql'
+    float_type = 'DOUBLE PRECISION' if postgresql else 'FLOAT'
+    timestamp_type = 'TIMESTAMP' if postgresql else 'DATETIME'
+    db.session.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS monthly_financial_rollup (
+            id {'SERIAL' if postgresql else 'INTEGER'} PRIMARY KEY,
+            property_id INTEGER REFERENCES property(id),
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            revenue {float_type} NOT NULL DEFAULT 0,
+            approved_capital {float_type} NOT NULL DEFAULT 0,
+            pending_capital {float_type} NOT NULL DEFAULT 0,
+            rejected_capital {float_type} NOT NULL DEFAULT 0,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            expense_count INTEGER NOT NULL DEFAULT 0,
+            updated_at {timestamp_type},
+            CONSTRAINT uq_monthly_financial_rollup_period UNIQUE (property_id, year, month)
+        )
+    """))
+    db.session.commit()
+
+
+def _create_indexes(indexes):
+    # Applied steps list their indexes explicitly; the live models keep gaining indexes on
+    # columns that older schemas do not have yet.
+    for name, table, columns in indexes:
+        db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+    db.session.commit()
+
+
+def _migrate_ledger_indexes():
+    _create_indexes([
+        ('ix_project_expense_property_status_date', 'project_expense', ('property_id', 'approval_status', 'expense_date')),
+        ('ix_tenant_serviced_by_created', 'tenant', ('serviced_by_id', 'created_at')),
+        ('ix_payment_record_payment_date', 'payment_record', ('payment_date',)),
+        ('ix_payment_record_tenant_id', 'payment_record', ('tenant_id',)),
+        ('ix_payroll_payment_user_period', 'payroll_payment', ('user_id', 'period_year', 'period_month')),
+        ('ix_salary_history_user_effective', 'salary_history', ('user_id', 'effective_from')),
+    ])
+
+
+def _migrate_list_cursor_indexes():
+    _create_indexes([
+        ('ix_property_inquiry_created_id', 'property_inquiry', ('created_at', 'id')),
+        ('ix_contact_message_created_id', 'contact_message', ('created_at', 'id')),
+        ('ix_project_expense_created_id', 'project_expense', ('created_at', 'id')),
+        ('ix_maintenance_record_created_id', 'maintenance_record', ('created_at', 'id')),
+        ('ix_tenant_created_id', 'tenant', ('created_at', 'id')),
+        ('ix_payment_record_created_id', 'payment_record', ('created_at', 'id')),
+    ])
+
+
+def _migrate_tenant_property_links():
+    inspector = inspect(db.engine)
+    tenant_columns = {column['name'] for column in inspector.get_columns('tenant')}
+    if 'property_id' not in tenant_columns:
+        db.session.execute(text('ALTER TABLE tenant ADD COLUMN property_id INTEGER REFERENCES property(id)'))
+    if 'unit_id' not in tenant_columns:
+        db.session.execute(text('ALTER TABLE tenant ADD COLUMN unit_id INTEGER REFERENCES property_unit(id)'))
+    db.session.commit()
+    _create_indexes([
+        ('ix_tenant_property_status', 'tenant', ('property_id', 'status')),
+        ('ix_tenant_unit_status', 'tenant', ('unit_id', 'status')),
+    ])
+    backfill_tenant_property_links()
+    db.session.commit()
+    # The rollup is rebuilt against these links in step 15
+    sync_property_units_from_tenants()
+
+
+def _migrate_financial_rollup_property_key():
+    # Unattributed rows had property_id NULL, which the old unique constraint let duplicate.
+    # A non-NULL property_key carries the upsert key; the rebuild folds duplicates back together.
+    rollup_columns = {column['name'] for column in inspect(db.engine).get_columns('monthly_financial_rollup')}
+    if 'property_key' not in rollup_columns:
+        db.session.execute(text('ALTER TABLE monthly_financial_rollup ADD COLUMN property_key INTEGER NOT NULL DEFAULT 0'))
+    rebuild_monthly_financial_rollup()
+    db.session.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_monthly_financial_rollup_key ON monthly_financial_rollup (property_key, year, month)'
+    ))
+    db.session.commit()
+
+
+def _migrate_list_sort_keys():
+    # Expense and maintenance lists page on their own date, like their unpaged order. The other
+    # lists page on created_at, where a NULL could not carry a cursor: those rows sort oldest.
+    _create_indexes([
+        ('ix_project_expense_date_id', 'project_expense', ('expense_date', 'id')),
+        ('ix_maintenance_record_date_id', 'maintenance_record', ('maintenance_date', 'id')),
+    ])
+    db.session.execute(text('DROP INDEX IF EXISTS ix_project_expense_created_id'))
+    db.session.execute(text('DROP INDEX IF EXISTS ix_maintenance_record_created_id'))
+    for table in ('property_inquiry', 'contact_message', 'tenant', 'payment_record'):
+        db.session.execute(text(f"UPDATE {table} SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL"))
+    db.session.commit()
+
+
+def _migrate_clear_placeholder_capital_budgets():
+    # Clear placeholder capital_budget values from seed data on planning/pending properties
+    # that have no recorded expenses — these were example values not set by the user
+    db.session.execute(text("""
+        UPDATE property SET capital_budget = NULL
+        WHERE construction_status IN ('planning', 'pending', 'not_started')
+        AND capital_budget IS NOT NULL
+        AND id NOT IN (SELECT DISTINCT property_id FROM project_expense WHERE property_id IS NOT NULL)
+    """))
+    db.session.commit()
+
+
+SCHEMA_MIGRATIONS = [
+    (1, 'baseline_schema', _migrate_baseline_schema),
+    (2, 'default_expense_approval_status', _migrate_default_expense_approval_status),
+    (3, 'hostel_titles_to_apartment', _migrate_hostel_titles_to_apartment),
+    (4, 'clear_placeholder_capital_budgets', _migrate_clear_placeholder_capital_budgets),
+    (5, 'cache_version_table', _migrate_create_new_tables),
+    (6, 'monthly_financial_rollup', _migrate_monthly_financial_rollup),
+    (7, 'ledger_date_indexes', _migrate_ledger_indexes),
+    (8, 'tenant_property_links', _migrate_tenant_property_links),
+    (9, 'list_cursor_indexes', _migrate_list_cursor_indexes),
+    (10, 'image_derivative_table', _migrate_create_new_tables),
+    (11, 'upload_session_table', _migrate_create_new_tables),
+    (12, 'stored_upload_table', _migrate_create_new_tables),
+    (13, 'email_outbox_table', _migrate_create_new_tables),
+    (14, 'background_job_table', _migrate_create_new_tables),
+    (15, 'financial_rollup_property_key', _migrate_financial_rollup_property_key),
+    (16, 'list_sort_keys', _migrate_list_sort_keys),
+]
+
+
+def get_applied_schema_versions():
+    if not inspect(db.engine).has_table(SchemaVersion.__tablename__):
+        return set()
+    return {row[0] for row in db.session.query(SchemaVersion.version).all()}
+
+
+def run_schema_migrations():
+    """Apply every pending step in SCHEMA_MIGRATIONS, in order. Returns the versions applied."""
+    SchemaVersion.__table__.create(db.engine, checkfirst=True)
+    applied = get_applied_schema_versions()
+    newly_applied = []
+    for version, name, step in SCHEMA_MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            step()
+            db.session.add(SchemaVersion(version=version, name=name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.error("Schema migration %s (%s) failed", version, name)
+            raise
+        logger.info("Applied schema migration %s (%s)", version, name)
+        newly_applied.append(version)
+    return newly_applied
+
+
+# Migrations and seeding run once per deploy via `flask migrate` (or init_app.py), under
+# a lock shared by every process: pg_advisory_lock on PostgreSQL, an flock'd file
+# otherwise. Web workers never migrate. They only read schema_version, and answer 503
+# while the schema is behind this release.
+SCHEMA_MIGRATION_LOCK_KEY = 0x4272696768745761  # "BrightWa", any constant shared by all workers
+
+
+def schema_lock_file_path():
+    if app.config.get('SCHEMA_LOCK_FILE'):
+        return app.config['SCHEMA_LOCK_FILE']
+    database = db.engine.url.database if db.engine.dialect.name == 'sqlite' else None
+    if database and database != ':memory:':
+        return f"{database}.migrate-lock"
+    return f"{HOST_SCRATCH_PREFIX}-migrate.lock"
+
+
+@contextmanager
+def schema_migration_lock():
+    """Hold the cross-process migration lock for the duration of the block."""
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': SCHEMA_MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': SCHEMA_MIGRATION_LOCK_KEY})
+        return
+    with open(schema_lock_file_path(), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def schema_is_current():
+    """True when every SCHEMA_MIGRATIONS step is recorded. One SELECT; False if the table is missing."""
+    try:
+        applied = {row[0] for row in db.session.query(SchemaVersion.version).all()}
+    except Exception:
+        db.session.rollback()
+        return False
+    return all(version in applied for version, _, _ in SCHEMA_MIGRATIONS)
+
+
+def migrate_database(include_sample_data=False, bootstrap_admin=False, force=False):
+    """Migrate and seed under the migration lock. Without `force`, a current schema is left alone.
+
+    Returns True when initialization ran.
+    """
+    with schema_migration_lock():
+        if not force and schema_is_current():
+            return False
+        initialize_app_state(include_sample_data=include_sample_data, bootstrap_admin=bootstrap_admin)
+        return True
+
+
+# ========== BACKGROUND JOBS ==========
+# Handlers hand slow side effects to a worker instead of doing them on the request.
+# A function decorated with @background_job keeps working when called directly, and
+# gains .delay(*args, **kwargs), which writes a background_job row. Workers are
+# threads started in each web process on first use, or `flask run-jobs` /
+# `python init_app.py worker` processes. They claim due rows with a conditional
+# UPDATE, so several workers can share the table. A failed job is retried with
+# exponential backoff until max_attempts, then left as 'failed' for the CEO dashboard
+# to show and retry. Unique jobs coalesce: delaying a call that is already pending
+# only pulls the pending row's run_at earlier.
+BACKGROUND_JOBS = {}
+JOB_RETRY_MAX_SECONDS = 3600
+JOB_CLAIM_TIMEOUT = timedelta(hours=1)
+JOB_POLL_SECONDS = 15
+job_worker_wakeup = threading.Event()
+job_worker_lock = threading.Lock()
+job_worker_pid = None
+
+
+def background_job(max_attempts=5, retry_delay=30, unique=False):
+    """Register a function as a background job and give it a .delay() that queues it."""
+    def decorator(func):
+        BACKGROUND_JOBS[func.__name__] = {
+            'func': func, 'max_attempts': max_attempts, 'retry_delay': retry_delay, 'unique': unique,
+        }
+        func.delay = lambda *args, **kwargs: enqueue_job(func.__name__, args, kwargs)
+        return func
+    return decorator
+
+
+def enqueue_job(name, args=(), kwargs=None, run_at=None):
+    """Queue a registered job and commit. Runs it right away when BACKGROUND_JOBS_INLINE is set."""
+    spec = BACKGROUND_JOBS[name]
+    kwargs = kwargs or {}
+    if app.config.get('BACKGROUND_JOBS_INLINE'):
+        if run_at is None:
+            # Like a queued job, a failure is logged rather than failing the request that queued it
+            try:
+                spec['func'](*args, **kwargs)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Background job {name} failed inline: {str(e)}")
+        return None
+    run_at = run_at or datetime.utcnow()
+    dedupe_key = None
+    if spec['unique']:
+        dedupe_key = f"{name}:{json.dumps([list(args), kwargs], sort_keys=True, default=str)}"[:300]
+        pending = BackgroundJob.query.filter_by(dedupe_key=dedupe_key, status='pending').first()
+        if pending:
+            if run_at < pending.run_at:
+                pending.run_at = run_at
+                db.session.commit()
+                wake_job_workers()
+            return pending
+    job = BackgroundJob(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        dedupe_key=dedupe_key,
+        max_attempts=spec['max_attempts'],
+        run_at=run_at,
+    )
+    db.session.add(job)
+    db.session.commit()
+    wake_job_workers()
+    return job
+
+
+def due_job_filter(now):
+    """Pending jobs whose run time has come, plus running ones abandoned by a dead worker."""
+    return or_(
+        and_(BackgroundJob.status == 'pending', BackgroundJob.run_at <= now),
+        and_(BackgroundJob.status == 'running', BackgroundJob.started_at < now - JOB_CLAIM_TIMEOUT),
+    )
+
+
+def claim_next_job(worker_id):
+    now = datetime.utcnow()
+    for (job_id,) in BackgroundJob.query.with_entities(BackgroundJob.id).filter(
+            due_job_filter(now)).order_by(BackgroundJob.run_at, BackgroundJob.id).limit(10).all():
+        claimed = BackgroundJob.query.filter(BackgroundJob.id == job_id, due_job_filter(now)).update(
+            {'status': 'running', 'started_at': now, 'locked_by': worker_id}, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(BackgroundJob, job_id)
+    return None
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome."""
+    job_id, spec = job.id, BACKGROUND_JOBS.get(job.name)
+    try:
+        if spec is None:
+            raise LookupError(f"No background job named {job.name}")
+        spec['func'](*(job.args or []), **(job.kwargs or {}))
+        error = None
+    except Exception as e:
+        db.session.rollback()
+        error = e
+    job = db.session.get(BackgroundJob, job_id)
+    job.finished_at = datetime.utcnow()
+    job.locked_by = None
+    if error is None:
+        job.status = 'done'
+        job.last_error = None
+    else:
+        job.attempts = (job.attempts or 0) + 1
+        job.last_error = str(error)[:1000]
+        if job.attempts >= job.max_attempts or spec is None:
+            job.status = 'failed'
+            logger.error(f"Background job {job.name} #{job.id} failed after {job.attempts} attempts: {job.last_error}")
+        else:
+            delay = min(spec['retry_delay'] * 2 ** (job.attempts - 1), JOB_RETRY_MAX_SECONDS)
+            job.status = 'pending'
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning(f"Background job {job.name} #{job.id} attempt {job.attempts} failed, retrying: {job.last_error}")
+    db.session.commit()
+    return error is None
+
+
+def work_jobs(worker_id=None, max_jobs=None):
+    """Run due jobs until none are left (or max_jobs ran). Returns the number run."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim_next_job(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+def run_job_worker(poll_seconds=JOB_POLL_SECONDS):
+    """Work the queue forever inside an app context, sleeping between empty polls."""
+    with app.app_context():
+        while True:
+            job_worker_wakeup.clear()
+            try:
+                work_jobs()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Background job worker error: {str(e)}")
+            finally:
+                db.session.remove()
+            job_worker_wakeup.wait(poll_seconds)
+
+
+def wake_job_workers():
+    """Start this process's worker threads on first use, then nudge them to look for work."""
+    global job_worker_pid
+    thread_count = app.config['JOB_WORKER_THREADS']
+    if thread_count <= 0:
+        return
+    with job_worker_lock:
+        # Checked by pid so a process forked from one that already started workers gets its own
+        if job_worker_pid != os.getpid():
+            for index in range(thread_count):
+                threading.Thread(target=run_job_worker, daemon=True, name=f'job-worker-{index}').start()
+            job_worker_pid = os.getpid()
+    job_worker_wakeup.set()
+
+
+@app.before_request
+def start_job_workers():
+    # Not at import: CLI commands such as `flask migrate` load this module too and must not
+    # start working the queue. The first request also catches processes forked after import.
+    # Held back while the schema is behind, when requests are refused with a 503.
+    if runtime_state_initialized and job_worker_pid != os.getpid() and app.config['JOB_WORKER_THREADS'] > 0:
+        wake_job_workers()
+
+
+def background_job_summary():
+    """Counts by status and job name, plus the most recent failures."""
+    now = datetime.utcnow()
+    counts = defaultdict(dict)
+    for name, status, count in db.session.query(
+            BackgroundJob.name, BackgroundJob.status, func.count(BackgroundJob.id)).group_by(
+            BackgroundJob.name, BackgroundJob.status).all():
+        counts[name][status] = count
+    failures = BackgroundJob.query.filter(
+        or_(BackgroundJob.status == 'failed', and_(BackgroundJob.status == 'pending', BackgroundJob.attempts > 0))
+    ).order_by(BackgroundJob.finished_at.desc()).limit(50).all()
     return {
+        "pending": sum(by_status.get('pending', 0) for by_status in counts.values()),
+        "overdue": BackgroundJob.query.filter(
+            BackgroundJob.status == 'pending', BackgroundJob.run_at < now - timedelta(minutes=5)).count(),
+        "running": sum(by_status.get('running', 0) for by_status in counts.values()),
+        "failed": sum(by_status.get('failed', 0) for by_status in counts.values()),
+        "by_name": {name: dict(by_status) for name, by_status in counts.items()},
+        "recent_failures": [{
+            "id": job.id,
+            "name": job.name,
+            "status": job.status,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "last_error": job.last_error,
+            "run_at": job.run_at.isoformat() if job.run_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        } for job in failures],
+    }
+
+
+@app.cli.command('run-jobs')
+@click.option('--once', is_flag=True, help='Run the jobs that are due now, then exit.')
+def run_jobs_command(once):
+    """Work the background job queue (run as a separate worker process)."""
+    if once:
+        print(f"Ran {work_jobs()} background job(s)")
+        return
+    print(f"Background job worker polling every {JOB_POLL_SECONDS}s")
+    run_job_worker()
+
+
+# ========== PUBLISHED CONTENT CACHE ==========
+# Each worker keeps published CMS data (the SiteContent dict with its serialized
+# JSON body and ETag, and the active team list) in memory. Entries are stamped
+# with a `cache_version` row that the publishing write bumps; after
+# PUBLISHED_CACHE_TTL seconds a worker re-checks that single row and only
+# re-reads the underlying table when the version has moved.
+SITE_CONTENT_CACHE_KEY = 'site_content'
+TEAM_MEMBERS_CACHE_KEY = 'team_members'
+PUBLISHED_CACHE_TTL = float(os.environ.get('SITE_CONTENT_CACHE_TTL', '5'))
+published_cache_lock = threading.Lock()
+published_cache = {}
+
+
+def get_cache_version(name):
+    version = db.session.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_cache_version(name):
+    """Increment a cache version inside the caller's transaction (caller commits)."""
+    # An upsert, so two first publishes of one name cannot both insert the row
+    table = CacheVersion.__table__
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    now = datetime.utcnow()
+    stmt = insert(table).values(name=name, version=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': table.c.version + 1, 'updated_at': now},
+    )
+    db.session.execute(stmt)
+
+
+def invalidate_published_cache(*names):
+    with published_cache_lock:
+        for name in names or list(published_cache):
+            published_cache.pop(name, None)
+
+
+def get_versioned_cache_entry(name, loader):
+    """Return loader()'s dict stamped with the current `name` version, reusing this worker's copy."""
+    now = time()
+    slot = published_cache.get(name)
+    if slot and now - slot['checked_at'] < PUBLISHED_CACHE_TTL:
+        return slot['entry']
+
+    version = get_cache_version(name)
+    if slot and slot['entry']['version'] == version:
+        slot['checked_at'] = now
+        return slot['entry']
+
+    entry = loader()
+    entry['version'] = version
+    with published_cache_lock:
+        published_cache[name] = {'entry': entry, 'checked_at': now}
+    return entry
+
+
+def _load_published_site_content():
+    content = {
         item.slug: item.value
         for item in SiteContent.query.order_by(SiteContent.slug.asc()).all()
     }
+    body = app.json.dumps(content).encode('utf-8')
+    return {
+        'content': content,
+        'body': body,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+    }
+
+
+def _load_published_team_members():
+    members = TeamMember.query.filter_by(is_active=True).order_by(TeamMember.sort_order.asc(), TeamMember.created_at.asc()).all()
+    serialized = [serialize_team_member(member) for member in members]
+    body = app.json.dumps(serialized).encode('utf-8')
+    return {'members': serialized, 'etag': hashlib.sha256(body).hexdigest()[:32]}
+
+
+def get_published_site_content():
+    """Return {'version', 'content', 'body', 'etag'} for the live site content."""
+    return get_versioned_cache_entry(SITE_CONTENT_CACHE_KEY, _load_published_site_content)
+
+
+def get_published_team_members_entry():
+    return get_versioned_cache_entry(TEAM_MEMBERS_CACHE_KEY, _load_published_team_members)
+
+
+def get_published_team_members():
+    return get_published_team_members_entry()['members']
+
+
+def get_site_content():
+    return get_published_site_content()['content']
+
+
+# ========== MONTHLY FINANCIAL ROLLUP ==========
+# monthly_financial_rollup holds one row per (property_id, year, month). Every
+# write to PaymentRecord or ProjectExpense captures the record's contribution
+# before and after the change and passes both to apply_rollup_change() inside
+# the same transaction. Payments are attributed to their tenant's property_id;
+# payments without a linked tenant land on property_id NULL.
+ROLLUP_CAPITAL_COLUMNS = {
+    'approved': 'approved_capital',
+    'pending': 'pending_capital',
+    'rejected': 'rejected_capital',
+}
+
+
+def resolve_property_id_for_name(property_name, properties=None):
+    """Return the id of the longest Property title contained in property_name, or None."""
+    if not property_name:
+        return None
+    if properties is None:
+        properties = db.session.query(Property.id, Property.title).all()
+    haystack = property_name.lower()
+    matches = [(len(title), prop_id) for prop_id, title in properties if title and title.lower() in haystack]
+    return max(matches)[1] if matches else None
+
+
+def _payment_contribution(payment, property_id):
+    return (
+        (property_id, payment.payment_date.year, payment.payment_date.month),
+        {'revenue': payment.amount or 0, 'payment_count': 1},
+    )
+
+
+def payment_rollup_contribution(payment):
+    tenant = Tenant.query.get(payment.tenant_id) if payment.tenant_id else None
+    return _payment_contribution(payment, tenant.property_id if tenant else None)
+
+
+def expense_rollup_contribution(expense):
+    values = {'expense_count': 1}
+    column = ROLLUP_CAPITAL_COLUMNS.get(expense.approval_status)
+    if column:
+        values[column] = expense.amount or 0
+    return ((expense.property_id, expense.expense_date.year, expense.expense_date.month), values)
+
+
+ROLLUP_TOTAL_COLUMNS = ('revenue', 'approved_capital', 'pending_capital', 'rejected_capital', 'payment_count', 'expense_count')
+
+
+def _add_to_rollup(key, deltas):
+    # A single INSERT ... ON CONFLICT DO UPDATE, so two first writes to one month cannot both insert
+    property_id, year, month = key
+    table = MonthlyFinancialRollup.__table__
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    now = datetime.utcnow()
+    stmt = insert(table).values(
+        property_id=property_id, property_key=property_id or 0, year=year, month=month, updated_at=now,
+        **{column: deltas.get(column, 0) for column in ROLLUP_TOTAL_COLUMNS},
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['property_key', 'year', 'month'],
+        set_={**{column: table.c[column] + stmt.excluded[column] for column in deltas}, 'updated_at': now},
+    )
+    db.session.execute(stmt)
+
+
+def apply_rollup_change(before, after):
+    """Move a ledger record's contribution from `before` to `after` (either may be None); caller commits."""
+    if before == after:
+        return
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution:
+            key, values = contribution
+            _add_to_rollup(key, {column: sign * value for column, value in values.items()})
+
+
+def release_property_rollup(property_id):
+    """Before a property is deleted, move its tenants' revenue to the unattributed bucket and drop its rows; caller commits."""
+    pay_year = func.extract('year', PaymentRecord.payment_date)
+    pay_month = func.extract('month', PaymentRecord.payment_date)
+    for yr, mo, amount, count in db.session.query(
+        pay_year, pay_month, func.sum(PaymentRecord.amount), func.count(PaymentRecord.id)
+    ).join(Tenant, Tenant.id == PaymentRecord.tenant_id).filter(Tenant.property_id == property_id).group_by(pay_year, pay_month).all():
+        _add_to_rollup((None, int(yr), int(mo)), {'revenue': amount or 0, 'payment_count': count})
+    MonthlyFinancialRollup.query.filter_by(property_key=property_id).delete(synchronize_session=False)
+
+
+def reattribute_tenant_payments(tenant, old_property_id, new_property_id):
+    """Move a tenant's payments between properties after its property_id changes; caller commits."""
+    if old_property_id == new_property_id:
+        return
+    for payment in PaymentRecord.query.filter_by(tenant_id=tenant.id).all():
+        apply_rollup_change(_payment_contribution(payment, old_property_id), _payment_contribution(payment, new_property_id))
+
+
+def rebuild_monthly_financial_rollup():
+    """Recompute the rollup from both ledgers; returns the number of rows written (caller commits)."""
+    from sqlalchemy import func as sqlfunc
+
+    MonthlyFinancialRollup.query.delete(synchronize_session=False)
+    tenant_property = dict(db.session.query(Tenant.id, Tenant.property_id).all())
+    rows = defaultdict(lambda: defaultdict(float))
+
+    pay_year = sqlfunc.extract('year', PaymentRecord.payment_date)
+    pay_month = sqlfunc.extract('month', PaymentRecord.payment_date)
+    for tenant_id, yr, mo, amount, count in db.session.query(
+        PaymentRecord.tenant_id, pay_year, pay_month, sqlfunc.sum(PaymentRecord.amount), sqlfunc.count(PaymentRecord.id)
+    ).group_by(PaymentRecord.tenant_id, pay_year, pay_month).all():
+        row = rows[(tenant_property.get(tenant_id), int(yr), int(mo))]
+        row['revenue'] += amount or 0
+        row['payment_count'] += count
+
+    exp_year = sqlfunc.extract('year', ProjectExpense.expense_date)
+    exp_month = sqlfunc.extract('month', ProjectExpense.expense_date)
+    for property_id, status, yr, mo, amount, count in db.session.query(
+        ProjectExpense.property_id, ProjectExpense.approval_status, exp_year, exp_month,
+        sqlfunc.sum(ProjectExpense.amount), sqlfunc.count(ProjectExpense.id)
+    ).group_by(ProjectExpense.property_id, ProjectExpense.approval_status, exp_year, exp_month).all():
+        row = rows[(property_id, int(yr), int(mo))]
+        row['expense_count'] += count
+        if status in ROLLUP_CAPITAL_COLUMNS:
+            row[ROLLUP_CAPITAL_COLUMNS[status]] += amount or 0
+
+    for (property_id, yr, mo), values in rows.items():
+        db.session.add(MonthlyFinancialRollup(
+            property_id=property_id,
+            property_key=property_id or 0,
+            year=yr,
+            month=mo,
+            revenue=values['revenue'],
+            approved_capital=values['approved_capital'],
+            pending_capital=values['pending_capital'],
+            rejected_capital=values['rejected_capital'],
+            payment_count=int(values['payment_count']),
+            expense_count=int(values['expense_count']),
+        ))
+    return len(rows)
+
+
+@app.cli.command('rebuild-financial-rollup')
+def rebuild_financial_rollup_command():
+    """Backfill monthly_financial_rollup from PaymentRecord and ProjectExpense."""
+    written = rebuild_monthly_financial_rollup()
+    db.session.commit()
+    print(f"Rebuilt monthly_financial_rollup: {written} rows")
 
 def serialize_team_member(member):
     return {
@@ -703,28 +1945,303 @@ def serialize_project_expense(expense):
     }
 
 
-def serialize_vendor_contact(vendor):
-    return {
-        'id': vendor.id,
-        'name': vendor.name,
-        'contact_type': vendor.contact_type,
-        'phone': vendor.phone or '',
-        'notes': vendor.notes or '',
-        'is_active': vendor.is_active,
-    }
+def serialize_vendor_contact(vendor):
+    return {
+        'id': vendor.id,
+        'name': vendor.name,
+        'contact_type': vendor.contact_type,
+        'phone': vendor.phone or '',
+        'notes': vendor.notes or '',
+        'is_active': vendor.is_active,
+    }
+
+
+def serialize_property_inquiry(inquiry):
+    return {
+        'id': inquiry.id,
+        'property_id': inquiry.property_id,
+        'property_title': inquiry.property.title if inquiry.property else 'General Inquiry',
+        'full_name': inquiry.full_name,
+        'email': inquiry.email,
+        'phone': inquiry.phone,
+        'inquiry_type': inquiry.inquiry_type,
+        'university': inquiry.university,
+        'year_of_study': inquiry.year_of_study,
+        'budget_range': inquiry.budget_range,
+        'preferred_move_date': inquiry.preferred_move_date.isoformat() if inquiry.preferred_move_date else None,
+        'message': inquiry.message,
+        'status': inquiry.status,
+        'priority': inquiry.priority,
+        'inquiry_notes': inquiry.inquiry_notes or '',
+        'created_at': inquiry.created_at.isoformat()
+    }
+
+
+def serialize_contact_message(msg):
+    return {
+        'id': msg.id,
+        'full_name': msg.full_name,
+        'email': msg.email,
+        'phone': msg.phone,
+        'subject': msg.subject,
+        'message': msg.message,
+        'form_origin': msg.form_origin,
+        'status': msg.status,
+        'created_at': msg.created_at.isoformat()
+    }
+
+
+def serialize_tenant(t):
+    return {
+        'id': t.id,
+        'name': t.name,
+        'email': t.email or '',
+        'phone': t.phone or '',
+        'property_name': t.property_name or '',
+        'property_id': t.property_id,
+        'unit_number': t.unit_number or '',
+        'unit_id': t.unit_id,
+        'unit_type_id': t.unit_type_id,
+        'unit_type_name': t.unit_type.name if t.unit_type else '',
+        'lease_start': t.lease_start.isoformat() if t.lease_start else '',
+        'lease_end': t.lease_end.isoformat() if t.lease_end else '',
+        'monthly_rent': t.monthly_rent or 0,
+        'status': t.status,
+        'notes': t.notes or '',
+        'serviced_by_id': t.serviced_by_id,
+        'serviced_by_name': (t.serviced_by.display_name or t.serviced_by.username) if t.serviced_by else '',
+        'created_at': t.created_at.strftime('%Y-%m-%d'),
+    }
+
+
+def serialize_maintenance_record(r):
+    return {
+        'id': r.id,
+        'property_id': r.property_id,
+        'property_title': r.property.title if r.property else '',
+        'maintenance_date': r.maintenance_date.isoformat() if r.maintenance_date else '',
+        'title': r.title,
+        'category': r.category,
+        'description': r.description or '',
+        'vendor_name': r.vendor_name or '',
+        'cost': r.cost,
+        'status': r.status,
+        'recorded_by': r.recorded_by or '',
+        'created_at': r.created_at.strftime('%Y-%m-%d %H:%M') if r.created_at else '',
+    }
+
+
+# ========== LIST PAGINATION ==========
+# The admin list endpoints page newest first on (sort column, id); the sort column is
+# created_at unless a list is ordered by its own date (expenses, maintenance), so a page
+# is always a slice of the unpaged order. Paging is opt-in: without ?limit or ?cursor
+# they return the same bare arrays the dashboard already reads.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ListArgumentError(ValueError):
+    """A malformed ?limit, ?cursor or date filter. The message is fixed and safe to return."""
+
+
+def encode_list_cursor(row, sort_column):
+    raw = f"{getattr(row, sort_column.key).isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_list_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode()).decode()
+        sort_value, row_id = raw.split('|', 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except ValueError as exc:
+        raise ListArgumentError('Invalid cursor') from exc
+
+
+def parse_list_date(arg, offset):
+    raw = (request.args.get(arg) or '').strip()
+    if not raw:
+        return None
+    try:
+        return date_type.fromisoformat(raw) + timedelta(days=offset)
+    except ValueError as exc:
+        raise ListArgumentError(f"{arg} must be YYYY-MM-DD") from exc
+
+
+def parse_list_args():
+    """Read limit, cursor, fields and the date range from the query string.
+
+    Raises ListArgumentError on bad input; handlers call it before touching the database.
+    """
+    raw_limit = (request.args.get('limit') or '').strip()
+    cursor = (request.args.get('cursor') or '').strip()
+    limit = None
+    if raw_limit:
+        try:
+            limit = max(1, min(int(raw_limit), MAX_PAGE_SIZE))
+        except ValueError as exc:
+            raise ListArgumentError('limit must be an integer') from exc
+    elif cursor:
+        limit = DEFAULT_PAGE_SIZE
+    return {
+        'limit': limit,
+        'cursor': decode_list_cursor(cursor) if cursor else None,
+        'fields': [f.strip() for f in (request.args.get('fields') or '').split(',') if f.strip()],
+        # ?date_from / ?date_to, both inclusive; stored as [from, day after to)
+        'date_range': (parse_list_date('date_from', 0), parse_list_date('date_to', 1)),
+    }
+
+
+def apply_list_search(query, *columns):
+    term = (request.args.get('q') or '').strip()
+    if not term:
+        return query
+    pattern = f"%{term}%"
+    return query.filter(or_(*[column.ilike(pattern) for column in columns]))
+
+
+def apply_list_date_range(query, column, list_args):
+    """Filter on the date range parse_list_args read."""
+    is_datetime = isinstance(column.type, db.DateTime)
+    start, end = (
+        datetime.combine(bound, datetime.min.time()) if bound is not None and is_datetime else bound
+        for bound in list_args['date_range']
+    )
+    if start is not None:
+        query = query.filter(column >= start)
+    if end is not None:
+        query = query.filter(column < end)
+    return query
+
+
+def count_by_column(query, column):
+    """Row count of a filtered list query, plus a breakdown by column (usually status)."""
+    rows = query.order_by(None).with_entities(column, func.count()).group_by(column).all()
+    by_value = {(value or ''): count for value, count in rows}
+    return {'count': sum(by_value.values()), 'by_' + column.key: by_value}
+
+
+def keyset_page(query, model, cursor, limit, sort_column=None):
+    """Fetch one page newest-first after cursor. Returns (rows, next_cursor)."""
+    sort_column = sort_column if sort_column is not None else model.created_at
+    # Migration 16 backfilled NULL created_at; a NULL row could not carry a cursor anyway.
+    query = query.filter(sort_column.isnot(None))
+    if cursor:
+        sort_value, row_id = cursor
+        if not isinstance(sort_column.type, db.DateTime):
+            sort_value = sort_value.date()
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, model.id < row_id),
+        ))
+    rows = query.order_by(sort_column.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_list_cursor(rows[limit - 1], sort_column) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def shape_list_rows(rows, serialize, fields):
+    items = [serialize(row) for row in rows]
+    if fields:
+        items = [{key: item[key] for key in fields if key in item} for item in items]
+    return items
+
+
+def list_page_response(query, model, serialize, list_args, totals, sort_column=None):
+    rows, next_cursor = keyset_page(query, model, list_args['cursor'], list_args['limit'], sort_column)
+    return jsonify({
+        'items': shape_list_rows(rows, serialize, list_args['fields']),
+        'next_cursor': next_cursor,
+        'limit': list_args['limit'],
+        'totals': totals,
+    })
 
 
 def expense_can_be_approved_by(admin):
     return bool(admin and admin_has_any_role(admin, 'CEO'))
 
 
+# ========== REPORTING PERIODS ==========
+# One place that knows where months, quarters and (fiscal) years begin and end.
+# Periods are half-open: start <= d < end. Aggregations group by (year, month)
+# once and fold those rows into buckets with bucket_key(), so every bucket comes
+# from the same query. Fiscal years are labelled by the calendar year they start in.
+PERIOD_GRANULARITIES = ('month', 'quarter', 'year')
+app.config['FISCAL_YEAR_START_MONTH'] = int(os.environ.get('FISCAL_YEAR_START_MONTH', '1'))
+
+
+def add_months(base_date, months):
+    """Shift a date by whole calendar months, clamping the day to the target month's length."""
+    import calendar
+    month_index = base_date.year * 12 + (base_date.month - 1) + months
+    year, month = divmod(month_index, 12)
+    day = min(base_date.day, calendar.monthrange(year, month + 1)[1])
+    return base_date.replace(year=year, month=month + 1, day=day)
+
+
 def add_years_safe(base_date, years):
     if not base_date:
         return None
-    try:
-        return base_date.replace(year=base_date.year + years)
-    except ValueError:
-        return base_date.replace(month=2, day=28, year=base_date.year + years)
+    return add_months(base_date, 12 * years)
+
+
+def bucket_key(granularity, year, month, fiscal_start_month=1):
+    """Map a calendar (year, month) onto its month, quarter or fiscal-year bucket key."""
+    if granularity == 'month':
+        return (year, month)
+    offset = (month - fiscal_start_month) % 12
+    fiscal_year = year if month >= fiscal_start_month else year - 1
+    if granularity == 'quarter':
+        return (fiscal_year, offset // 3 + 1)
+    if granularity == 'year':
+        return fiscal_year
+    raise ValueError(f"Unknown period granularity: {granularity}")
+
+
+def period_for(granularity, on_date, fiscal_start_month=1):
+    """Return the period dict ({'key', 'start', 'end', 'label'}) containing on_date."""
+    key = bucket_key(granularity, on_date.year, on_date.month, fiscal_start_month)
+    if granularity == 'month':
+        start = date_type(on_date.year, on_date.month, 1)
+        end = add_months(start, 1)
+        label = start.strftime("%b '%y")
+    elif granularity == 'quarter':
+        fiscal_year, quarter = key
+        start = add_months(date_type(fiscal_year, fiscal_start_month, 1), (quarter - 1) * 3)
+        end = add_months(start, 3)
+        label = f"Q{quarter} {'FY' if fiscal_start_month != 1 else ''}{fiscal_year}"
+    else:
+        start = date_type(key, fiscal_start_month, 1)
+        end = add_months(start, 12)
+        label = f"FY{key}" if fiscal_start_month != 1 else str(key)
+    return {'key': key, 'start': start, 'end': end, 'label': label}
+
+
+def iter_periods(granularity, first_date, last_date, fiscal_start_month=1):
+    """Every period from the one containing first_date through the one containing last_date."""
+    periods = []
+    period = period_for(granularity, first_date, fiscal_start_month)
+    while period['start'] <= last_date:
+        periods.append(period)
+        period = period_for(granularity, period['end'], fiscal_start_month)
+    return periods
+
+
+def last_n_periods(granularity, count, today=None, fiscal_start_month=1):
+    """The `count` most recent periods ending with the current one, oldest first."""
+    today = today or date_type.today()
+    step = {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+    current = period_for(granularity, today, fiscal_start_month)
+    return iter_periods(granularity, add_months(current['start'], -step * (count - 1)), today, fiscal_start_month)
+
+
+def fold_into_periods(periods, granularity, monthly_values, fiscal_start_month=1):
+    """Sum {(year, month): value} rows into the given periods; returns {period key: total}."""
+    totals = {period['key']: 0.0 for period in periods}
+    for (year, month), value in monthly_values.items():
+        key = bucket_key(granularity, year, month, fiscal_start_month)
+        if key in totals:
+            totals[key] += value or 0
+    return totals
 
 
 def build_debt_distribution_schedule(amount, roi_rate, term_years, expected_completion_date=None):
@@ -791,7 +2308,7 @@ def create_admin_user():
     admin = Admin(
         username=username,
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=hash_password(password),
         role='CEO',
         has_signed_contract=True
     )
@@ -909,48 +2426,142 @@ def seed_default_units():
     db.session.commit()
 
 
-def sync_property_units_from_tenants():
-    units = PropertyUnit.query.order_by(PropertyUnit.property_id.asc(), PropertyUnit.sort_order.asc()).all()
-    if not units:
-        return
+ACTIVE_TENANT_STATUSES = ('active', 'reserved')
 
-    active_statuses = {'active', 'reserved'}
-    active_tenants = Tenant.query.filter(Tenant.status.in_(active_statuses)).all()
-    occupancy_map = {}
-    for tenant in active_tenants:
-        key = (
-            (tenant.property_name or '').strip().lower(),
-            (tenant.unit_number or '').strip().upper(),
-        )
-        if key[0] and key[1]:
-            occupancy_map[key] = tenant
 
+def resolve_unit_id(property_id, unit_number):
+    from sqlalchemy import func as sqlfunc
+
+    code = (unit_number or '').strip().upper()
+    if not property_id or not code:
+        return None
+    return db.session.query(PropertyUnit.id).filter(
+        PropertyUnit.property_id == property_id,
+        sqlfunc.upper(sqlfunc.trim(PropertyUnit.unit_code)) == code,
+    ).scalar()
+
+
+def link_tenant_to_property(tenant, property_id=None):
+    """Set tenant.property_id/unit_id from an explicit id, the property_name string, or the unit type.
+
+    An explicit property_id wins, and property_name is rewritten to that property's title.
+    """
+    explicit = bool(property_id)
+    if not property_id:
+        property_id = resolve_property_id_for_name(tenant.property_name)
+    if not property_id and tenant.unit_type_id:
+        unit_type = PropertyUnitType.query.get(tenant.unit_type_id)
+        property_id = unit_type.property_id if unit_type else None
+    tenant.property_id = int(property_id) if property_id else None
+    if tenant.property_id and (explicit or not tenant.property_name):
+        prop = Property.query.get(tenant.property_id)
+        tenant.property_name = prop.title if prop else tenant.property_name
+    tenant.unit_id = resolve_unit_id(tenant.property_id, tenant.unit_number)
+
+
+def backfill_tenant_property_links():
+    """Resolve property_id/unit_id for tenants that only carry name strings (caller commits)."""
+    properties = db.session.query(Property.id, Property.title).all()
+    unit_ids = {
+        (property_id, (unit_code or '').strip().upper()): unit_id
+        for unit_id, property_id, unit_code in db.session.query(PropertyUnit.id, PropertyUnit.property_id, PropertyUnit.unit_code).all()
+    }
+    linked = 0
+    for tenant in Tenant.query.filter(db.or_(Tenant.property_id.is_(None), Tenant.unit_id.is_(None))).all():
+        property_id = tenant.property_id or resolve_property_id_for_name(tenant.property_name, properties)
+        unit_id = unit_ids.get((property_id, (tenant.unit_number or '').strip().upper())) if property_id else None
+        if (property_id, unit_id) != (tenant.property_id, tenant.unit_id):
+            tenant.property_id = property_id
+            tenant.unit_id = unit_id
+            linked += 1
+    return linked
+
+
+def _apply_unit_occupancy(unit, occupied):
+    desired_status = 'occupied' if occupied else ('available' if unit.status != 'maintenance' else 'maintenance')
+    if unit.status == desired_status:
+        return False
+    unit.status = desired_status
+    return True
+
+
+def _apply_property_room_counts(prop, prop_units):
     changed = False
+    available_count = sum(1 for u in prop_units if u.status == 'available')
+    if prop.total_rooms != len(prop_units):
+        prop.total_rooms = len(prop_units)
+        changed = True
+    if prop.available_rooms != available_count:
+        prop.available_rooms = available_count
+        changed = True
+    return changed
+
+
+@background_job(unique=True)
+def sync_property_units_from_tenants(property_id=None):
+    """Full reconcile of tenant links, unit occupancy and room counts.
+
+    Request handlers use sync_units() instead; this runs at deploy time,
+    from `flask --app app reconcile-units`, and as a background job for one
+    property after it is edited.
+    """
+    changed = backfill_tenant_property_links() > 0
+    unit_q = PropertyUnit.query
+    if property_id:
+        unit_q = unit_q.filter(PropertyUnit.property_id == property_id)
+    units = unit_q.order_by(PropertyUnit.property_id.asc(), PropertyUnit.sort_order.asc()).all()
+
+    occupied_unit_ids = {
+        unit_id for (unit_id,) in db.session.query(Tenant.unit_id)
+        .filter(Tenant.unit_id.isnot(None), Tenant.status.in_(ACTIVE_TENANT_STATUSES)).all()
+    }
+
+    units_by_property = defaultdict(list)
     for unit in units:
-        prop_name = (unit.property.title or '').strip().lower() if unit.property else ''
-        unit_key = (prop_name, (unit.unit_code or '').strip().upper())
-        occupied = unit_key in occupancy_map
-        desired_status = 'occupied' if occupied else ('available' if unit.status != 'maintenance' else 'maintenance')
-        if unit.status != desired_status:
-            unit.status = desired_status
-            changed = True
+        units_by_property[unit.property_id].append(unit)
+
+    if units_by_property:
+        for prop in Property.query.filter(Property.id.in_(list(units_by_property))).all():
+            for unit in units_by_property[prop.id]:
+                changed = _apply_unit_occupancy(unit, unit.id in occupied_unit_ids) or changed
+            changed = _apply_property_room_counts(prop, units_by_property[prop.id]) or changed
+
+    if changed:
+        db.session.commit()
 
-    properties = Property.query.all()
-    for prop in properties:
-        prop_units = [u for u in units if u.property_id == prop.id]
-        if prop_units:
-            available_count = sum(1 for u in prop_units if u.status == 'available')
-            if prop.total_rooms != len(prop_units):
-                prop.total_rooms = len(prop_units)
-                changed = True
-            if prop.available_rooms != available_count:
-                prop.available_rooms = available_count
-                changed = True
+
+def sync_units(unit_ids):
+    """Recompute occupancy for just the given units and their properties' room counts."""
+    unit_ids = {unit_id for unit_id in unit_ids if unit_id}
+    if not unit_ids:
+        return
+    occupied_unit_ids = {
+        unit_id for (unit_id,) in db.session.query(Tenant.unit_id)
+        .filter(Tenant.unit_id.in_(unit_ids), Tenant.status.in_(ACTIVE_TENANT_STATUSES)).all()
+    }
+    changed = False
+    property_ids = set()
+    for unit in PropertyUnit.query.filter(PropertyUnit.id.in_(unit_ids)).all():
+        changed = _apply_unit_occupancy(unit, unit.id in occupied_unit_ids) or changed
+        property_ids.add(unit.property_id)
+
+    prop_units = defaultdict(list)
+    for unit in PropertyUnit.query.filter(PropertyUnit.property_id.in_(property_ids)).all():
+        prop_units[unit.property_id].append(unit)
+    for prop in Property.query.filter(Property.id.in_(property_ids)).all():
+        changed = _apply_property_room_counts(prop, prop_units[prop.id]) or changed
 
     if changed:
         db.session.commit()
 
 
+@app.cli.command('reconcile-units')
+def reconcile_units_command():
+    """Full recompute of unit occupancy and property room counts from tenants."""
+    sync_property_units_from_tenants()
+    print("Reconciled property units against active tenants")
+
+
 def seed_default_construction_updates():
     existing = ConstructionUpdate.query.first()
     if existing:
@@ -1130,8 +2741,7 @@ def seed_default_unit_types():
 
 def initialize_app_state(include_sample_data=False, bootstrap_admin=False):
     """Run one-time database initialization outside the web worker startup path."""
-    db.create_all()
-    ensure_unit_type_migrations()
+    run_schema_migrations()
     ensure_cms_baseline()
     seed_contract_templates()
     if include_sample_data:
@@ -1149,8 +2759,12 @@ def env_flag(name, default="False"):
     return os.environ.get(name, default).strip().lower() == "true"
 
 
+class SchemaNotCurrent(RuntimeError):
+    """The database has not been migrated to this release; `flask migrate` has to run first."""
+
+
 def ensure_runtime_state():
-    """Initialize DB-backed site state once per process, with a per-request fallback."""
+    """Make sure this process runs against a migrated schema. Never migrates; raises SchemaNotCurrent."""
     global runtime_state_initialized
 
     if runtime_state_initialized:
@@ -1159,14 +2773,42 @@ def ensure_runtime_state():
     with runtime_state_lock:
         if runtime_state_initialized:
             return
-
-        initialize_app_state(
-            include_sample_data=env_flag("INIT_SAMPLE_DATA", "True"),
-            bootstrap_admin=env_flag("BOOTSTRAP_ADMIN", "False"),
-        )
+        if not schema_is_current():
+            raise SchemaNotCurrent("Database schema is behind this release; run `flask --app app migrate`")
         runtime_state_initialized = True
 
 
+@app.before_request
+def require_current_schema():
+    # Answered before any handler, whose broad except blocks would turn the refusal into a 500.
+    # The check is repeated per request only while the schema is behind, so workers recover
+    # without a restart once `flask migrate` has run.
+    if runtime_state_initialized or request.path == '/health':
+        return None
+    try:
+        ensure_runtime_state()
+    except SchemaNotCurrent as e:
+        logger.error(str(e))
+        response = jsonify({"success": False, "message": "Service is being updated, please try again shortly"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    return None
+
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations and seed defaults, once per deploy."""
+    applied_before = get_applied_schema_versions()
+    migrate_database(
+        include_sample_data=env_flag("INIT_SAMPLE_DATA", "True"),
+        bootstrap_admin=env_flag("BOOTSTRAP_ADMIN", "False"),
+        force=True,
+    )
+    newly_applied = sorted(get_applied_schema_versions() - applied_before)
+    print(f"Applied migrations {newly_applied}" if newly_applied else "Schema already up to date")
+
+
 def get_csrf_token():
     token = session.get('csrf_token')
     if not token:
@@ -1180,7 +2822,178 @@ def validate_csrf_token():
     provided = request.headers.get('X-CSRF-Token') or request.form.get('csrf_token')
     return bool(expected and provided and secrets.compare_digest(expected, provided))
 
+# ========== PASSWORD HASHING ==========
+# Every password hash and check goes through this section. PASSWORD_HASH_METHOD takes
+# a Werkzeug method string ("scrypt:32768:8:1", "pbkdf2:sha256:600000"). A successful
+# login whose stored hash used other parameters re-hashes the password with the current
+# ones. The work runs on a small per-process pool (PASSWORD_POOL=thread|process|inline).
+# At most PASSWORD_POOL_MAX_PENDING hashes may be in flight per process. That bound alone
+# never fills under gunicorn sync workers, which serve one request each. So every hash
+# also holds one of PASSWORD_HOST_SLOTS flock'd slot files, shared by all of this
+# deployment's processes on the host. A lock held by a crashed worker is released by the
+# kernel. A check waits up to PASSWORD_POOL_WAIT seconds for both, then login answers 503.
+# A new hash (signup, reset, account changes) waits up to PASSWORD_HASH_WAIT, then also 503s.
+# That stops a login burst from piling CPU-bound work onto the host.
+# `flask password-benchmark` reports hashes/sec for each setting on the current host.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['PASSWORD_POOL'] = os.environ.get('PASSWORD_POOL', 'thread')
+app.config['PASSWORD_POOL_WORKERS'] = int(os.environ.get('PASSWORD_POOL_WORKERS', '2'))
+app.config['PASSWORD_POOL_MAX_PENDING'] = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', '8'))
+app.config['PASSWORD_POOL_WAIT'] = float(os.environ.get('PASSWORD_POOL_WAIT', '3'))
+app.config['PASSWORD_HASH_WAIT'] = float(os.environ.get('PASSWORD_HASH_WAIT', '10'))
+app.config['PASSWORD_HOST_SLOTS'] = int(os.environ.get('PASSWORD_HOST_SLOTS', str(os.cpu_count() or 2)))
+app.config['PASSWORD_SLOT_FOLDER'] = os.environ.get('PASSWORD_SLOT_FOLDER', f"{HOST_SCRATCH_PREFIX}-password-slots")
+PASSWORD_SLOT_POLL_SECONDS = 0.02
+PASSWORD_BENCHMARK_METHODS = (
+    'scrypt:16384:8:1', 'scrypt:32768:8:1', 'scrypt:65536:8:1', 'pbkdf2:sha256:310000', 'pbkdf2:sha256:600000',
+)
+password_pool_state = {'key': None, 'executor': None, 'slots': None}
+password_pool_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """The password pool or the host's hashing slots stayed full for the whole wait."""
+
+
+def normalized_hash_method(method):
+    """Spell out Werkzeug's defaults, e.g. 'scrypt' -> 'scrypt:32768:8:1', to compare against stored hashes."""
+    name, *params = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + params + defaults[len(params):])
+
+
+def password_needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != normalized_hash_method(app.config['PASSWORD_HASH_METHOD'])
+
+
+def get_password_pool():
+    """This process's (executor, slots) pair, or (None, None) when hashing runs inline."""
+    kind = app.config['PASSWORD_POOL']
+    if kind == 'inline':
+        return None, None
+    workers = max(1, app.config['PASSWORD_POOL_WORKERS'])
+    key = (os.getpid(), kind, workers, app.config['PASSWORD_POOL_MAX_PENDING'])
+    with password_pool_lock:
+        # Keyed by pid so each forked gunicorn worker builds its own pool
+        if password_pool_state['key'] != key:
+            executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+            password_pool_state.update(
+                key=key,
+                executor=executor_class(max_workers=workers),
+                slots=threading.BoundedSemaphore(max(workers, app.config['PASSWORD_POOL_MAX_PENDING'])),
+            )
+        return password_pool_state['executor'], password_pool_state['slots']
+
+
+@contextmanager
+def host_password_slot(deadline=None):
+    """Hold one of the host-wide hashing slots; raise PasswordHasherBusy if none frees up by `deadline`."""
+    slot_count = app.config['PASSWORD_HOST_SLOTS']
+    if slot_count <= 0:
+        yield
+        return
+    folder = app.config['PASSWORD_SLOT_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    first = secrets.randbelow(slot_count)
+    while True:
+        for index in range(slot_count):
+            slot_file = open(os.path.join(folder, f"slot-{(first + index) % slot_count}.lock"), 'a')
+            try:
+                fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                slot_file.close()
+                continue
+            try:
+                yield
+            finally:
+                fcntl.flock(slot_file, fcntl.LOCK_UN)
+                slot_file.close()
+            return
+        if deadline is not None and perf_counter() >= deadline:
+            raise PasswordHasherBusy("All password hashing slots on this host are busy")
+        sleep(PASSWORD_SLOT_POLL_SECONDS)
+
+
+def run_password_task(func, *args, wait=None):
+    """Run a hash or check on the pool. With `wait`, raise PasswordHasherBusy after that long without a slot."""
+    deadline = None if wait is None else perf_counter() + wait
+    executor, slots = get_password_pool()
+    if executor is None:
+        with host_password_slot(deadline):
+            return func(*args)
+    if not slots.acquire(timeout=wait):
+        raise PasswordHasherBusy("Password hashing pool is saturated")
+    try:
+        with host_password_slot(deadline):
+            return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    return run_password_task(generate_password_hash, password, app.config['PASSWORD_HASH_METHOD'],
+                             wait=app.config['PASSWORD_HASH_WAIT'])
+
+
+def verify_password(pwhash, password):
+    if not pwhash or not password:
+        return False
+    return run_password_task(check_password_hash, pwhash, password, wait=app.config['PASSWORD_POOL_WAIT'])
+
+
+def verify_account_password(account, password):
+    """Check an account's password and, on success, upgrade a hash made with old parameters (commits)."""
+    if not verify_password(account.password_hash, password):
+        return False
+    if password_needs_rehash(account.password_hash):
+        account.password_hash = hash_password(password)
+        db.session.commit()
+        logger.info(f"Upgraded password hash for account {account.id}")
+    return True
+
+
+def benchmark_password_hashing(methods, seconds=1.0):
+    """Hashes per second for each Werkzeug method string, measured single-threaded on this host."""
+    results = {}
+    for method in methods:
+        count, started = 0, perf_counter()
+        while True:
+            generate_password_hash('benchmark-password', method)
+            count += 1
+            elapsed = perf_counter() - started
+            if elapsed >= seconds:
+                break
+        results[method] = count / elapsed
+    return results
+
+
+@app.cli.command('password-benchmark')
+@click.option('--seconds', default=2.0, show_default=True, help='Time spent on each method.')
+@click.option('--method', 'methods', multiple=True, help='Werkzeug method string; repeat to compare several.')
+def password_benchmark_command(seconds, methods):
+    """Report password hashes/sec for the configured method and common alternatives."""
+    configured = normalized_hash_method(app.config['PASSWORD_HASH_METHOD'])
+    methods = methods or list(dict.fromkeys((configured,) + PASSWORD_BENCHMARK_METHODS))
+    for method, rate in benchmark_password_hashing(methods, seconds).items():
+        marker = '  (configured)' if normalized_hash_method(method) == configured else ''
+        print(f"{method:<24} {rate:9.1f} hashes/sec  {1000 / rate:8.1f} ms/hash{marker}")
+
+
 # ========== AUTHENTICATION FUNCTIONS ==========
+# The logged-in admin is loaded at most once per request and kept on flask.g, with
+# its role frozenset. Login also stores a claim (id, roles, role version) in the
+# signed session cookie; read-only requests trust it for role checks until an
+# account's roles change, which bumps the shared `admin_roles` cache version.
+# Other workers notice within PUBLISHED_CACHE_TTL seconds.
+ADMIN_ROLES_CACHE_KEY = 'admin_roles'
+READ_ONLY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -1191,7 +3004,12 @@ def login_required(f):
     return decorated_function
 
 def get_current_admin():
-    return Admin.query.get(session.get('admin_id'))
+    """The logged-in admin, loaded at most once per request."""
+    admin_id = session.get('admin_id')
+    cached = g.get('current_admin')
+    if cached is None or cached[0] != admin_id:
+        g.current_admin = (admin_id, Admin.query.get(admin_id) if admin_id else None)
+    return g.current_admin[1]
 
 def get_admin_roles(admin):
     if not admin:
@@ -1203,8 +3021,56 @@ def get_admin_roles(admin):
             deduped.append(role)
     return deduped
 
+def get_admin_role_set(admin):
+    """Frozenset of the admin's primary and secondary roles, computed once per request."""
+    if not admin:
+        return frozenset()
+    if not has_app_context():
+        return frozenset(get_admin_roles(admin))
+    role_sets = g.setdefault('admin_role_sets', {})
+    if admin.id not in role_sets:
+        role_sets[admin.id] = frozenset(get_admin_roles(admin))
+    return role_sets[admin.id]
+
 def admin_has_any_role(admin, *allowed_roles):
-    return bool(set(get_admin_roles(admin)).intersection(set(allowed_roles)))
+    return not get_admin_role_set(admin).isdisjoint(allowed_roles)
+
+def get_admin_role_version():
+    return get_versioned_cache_entry(ADMIN_ROLES_CACHE_KEY, dict)['version']
+
+def bump_admin_role_version(admin_id):
+    """Invalidate every outstanding session claim (caller commits)."""
+    bump_cache_version(ADMIN_ROLES_CACHE_KEY)
+    g.get('admin_role_sets', {}).pop(admin_id, None)
+
+def issue_admin_claim(admin):
+    session['admin_claim'] = {
+        'id': admin.id,
+        'role': admin.role,
+        'roles': sorted(get_admin_role_set(admin)),
+        'rv': get_admin_role_version(),
+    }
+
+def get_admin_claim():
+    """The session's role claim for a read-only request, or None if absent or stale."""
+    if request.method not in READ_ONLY_METHODS:
+        return None
+    claim = session.get('admin_claim')
+    if not claim or claim.get('id') != session.get('admin_id'):
+        return None
+    if claim.get('rv') != get_admin_role_version():
+        return None
+    return claim
+
+def current_admin_has_any_role(*allowed_roles):
+    """Role check for the logged-in admin; read-only requests use the session claim when fresh."""
+    claim = get_admin_claim()
+    if claim:
+        return not frozenset(claim['roles']).isdisjoint(allowed_roles)
+    admin = get_current_admin()
+    if admin and admin.is_active and request.method in READ_ONLY_METHODS:
+        issue_admin_claim(admin)
+    return admin_has_any_role(admin, *allowed_roles)
 
 def get_or_create_contract_for_role(admin, role):
     contract = UserContract.query.filter_by(
@@ -1227,8 +3093,13 @@ def ceo_required(f):
     def decorated_function(*args, **kwargs):
         if 'admin_id' not in session:
             return jsonify({"success": False, "message": "Authentication required"}), 401
-        admin = get_current_admin()
-        if not admin or admin.role != 'CEO':
+        claim = get_admin_claim()
+        if claim:
+            is_ceo = claim['role'] == 'CEO'
+        else:
+            admin = get_current_admin()
+            is_ceo = bool(admin and admin.role == 'CEO')
+        if not is_ceo:
             return jsonify({"success": False, "message": "CEO access required"}), 403
         return f(*args, **kwargs)
     return decorated_function
@@ -1509,112 +3380,866 @@ If any provision is found invalid or unenforceable, it shall be modified to the
 17. ENTIRE AGREEMENT
 This agreement, together with the Investor's confirmed profile details and any written amendments duly executed by both parties, constitutes the entire agreement between the parties and supersedes all prior discussions, representations, and agreements.
 
-18. BINDING AGREEMENT
-This agreement becomes binding upon the digital signatures of both the Investor and the Chief Executive Officer (Walihlah Hamza) of BrightWave Habitat Enterprise Ltd. Both parties will retain a signed copy accessible through the portal. Digital signatures are valid and legally binding in accordance with the Evidence Act 2011 of Nigeria.
+18. BINDING AGREEMENT
+This agreement becomes binding upon the digital signatures of both the Investor and the Chief Executive Officer (Walihlah Hamza) of BrightWave Habitat Enterprise Ltd. Both parties will retain a signed copy accessible through the portal. Digital signatures are valid and legally binding in accordance with the Evidence Act 2011 of Nigeria.
+
+By signing below, the Investor confirms they have read, understood, accepted all risk disclosures, and fully agree to all terms outlined in this agreement."""
+    }
+}
+
+CANONICAL_HOST = SITE_URL.replace("https://", "").replace("http://", "")
+REDIRECT_HOSTS = {
+    'brightwaveenterprises.online',
+    'www.brightwaveenterprises.online',
+    'brightwavehabitat.com',
+}
+CANONICAL_ROUTE_MAP = {
+    '/index.html': '/',
+    '/about.html': '/about',
+    '/faq.html': '/faq',
+    '/hostel-detail.html': '/hostels/detail',
+}
+
+
+@app.before_request
+def enforce_canonical_urls():
+    host = request.host.split(':', 1)[0].lower()
+    if request.path == '/health' or host in {'localhost', '127.0.0.1'}:
+        return None
+
+    if host in REDIRECT_HOSTS:
+        query = f"?{request.query_string.decode()}" if request.query_string else ""
+        return redirect(f"{SITE_URL}{request.path}{query}", code=301)
+
+    if request.path in CANONICAL_ROUTE_MAP:
+        query = f"?{request.query_string.decode()}" if request.query_string else ""
+        return redirect(f"{SITE_URL}{CANONICAL_ROUTE_MAP[request.path]}{query}", code=301)
+
+    if host != CANONICAL_HOST and host:
+        query = f"?{request.query_string.decode()}" if request.query_string else ""
+        return redirect(f"{SITE_URL}{request.path}{query}", code=301)
+
+    return None
+
+
+@app.before_request
+def enforce_admin_csrf():
+    if not request.path.startswith('/admin/'):
+        return None
+
+    if request.method not in {'POST', 'PUT', 'DELETE'}:
+        return None
+
+    if request.path == '/admin/login' or 'admin_id' not in session:
+        return None
+
+    if not validate_csrf_token():
+        return jsonify({"success": False, "message": "Invalid or missing CSRF token"}), 403
+
+    return None
+
+
+@app.after_request
+def apply_security_headers(response):
+    response.headers.setdefault('X-Frame-Options', 'SAMEORIGIN')
+    response.headers.setdefault('X-Content-Type-Options', 'nosniff')
+    response.headers.setdefault('Referrer-Policy', 'strict-origin-when-cross-origin')
+    response.headers.setdefault('Permissions-Policy', 'camera=(), microphone=(), geolocation=()')
+    response.headers.setdefault('X-XSS-Protection', '1; mode=block')
+
+    if request.path.startswith('/admin'):
+        response.headers.setdefault('Cache-Control', 'no-store')
+
+    return response
+
+
+@app.teardown_request
+def forget_current_admin(exc=None):
+    # g belongs to the app context, which can outlive a single request.
+    if has_app_context():
+        g.pop('current_admin', None)
+        g.pop('admin_role_sets', None)
+
+# ========== STATIC ASSET PIPELINE ==========
+# `flask build-static` (also run by init_app.py) copies assets/ into
+# STATIC_BUILD_FOLDER under content-hashed names, rewrites assets/ references in
+# the public pages, and writes .br/.gz siblings for text files. Fingerprinted
+# URLs are served with an immutable Cache-Control; pages keep their URLs and
+# revalidate by ETag. Without a build everything falls back to the plain files.
+STATIC_BUILD_PAGES = ('index.html', 'about.html', 'contact.html', 'faq.html', 'hostel-detail.html')
+STATIC_COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.html', '.json', '.txt', '.xml', '.webmanifest'}
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_REFERENCE_RE = re.compile(r"(?<![\w./-])(/?)assets/([\w./-]+\.[A-Za-z0-9]+)")
+static_manifest_lock = threading.Lock()
+static_manifest_state = {'key': None, 'manifest': {}}
+fingerprinted_template_cache = {}
+
+
+def rewrite_asset_references(text, mapping):
+    if not mapping:
+        return text
+
+    def _swap(match):
+        relative_path = 'assets/' + match.group(2)
+        return match.group(1) + mapping.get(relative_path, relative_path)
+    return ASSET_REFERENCE_RE.sub(_swap, text)
+
+
+def _is_uploaded_asset(relative_path):
+    # Upload folders change at runtime, so they are never fingerprinted.
+    folders = [app.config[key] for key in ('UPLOAD_FOLDER', 'EXPENSE_RECEIPT_FOLDER', 'HERO_BG_FOLDER', 'VIDEO_FOLDER', 'IMAGE_DERIVATIVE_FOLDER')]
+    return any(relative_path.startswith(folder.rstrip('/') + '/') for folder in folders)
+
+
+def _write_static_file(path, data, compress):
+    """Write data and, for text files, any smaller .br/.gz siblings. Returns the encodings written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    variants = [(None, '', data)]
+    if compress:
+        if brotli:
+            variants.append(('br', '.br', brotli.compress(data, quality=11)))
+        variants.append(('gzip', '.gz', gzip.compress(data, compresslevel=9, mtime=0)))
+    encodings = []
+    for encoding, suffix, payload in variants:
+        if encoding and len(payload) >= len(data):
+            continue
+        tmp_path = f"{path}{suffix}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as built_file:
+            built_file.write(payload)
+        os.replace(tmp_path, path + suffix)
+        if encoding:
+            encodings.append(encoding)
+    return encodings
+
+
+def build_static_assets(build_folder=None):
+    """Fingerprint assets/, rewrite page references and write compressed siblings. Returns the manifest."""
+    build_folder = build_folder or app.config['STATIC_BUILD_FOLDER']
+    sources = []
+    for dirpath, _, filenames in os.walk(os.path.join(app.root_path, 'assets')):
+        for name in filenames:
+            relative_path = os.path.relpath(os.path.join(dirpath, name), app.root_path).replace(os.sep, '/')
+            if not name.startswith('.') and not _is_uploaded_asset(relative_path):
+                sources.append(relative_path)
+    # Stylesheets can point at other assets, so they are hashed last, after their references are rewritten.
+    sources.sort(key=lambda relative_path: (relative_path.endswith('.css'), relative_path))
+
+    mapping, files = {}, {}
+    for relative_path in sources:
+        with open(os.path.join(app.root_path, relative_path), 'rb') as source_file:
+            data = source_file.read()
+        stem, extension = os.path.splitext(relative_path)
+        if extension.lower() == '.css':
+            data = rewrite_asset_references(data.decode('utf-8'), mapping).encode('utf-8')
+        hashed_path = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        files[hashed_path] = _write_static_file(
+            os.path.join(build_folder, hashed_path), data, extension.lower() in STATIC_COMPRESSIBLE_EXTENSIONS
+        )
+        mapping[relative_path] = hashed_path
+
+    pages = {}
+    build_hash = hashlib.sha256(json.dumps(mapping, sort_keys=True).encode('utf-8'))
+    for page in STATIC_BUILD_PAGES:
+        source_path = os.path.join(app.root_path, page)
+        if not os.path.exists(source_path):
+            continue
+        with open(source_path, 'r', encoding='utf-8') as source_file:
+            body = rewrite_asset_references(add_image_srcsets(source_file.read()), mapping).encode('utf-8')
+        build_hash.update(body)
+        pages[page] = _write_static_file(os.path.join(build_folder, 'pages', page), body, True)
+
+    manifest = {
+        'build_id': build_hash.hexdigest()[:12],
+        'built_at': datetime.utcnow().isoformat(),
+        'assets': mapping,
+        'files': files,
+        'pages': pages,
+    }
+    manifest_path = os.path.join(build_folder, 'manifest.json')
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+@app.cli.command('build-static')
+def build_static_command():
+    """Fingerprint and precompress static assets into STATIC_BUILD_FOLDER."""
+    manifest = build_static_assets()
+    compressed = sum(1 for encodings in manifest['files'].values() if encodings)
+    print(f"Built {len(manifest['files'])} assets ({compressed} precompressed) and "
+          f"{len(manifest['pages'])} pages into {app.config['STATIC_BUILD_FOLDER']} (build {manifest['build_id']})")
+
+
+def get_static_manifest():
+    """The current build manifest, or {} without a build. Reloaded when the file changes."""
+    manifest_path = os.path.join(app.config['STATIC_BUILD_FOLDER'], 'manifest.json')
+    try:
+        key = (manifest_path, os.stat(manifest_path).st_mtime_ns)
+    except OSError:
+        key = (manifest_path, None)
+    if key != static_manifest_state['key']:
+        manifest = {}
+        if key[1] is not None:
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+                    manifest = json.load(manifest_file)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read static manifest {manifest_path}: {str(e)}")
+        with static_manifest_lock:
+            static_manifest_state.update(key=key, manifest=manifest)
+    return static_manifest_state['manifest']
+
+
+def fingerprint_markup(markup):
+    return rewrite_asset_references(markup, get_static_manifest().get('assets'))
+
+
+def fingerprinted_template(source):
+    """An inline template with its assets/ references pointed at the current build."""
+    manifest = get_static_manifest()
+    if not manifest.get('assets'):
+        return source
+    cached = fingerprinted_template_cache.get(id(source))
+    if not cached or cached[0] != manifest['build_id']:
+        cached = (manifest['build_id'], rewrite_asset_references(source, manifest['assets']))
+        fingerprinted_template_cache[id(source)] = cached
+    return cached[1]
+
+
+def negotiate_static_encoding(available):
+    for encoding, _ in STATIC_ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def send_built_file(relative_path, encodings, cache_control):
+    """Send a file from the static build, precompressed when the client accepts it. Handles Range."""
+    encoding = negotiate_static_encoding(encodings)
+    suffix = dict(STATIC_ENCODINGS)[encoding] if encoding else ''
+    response = send_from_directory(
+        app.config['STATIC_BUILD_FOLDER'], relative_path + suffix,
+        mimetype=mimetypes.guess_type(relative_path)[0] or 'application/octet-stream',
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def serve_static_page(filename):
+    encodings = get_static_manifest().get('pages', {}).get(filename)
+    if encodings is None:
+        return send_from_directory('.', filename)
+    return send_built_file(f"pages/{filename}", encodings, 'public, no-cache')
+
+# ========== MEDIA DELIVERY ==========
+# Site videos and expense receipts go through send_media_file(). It uses a stat-based
+# ETag (inode, mtime, size) with Last-Modified, so If-None-Match, If-Modified-Since and
+# If-Range all work. Werkzeug's send_file handles single ranges and hands the body to
+# the server's sendfile. Multi-range requests, which Werkzeug answers with a 416, get
+# a multipart/byteranges response here. When X_ACCEL_REDIRECT_PREFIX is set, Flask
+# only does the auth check and nginx serves the bytes from an `internal` location.
+MAX_BYTE_RANGES = 16
+RECEIPT_URL_PREFIX = 'uploads/expense-receipts/'
+VIDEO_URL_PREFIX = 'videos/site/'
+
+
+def file_etag(stat_result):
+    return f"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+
+
+def requested_byte_ranges(size, etag, last_modified):
+    """The satisfiable (start, stop) spans of a multi-range request, merged and sorted, or None."""
+    byte_range = request.range
+    if not byte_range or byte_range.units != 'bytes' or len(byte_range.ranges) < 2:
+        return None
+    if len(byte_range.ranges) > MAX_BYTE_RANGES or not size:
+        return None
+    if_range = request.if_range
+    if 'If-Range' in request.headers and if_range.etag != etag and if_range.date != last_modified:
+        return None
+    spans = []
+    for start, stop in byte_range.ranges:
+        if start < 0:
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start < stop:
+            spans.append([start, stop])
+    merged = []
+    for start, stop in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+def send_byte_ranges(path, spans, size, mimetype, etag, last_modified):
+    if not spans:
+        response = make_response('', 416)
+        response.headers['Content-Range'] = f"bytes */{size}"
+        return response
+    if len(spans) == 1:
+        start, stop = spans[0]
+        parts = [(b'', start, stop)]
+        response_mimetype = mimetype
+    else:
+        boundary = secrets.token_hex(12)
+        parts = [(
+            f"--{boundary}\r\nContent-Type: {mimetype}\r\nContent-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n".encode(),
+            start, stop,
+        ) for start, stop in spans]
+        response_mimetype = f"multipart/byteranges; boundary={boundary}"
+    trailer = f"\r\n--{boundary}--\r\n".encode() if len(spans) > 1 else b''
+
+    def generate():
+        with open(path, 'rb') as source:
+            for index, (head, start, stop) in enumerate(parts):
+                yield (b'\r\n' if index else b'') + head
+                source.seek(start)
+                remaining = stop - start
+                while remaining:
+                    block = source.read(min(remaining, 256 * 1024))
+                    if not block:
+                        return
+                    remaining -= len(block)
+                    yield block
+        yield trailer
+
+    length = sum(len(head) + stop - start for head, start, stop in parts) + 2 * (len(parts) - 1) + len(trailer)
+    response = app.response_class(generate(), status=206, mimetype=response_mimetype, direct_passthrough=True)
+    response.headers['Content-Length'] = str(length)
+    if len(spans) == 1:
+        response.headers['Content-Range'] = f"bytes {spans[0][0]}-{spans[0][1] - 1}/{size}"
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.accept_ranges = 'bytes'
+    return response
+
+
+def send_media_file(directory, filename, asset_path, cache_control):
+    """Serve a file with validators, Range support and optional nginx offload. Callers check access first."""
+    path = safe_join(directory, filename)
+    if not path or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{asset_path}"
+        response.headers['Content-Type'] = mimetype
+    else:
+        stat_result = os.stat(path)
+        etag = file_etag(stat_result)
+        last_modified = datetime.fromtimestamp(int(stat_result.st_mtime), timezone.utc)
+        spans = None
+        if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            spans = requested_byte_ranges(stat_result.st_size, etag, last_modified)
+        if spans is not None:
+            response = send_byte_ranges(path, spans, stat_result.st_size, mimetype, etag, last_modified)
+        else:
+            response = send_file(path, mimetype=mimetype, etag=etag, last_modified=last_modified,
+                                 conditional=True, max_age=None)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def redirect_to_storage(storage, key):
+    """Send the client to the bucket copy of an upload; receipts get a short-lived presigned URL."""
+    private = key.startswith(RECEIPT_URL_PREFIX)
+    if private and not can_view_receipts():
+        return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
+    variant = None if private or key.startswith(IMAGE_DERIVATIVE_URL_PREFIX) else negotiated_image_variant(key)
+    response = redirect(storage.url(variant['path'] if variant else key, private=private))
+    if private:
+        response.headers['Cache-Control'] = 'private, no-store'
+    elif storage.public_url:
+        response.headers['Cache-Control'] = 'public, max-age=300'
+    else:
+        # A presigned URL dies after PRESIGNED_URL_SECONDS: keep it out of shared caches
+        # and let the browser reuse it only while it is still well within that window.
+        response.headers['Cache-Control'] = f'private, max-age={PRESIGNED_URL_SECONDS // 5}'
+    if is_raster_image(key):
+        response.vary.add('Accept')
+    return response
+
+
+def can_view_receipts():
+    if 'admin_id' not in session:
+        return False
+    admin = get_current_admin()
+    return bool(admin and admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT'))
+
+# ========== IMAGE DERIVATIVES ==========
+# Raster images under assets/images get width-bucketed WebP/AVIF copies in
+# IMAGE_DERIVATIVE_FOLDER (served at /assets/images/derivatives/). Names carry
+# the source's content hash, so they are cached as immutable. Uploads queue the
+# work on a background thread and also lose their EXIF block; `flask
+# build-image-derivatives` backfills everything already on disk. Without Pillow
+# nothing is generated and the originals are served as before.
+IMAGE_DERIVATIVES_CACHE_KEY = 'image_derivatives'
+IMAGE_DERIVATIVE_URL_PREFIX = 'images/derivatives/'
+IMAGE_DERIVATIVE_WIDTHS = (480, 960, 1600)
+IMAGE_DERIVATIVE_FORMATS = (
+    ('avif', 'AVIF', 'image/avif', {'quality': 50}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 78, 'method': 5}),
+)
+RASTER_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def is_raster_image(path):
+    return os.path.splitext(path)[1].lower() in RASTER_IMAGE_EXTENSIONS
+
+
+def strip_image_metadata(file_path):
+    """Rewrite an image without its EXIF block, applying its orientation first. Returns True if changed."""
+    with Image.open(file_path) as image:
+        if not image.getexif():
+            return False
+        image_format = image.format
+        upright = ImageOps.exif_transpose(image)
+        options = {'icc_profile': image.info['icc_profile']} if image.info.get('icc_profile') else {}
+        if image_format == 'JPEG':
+            options.update(quality=90, optimize=True)
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        upright.save(tmp_path, format=image_format, **options)
+    os.replace(tmp_path, file_path)
+    return True
+
+
+def generate_image_derivatives(file_path, source_path):
+    """Write WebP/AVIF derivatives of one image and record them. Returns the ImageDerivative rows."""
+    with open(file_path, 'rb') as source_file:
+        digest = hashlib.sha256(source_file.read()).hexdigest()[:12]
+    existing = ImageDerivative.query.filter_by(source_path=source_path).all()
+    storage = get_storage()
+    if existing and all(row.source_digest == digest and storage.exists(row.path) for row in existing):
+        return existing
+
+    stem = os.path.splitext(source_path[len('images/'):] if source_path.startswith('images/') else source_path)[0]
+    rows = []
+    with Image.open(file_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        widths = [width for width in IMAGE_DERIVATIVE_WIDTHS if width < image.width]
+        if image.width <= IMAGE_DERIVATIVE_WIDTHS[-1]:
+            widths.append(image.width)
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for extension, pil_format, _, options in IMAGE_DERIVATIVE_FORMATS:
+                if not image_features.check(extension):
+                    continue
+                key = f"{IMAGE_DERIVATIVE_URL_PREFIX}{stem}-{digest}-{width}w.{extension}"
+                output_path = storage.staging_path(key)
+                resized.save(output_path, format=pil_format, **options)
+                rows.append(ImageDerivative(
+                    source_path=source_path, source_digest=digest, format=extension, width=width, height=height,
+                    path=key, size_bytes=os.path.getsize(output_path),
+                ))
+                storage.put_path(key, output_path)
+    for row in existing:
+        db.session.delete(row)
+    db.session.flush()
+    db.session.add_all(rows)
+    bump_cache_version(IMAGE_DERIVATIVES_CACHE_KEY)
+    db.session.commit()
+    invalidate_published_cache(IMAGE_DERIVATIVES_CACHE_KEY)
+    return rows
+
+
+@background_job(unique=True)
+def process_uploaded_image(source_path, derivatives=True):
+    try:
+        with get_storage().local_copy(source_path, writeback=True) as file_path:
+            strip_image_metadata(file_path)
+            if derivatives:
+                generate_image_derivatives(file_path, source_path)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Image processing failed for {source_path}: {str(e)}")
+        raise
+
+
+def queue_image_processing(source_path, derivatives=True):
+    """Strip EXIF from an uploaded image and build its derivatives, off the request thread."""
+    if Image is None or not is_raster_image(source_path):
+        return
+    process_uploaded_image.delay(source_path, derivatives)
+
+
+def build_image_derivatives():
+    """Backfill WebP/AVIF derivatives for every raster image under assets/images. Returns the image count."""
+    if Image is None:
+        return 0
+    derivative_folder = os.path.abspath(app.config['IMAGE_DERIVATIVE_FOLDER'])
+    upload_folders = [os.path.abspath(app.config[key]) for key in ('UPLOAD_FOLDER', 'HERO_BG_FOLDER')]
+    processed = 0
+    for dirpath, dirnames, filenames in os.walk(os.path.join('assets', 'images')):
+        dirnames[:] = [name for name in dirnames if os.path.abspath(os.path.join(dirpath, name)) != derivative_folder]
+        for name in sorted(filenames):
+            file_path = os.path.join(dirpath, name)
+            if not is_raster_image(name):
+                continue
+            # Bundled images are left untouched; only uploads have their metadata stripped.
+            if os.path.abspath(dirpath) in upload_folders:
+                strip_image_metadata(file_path)
+            generate_image_derivatives(file_path, os.path.relpath(file_path, 'assets').replace(os.sep, '/'))
+            processed += 1
+    return processed
+
+
+@app.cli.command('build-image-derivatives')
+def build_image_derivatives_command():
+    """Backfill WebP/AVIF derivatives for every raster image under assets/images."""
+    if Image is None:
+        print("Pillow is not installed; nothing to do")
+        return
+    print(f"Image derivatives up to date for {build_image_derivatives()} images")
+
+
+def _load_image_derivatives():
+    variants = {}
+    for row in ImageDerivative.query.order_by(ImageDerivative.source_path, ImageDerivative.width).all():
+        variants.setdefault(row.source_path, {}).setdefault(row.format, []).append(
+            {'width': row.width, 'height': row.height, 'path': row.path}
+        )
+    return {'variants': variants}
+
 
-By signing below, the Investor confirms they have read, understood, accepted all risk disclosures, and fully agree to all terms outlined in this agreement."""
-    }
-}
+def get_image_variants(source_path):
+    """{'webp': [{'width', 'height', 'path'}, ...], 'avif': [...]} for an assets-relative image path."""
+    if not source_path:
+        return {}
+    variants = get_versioned_cache_entry(IMAGE_DERIVATIVES_CACHE_KEY, _load_image_derivatives)['variants']
+    return variants.get(source_path.lstrip('/').removeprefix('assets/'), {})
 
-CANONICAL_HOST = SITE_URL.replace("https://", "").replace("http://", "")
-REDIRECT_HOSTS = {
-    'brightwaveenterprises.online',
-    'www.brightwaveenterprises.online',
-    'brightwavehabitat.com',
-}
-CANONICAL_ROUTE_MAP = {
-    '/index.html': '/',
-    '/about.html': '/about',
-    '/faq.html': '/faq',
-    '/hostel-detail.html': '/hostels/detail',
-}
 
+def image_srcset(source_path, image_format='webp'):
+    """srcset value for an image's derivatives in one format, or '' when none exist."""
+    return ', '.join(
+        f"/assets/{variant['path']} {variant['width']}w"
+        for variant in get_image_variants(source_path).get(image_format, [])
+    )
 
-@app.before_request
-def enforce_canonical_urls():
-    host = request.host.split(':', 1)[0].lower()
-    if request.path == '/health' or host in {'localhost', '127.0.0.1'}:
-        return None
 
-    if host in REDIRECT_HOSTS:
-        query = f"?{request.query_string.decode()}" if request.query_string else ""
-        return redirect(f"{SITE_URL}{request.path}{query}", code=301)
+app.jinja_env.globals['image_srcset'] = image_srcset
+IMG_ASSET_TAG_RE = re.compile(r'<img\b[^>]*?\bsrc="/?assets/([^"?#]+)"[^>]*>')
 
-    if request.path in CANONICAL_ROUTE_MAP:
-        query = f"?{request.query_string.decode()}" if request.query_string else ""
-        return redirect(f"{SITE_URL}{CANONICAL_ROUTE_MAP[request.path]}{query}", code=301)
 
-    if host != CANONICAL_HOST and host:
-        query = f"?{request.query_string.decode()}" if request.query_string else ""
-        return redirect(f"{SITE_URL}{request.path}{query}", code=301)
+def add_image_srcsets(markup):
+    """Give bundled <img> tags a WebP srcset when derivatives exist."""
+    def _with_srcset(match):
+        tag = match.group(0)
+        srcset = image_srcset(match.group(1)) if 'srcset=' not in tag else ''
+        if not srcset:
+            return tag
+        return tag[:4] + f' srcset="{srcset}" sizes="100vw"' + tag[4:]
+    return IMG_ASSET_TAG_RE.sub(_with_srcset, markup)
 
+
+def negotiated_image_variant(source_path):
+    """The largest derivative the client's Accept header allows, for requests to an original image."""
+    if request.args.get('original') == '1' or not is_raster_image(source_path):
+        return None
+    variants = get_image_variants(source_path)
+    # Only formats the client names explicitly; a bare */* does not promise AVIF support.
+    accepted = {value for value, quality in request.accept_mimetypes if quality > 0}
+    for extension, _, mimetype, _ in IMAGE_DERIVATIVE_FORMATS:
+        if variants.get(extension) and mimetype in accepted:
+            return variants[extension][-1]
     return None
 
+# ========== PRE-RENDERED PUBLIC PAGES ==========
+# The home and about pages ship with the published CMS values already in the
+# markup, so first paint does not wait on /api/site-content. Output is keyed by
+# the content ETags and the template mtime, kept per worker and on disk so a
+# fresh worker can reuse another worker's render. The in-page fetch still runs
+# and covers ?preview=1 and anything not rendered here.
+TEAM_IMAGE_STYLES = {
+    'ceo-wally.jpg': 'object-position: center 14%;',
+    'property-manager-alameen.jpg': 'object-position: center 10%;',
+    'realtor-kamal.jpg': 'object-position: center 12%;',
+}
+DEFAULT_TEAM_IMAGE_STYLE = 'object-position: center 12%;'
+rendered_page_lock = threading.Lock()
+rendered_page_cache = {}
+
+
+def _escape(value):
+    return html.escape(value or '', quote=True)
+
+
+def _replace_element_inner(markup, attr_pattern, inner, count=1):
+    """Swap the inner HTML of the first `count` elements whose opening tag matches attr_pattern (0 = all)."""
+    pattern = re.compile(r'(<(\w+)\b[^>]*' + attr_pattern + r'[^>]*>)(.*?)(</\2>)', re.DOTALL)
+    return pattern.sub(lambda m: m.group(1) + inner + m.group(4), markup, count=count)
+
+
+def _replace_link_href(markup, cms_key, url):
+    pattern = re.compile(r'(<a\b[^>]*\bdata-cms="' + re.escape(cms_key) + r'"[^>]*\bhref=")[^"]*(")')
+    return pattern.sub(lambda m: m.group(1) + _escape(url) + m.group(2), markup)
+
+
+def _render_shared_footer(markup, content):
+    for cms_key, slug in (
+        ('footer_desc', 'site.footer_company_desc'),
+        ('contact_email', 'site.contact_email'),
+        ('contact_phone', 'site.contact_phone'),
+        ('contact_address', 'site.contact_address'),
+    ):
+        if content.get(slug):
+            markup = _replace_element_inner(markup, r'\bdata-cms="' + cms_key + '"', _escape(content[slug]), count=0)
+    for cms_key, slug in (
+        ('social_facebook', 'site.social_facebook'),
+        ('social_twitter', 'site.social_twitter'),
+        ('social_instagram', 'site.social_instagram'),
+    ):
+        if content.get(slug):
+            markup = _replace_link_href(markup, cms_key, content[slug])
+    return markup
+
+
+def render_homepage_markup(markup, content, team_members):
+    """Apply the same substitutions index.html makes after fetching /api/site-content."""
+    for element_id, slug in (
+        ('homeHeroTitle', 'home.hero_title'),
+        ('homeHeroSubtitle', 'home.hero_subtitle'),
+        ('homeAboutIntro', 'home.about_intro'),
+    ):
+        if content.get(slug):
+            markup = _replace_element_inner(markup, r'\bid="' + element_id + '"', _escape(content[slug]))
+
+    if content.get('home.announcement_enabled') == 'true' and content.get('home.announcement_text'):
+        markup = _replace_element_inner(markup, r'\bid="announcementText"', _escape(content['home.announcement_text']))
+        markup = re.sub(
+            r'(<div\b[^>]*\bid="announcementBanner"[^>]*\bclass=")hidden\s*',
+            lambda m: m.group(1),
+            markup,
+            count=1,
+        )
 
-@app.before_request
-def enforce_admin_csrf():
-    if not request.path.startswith('/admin/'):
-        return None
+    if content.get('home.services_heading'):
+        heading = _escape(content['home.services_heading']).replace('Services', '<span class="gradient-text">Services</span>')
+        markup = _replace_element_inner(markup, r'\bclass="services-heading\b', heading)
+    if content.get('home.services_lead'):
+        markup = _replace_element_inner(markup, r'\bclass="section-lead\b', _escape(content['home.services_lead']))
+
+    return _render_shared_footer(markup, content)
+
+
+def render_team_member_card(member):
+    image_path = member.get('image_path') or ''
+    style = TEAM_IMAGE_STYLES.get(image_path.split('/')[-1], DEFAULT_TEAM_IMAGE_STYLE)
+    return (
+        '<article class="surface-panel rounded-[1.6rem] p-6 text-center hover-lift">'
+        '<div class="mx-auto mb-5 h-44 w-44 overflow-hidden rounded-full border border-[var(--bw-border-strong)] '
+        'bg-[rgba(255,255,255,0.04)] shadow-[0_20px_50px_rgba(5,10,18,0.24)]">'
+        f'<img src="/assets/{_escape(image_path)}" alt="{_escape(member.get("name"))}" '
+        f'class="h-full w-full origin-top object-cover" style="{style}" '
+        'onerror="this.src=\'/assets/images/brightwave-logo.png\'; this.style=\'object-position: center 12%;\'" />'
+        '</div>'
+        f'<p class="section-kicker mb-2">{_escape(member.get("role"))}</p>'
+        f'<h3 class="brand-display text-2xl font-semibold mb-3">{_escape(member.get("name"))}</h3>'
+        f'<p class="text-slate-300 leading-7">{_escape(member.get("bio"))}</p>'
+        '</article>'
+    )
 
-    if request.method not in {'POST', 'PUT', 'DELETE'}:
-        return None
 
-    if request.path == '/admin/login' or 'admin_id' not in session:
-        return None
+def render_about_markup(markup, content, team_members):
+    """Apply the same substitutions about.html makes after fetching site content and team members."""
+    for element_id, slug in (
+        ('aboutHeroSubtitle', 'about.hero_subtitle'),
+        ('aboutIntroBody', 'about.intro_body'),
+        ('aboutTeamSubheading', 'about.team_subheading'),
+    ):
+        if content.get(slug):
+            markup = _replace_element_inner(markup, r'\bid="' + element_id + '"', _escape(content[slug]))
+    if content.get('about.team_heading'):
+        heading = _escape(content['about.team_heading']).replace('Active Team', '<span class="gradient-text">Active Team</span>')
+        markup = _replace_element_inner(markup, r'\bid="aboutTeamHeading"', heading)
+    if team_members:
+        markup = _replace_element_inner(
+            markup, r'\bid="teamGrid"', ''.join(render_team_member_card(member) for member in team_members)
+        )
+    return _render_shared_footer(markup, content)
 
-    if not validate_csrf_token():
-        return jsonify({"success": False, "message": "Invalid or missing CSRF token"}), 403
 
-    return None
+PRE_RENDERED_PAGES = {
+    'index.html': render_homepage_markup,
+    'about.html': render_about_markup,
+}
+RENDERED_PAGE_NAME = re.compile(r'^(?P<page>.+)-[0-9a-f]{32}\.html$')
 
 
-@app.after_request
-def apply_security_headers(response):
-    response.headers.setdefault('X-Frame-Options', 'SAMEORIGIN')
-    response.headers.setdefault('X-Content-Type-Options', 'nosniff')
-    response.headers.setdefault('Referrer-Policy', 'strict-origin-when-cross-origin')
-    response.headers.setdefault('Permissions-Policy', 'camera=(), microphone=(), geolocation=()')
-    response.headers.setdefault('X-XSS-Protection', '1; mode=block')
+def prune_rendered_pages(folder, page, keep_path):
+    """Remove the page's older renders; every content publish leaves one behind."""
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return
+    for entry in entries:
+        match = RENDERED_PAGE_NAME.match(entry.name)
+        if not match or match.group('page') != page or entry.path == keep_path:
+            continue
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # another worker pruned it first
+        except OSError as e:
+            logger.warning(f"Could not remove old rendered page {entry.name}: {str(e)}")
+
+
+def get_rendered_page(filename):
+    """Return (body bytes, etag, last_modified) for a pre-rendered page."""
+    source_path = os.path.join(app.root_path, filename)
+    source_mtime = os.stat(source_path).st_mtime_ns
+    site_content = get_published_site_content()
+    team_entry = get_published_team_members_entry()
+    build_id = get_static_manifest().get('build_id', '')
+    derivatives_version = get_versioned_cache_entry(IMAGE_DERIVATIVES_CACHE_KEY, _load_image_derivatives)['version']
+    render_key = hashlib.sha256(
+        f"{filename}:{source_mtime}:{site_content['etag']}:{team_entry['etag']}:{build_id}:{derivatives_version}".encode('utf-8')
+    ).hexdigest()[:32]
+
+    cached = rendered_page_cache.get(filename)
+    if cached and cached['etag'] == render_key:
+        return cached['body'], cached['etag'], cached['last_modified']
+
+    folder = app.config['RENDERED_PAGE_FOLDER']
+    page = os.path.splitext(filename)[0]
+    disk_path = os.path.join(folder, f"{page}-{render_key}.html")
+    if os.path.exists(disk_path):
+        with open(disk_path, 'rb') as rendered_file:
+            body = rendered_file.read()
+    else:
+        with open(source_path, 'r', encoding='utf-8') as source_file:
+            markup = source_file.read()
+        body = fingerprint_markup(add_image_srcsets(
+            PRE_RENDERED_PAGES[filename](markup, site_content['content'], team_entry['members'])
+        )).encode('utf-8')
+        try:
+            os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as rendered_file:
+                rendered_file.write(body)
+            os.replace(tmp_path, disk_path)
+        except OSError as e:
+            logger.error(f"Could not persist rendered page {filename}: {str(e)}")
+        else:
+            prune_rendered_pages(folder, page, disk_path)
+
+    last_modified = datetime.utcfromtimestamp(
+        os.path.getmtime(disk_path) if os.path.exists(disk_path) else time()
+    ).replace(microsecond=0)
+    with rendered_page_lock:
+        rendered_page_cache[filename] = {'etag': render_key, 'body': body, 'last_modified': last_modified, 'encoded': {}}
+    return body, render_key, last_modified
+
+
+def get_encoded_rendered_page(filename, etag, body, encoding):
+    """Compressed copy of a rendered page, made once per render."""
+    cached = rendered_page_cache.get(filename)
+    if cached and cached['etag'] == etag and encoding in cached['encoded']:
+        return cached['encoded'][encoding]
+    encoded = brotli.compress(body) if encoding == 'br' else gzip.compress(body, compresslevel=9, mtime=0)
+    if cached and cached['etag'] == etag:
+        cached['encoded'][encoding] = encoded
+    return encoded
+
+
+def serve_rendered_page(filename):
+    if not app.config.get('SERVER_RENDER_PAGES') or request.args.get('preview') == '1':
+        return serve_static_page(filename)
+    try:
+        ensure_runtime_state()
+        body, etag, last_modified = get_rendered_page(filename)
+        encoding = negotiate_static_encoding(('br', 'gzip') if brotli else ('gzip',))
+        if encoding:
+            body = get_encoded_rendered_page(filename, etag, body, encoding)
+    except Exception as e:
+        logger.error(f"Pre-render of {filename} failed, serving static file: {str(e)}")
+        return serve_static_page(filename)
 
-    if request.path.startswith('/admin'):
-        response.headers.setdefault('Cache-Control', 'no-store')
+    response = make_response(body)
+    response.mimetype = 'text/html'
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        etag = f"{etag}-{encoding}"
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
 
-    return response
 
 # ========== STATIC PAGE ROUTES ========== 
 @app.route('/')
 def serve_homepage():
-    return send_from_directory('.', 'index.html')
+    return serve_rendered_page('index.html')
 
 @app.route('/about')
 def serve_about():
-    return send_from_directory('.', 'about.html') if os.path.exists('about.html') \
-            else send_from_directory('.', 'index.html')
+    return serve_rendered_page('about.html') if os.path.exists('about.html') \
+            else serve_rendered_page('index.html')
     
 
 @app.route('/contact')
 def serve_contact():
-    return send_from_directory('.', 'contact.html') if os.path.exists('contact.html') \
-            else send_from_directory('.', 'index.html')
+    return serve_static_page('contact.html') if os.path.exists('contact.html') \
+            else serve_static_page('index.html')
     
 
 @app.route('/faq')
 def serve_faq():
-    return send_from_directory('.', 'faq.html')
+    return serve_static_page('faq.html')
 
 @app.route('/hostels')
 def serve_hostels():
-    return send_from_directory('.', 'hostels.html') if os.path.exists('hostels.html') \
-            else send_from_directory('.', 'index.html')
+    return serve_static_page('hostels.html') if os.path.exists('hostels.html') \
+            else serve_static_page('index.html')
 
 @app.route('/hostels/detail')
 @app.route('/hostels/phase1')
 def serve_hostel_detail():
-    return send_from_directory('.', 'hostel-detail.html')
+    return serve_static_page('hostel-detail.html')
 
 @app.route('/assets/<path:filename>')
 def serve_static_assets(filename):
-    return send_from_directory('assets', filename)
+    encodings = get_static_manifest().get('files', {}).get(f"assets/{filename}")
+    if encodings is not None:
+        return send_built_file(f"assets/{filename}", encodings, IMMUTABLE_CACHE_CONTROL)
+    storage = get_storage()
+    if storage.remote and is_storage_key(filename):
+        return redirect_to_storage(storage, filename)
+    if filename.startswith(RECEIPT_URL_PREFIX):
+        if not can_view_receipts():
+            return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
+        return send_media_file(app.config['EXPENSE_RECEIPT_FOLDER'], filename[len(RECEIPT_URL_PREFIX):],
+                               filename, 'private, no-cache')
+    if filename.startswith(VIDEO_URL_PREFIX):
+        return send_media_file(app.config['VIDEO_FOLDER'], filename[len(VIDEO_URL_PREFIX):],
+                               filename, 'public, max-age=86400')
+    if filename.startswith(IMAGE_DERIVATIVE_URL_PREFIX):
+        response = send_from_directory(app.config['IMAGE_DERIVATIVE_FOLDER'], filename[len(IMAGE_DERIVATIVE_URL_PREFIX):])
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+    variant = negotiated_image_variant(filename)
+    if variant:
+        response = send_from_directory(app.config['IMAGE_DERIVATIVE_FOLDER'], variant['path'][len(IMAGE_DERIVATIVE_URL_PREFIX):])
+        response.vary.add('Accept')
+        return response
+    response = send_from_directory('assets', filename)
+    if is_raster_image(filename):
+        response.vary.add('Accept')
+    return response
 
 @app.route('/health')
 def health():
@@ -1772,7 +4397,15 @@ def get_public_site_content():
                 item.slug: item.draft_value if item.draft_value is not None else item.value
                 for item in SiteContent.query.order_by(SiteContent.slug.asc()).all()
             })
-        return jsonify(get_site_content())
+        entry = get_published_site_content()
+        if entry['etag'] in request.if_none_match:
+            resp = make_response('', 304)
+        else:
+            resp = make_response(entry['body'])
+            resp.mimetype = 'application/json'
+        resp.set_etag(entry['etag'])
+        resp.headers['Cache-Control'] = 'public, no-cache'
+        return resp
     except Exception as e:
         logger.error(f"Error fetching site content: {str(e)}")
         return jsonify(DEFAULT_SITE_CONTENT)
@@ -1781,8 +4414,7 @@ def get_public_site_content():
 def get_public_team_members():
     try:
         ensure_runtime_state()
-        members = TeamMember.query.filter_by(is_active=True).order_by(TeamMember.sort_order.asc(), TeamMember.created_at.asc()).all()
-        return jsonify([serialize_team_member(member) for member in members])
+        return jsonify(get_published_team_members())
     except Exception as e:
         logger.error(f"Error fetching team members: {str(e)}")
         return jsonify(DEFAULT_TEAM_MEMBERS)
@@ -1840,6 +4472,7 @@ def get_properties():
                 'size': prop.size,
                 'amenities': prop.amenities or [],
                 'images': prop.images or [],
+                'image_variants': {path: get_image_variants(path) for path in prop.images or []},
                 'construction_status': prop.construction_status,
                 'completion_date': prop.completion_date.isoformat() if prop.completion_date else None,
                 'featured': prop.featured,
@@ -1871,6 +4504,7 @@ def get_property(property_id):
             'size': property.size,
             'amenities': property.amenities or [],
             'images': property.images or [],
+            'image_variants': {path: get_image_variants(path) for path in property.images or []},
             'construction_status': property.construction_status,
             'completion_date': property.completion_date.isoformat() if property.completion_date else None,
             'featured': property.featured,
@@ -1880,6 +4514,189 @@ def get_property(property_id):
         logger.error(f"Error fetching property {property_id}: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
+# ========== EMAIL OUTBOX ==========
+# Form handlers queue notification emails in email_outbox inside the same commit as the
+# message or inquiry, so a worker dying mid-send no longer loses them. Delivery is the
+# deliver_outbox_emails background job: it claims due rows, sends each batch over a
+# single SMTP connection and retries failures with exponential backoff, scheduling its
+# own next run for the earliest retry. The idempotency key keeps a retried handler
+# from queueing twice. Form keys come from the submission itself, never from row ids,
+# which SQLite hands out again after a delete.
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 6
+EMAIL_RETRY_BASE_SECONDS = 30
+EMAIL_RETRY_MAX_SECONDS = 3600
+EMAIL_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_email(idempotency_key, subject, recipients, body, reply_to=None):
+    """Add an email to the outbox in the caller's transaction. Returns False for an already-queued key."""
+    if EmailOutbox.query.filter_by(idempotency_key=idempotency_key).first():
+        return False
+    db.session.add(EmailOutbox(
+        idempotency_key=idempotency_key,
+        subject=subject[:300],
+        recipients=list(recipients),
+        body=body,
+        reply_to=reply_to,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    return True
+
+
+def submission_idempotency_key(kind, *fields):
+    """Outbox key prefix for a form post: the client's Idempotency-Key header if sent, else a
+    hash of the submitted fields and today's date, so a resubmission on a later day still mails."""
+    client_key = (request.headers.get('Idempotency-Key') or '').strip()
+    if client_key:
+        material = ['client', client_key[:200]]
+    else:
+        material = [datetime.utcnow().date().isoformat()] + [str(field or '').strip() for field in fields]
+    return f"{kind}:{hashlib.sha256(json.dumps(material).encode()).hexdigest()}"
+
+
+def email_retry_delay(attempts):
+    return min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+
+
+def due_email_filter(now):
+    """Pending rows whose retry time has come, plus claims abandoned by a dead sender."""
+    return or_(
+        and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < now - EMAIL_CLAIM_TIMEOUT),
+    )
+
+
+def claim_due_emails(limit=EMAIL_BATCH_SIZE):
+    """Mark up to `limit` due emails as sending. The conditional UPDATE lets concurrent senders race safely."""
+    now = datetime.utcnow()
+    candidate_ids = [row.id for row in EmailOutbox.query.with_entities(EmailOutbox.id)
+                     .filter(due_email_filter(now)).order_by(EmailOutbox.id).limit(limit)]
+    claimed_ids = []
+    for email_id in candidate_ids:
+        updated = EmailOutbox.query.filter(EmailOutbox.id == email_id, due_email_filter(now)).update(
+            {'status': 'sending', 'claimed_at': now}, synchronize_session=False)
+        if updated:
+            claimed_ids.append(email_id)
+    db.session.commit()
+    if not claimed_ids:
+        return []
+    return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed_ids)).order_by(EmailOutbox.id).all()
+
+
+def record_email_failure(email, error):
+    email.attempts = (email.attempts or 0) + 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= EMAIL_MAX_ATTEMPTS:
+        email.status = 'failed'
+        logger.error(f"Email {email.idempotency_key} failed permanently after {email.attempts} attempts: {email.last_error}")
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = datetime.utcnow() + timedelta(seconds=email_retry_delay(email.attempts))
+        logger.warning(f"Email {email.idempotency_key} attempt {email.attempts} failed, retrying: {email.last_error}")
+
+
+def deliver_email_batch(limit=EMAIL_BATCH_SIZE):
+    """Send one batch of due emails over a single SMTP connection. Returns (sent, failed)."""
+    batch = claim_due_emails(limit)
+    sent = failed = 0
+    if not batch:
+        return sent, failed
+    try:
+        with mail.connect() as connection:
+            for email in batch:
+                try:
+                    connection.send(Message(
+                        subject=email.subject,
+                        recipients=email.recipients,
+                        body=email.body,
+                        reply_to=email.reply_to,
+                    ))
+                except Exception as e:
+                    record_email_failure(email, e)
+                    failed += 1
+                else:
+                    email.status = 'sent'
+                    email.sent_at = datetime.utcnow()
+                    email.last_error = None
+                    sent += 1
+                # Commit per message so a crash mid-batch never resends what already went out
+                db.session.commit()
+    except Exception as e:
+        # Connecting (or closing) failed: everything not yet sent goes back for a retry
+        db.session.rollback()
+        for email in batch:
+            if email.status == 'sending':
+                record_email_failure(email, e)
+                failed += 1
+        db.session.commit()
+    return sent, failed
+
+
+def drain_email_outbox(limit=EMAIL_BATCH_SIZE):
+    """Deliver batches until no due email is left. Returns (sent, failed)."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = deliver_email_batch(limit)
+        total_sent += sent
+        total_failed += failed
+        if sent + failed < limit:
+            return total_sent, total_failed
+
+
+@background_job(unique=True)
+def deliver_outbox_emails():
+    """Drain the outbox, then schedule the next run for the earliest pending retry."""
+    drain_email_outbox()
+    next_due = db.session.query(func.min(EmailOutbox.next_attempt_at)).filter(
+        EmailOutbox.status == 'pending').scalar()
+    stale_claim = db.session.query(func.min(EmailOutbox.claimed_at)).filter(
+        EmailOutbox.status == 'sending').scalar()
+    if stale_claim:
+        stale_claim += EMAIL_CLAIM_TIMEOUT
+        next_due = min(next_due, stale_claim) if next_due else stale_claim
+    if next_due:
+        enqueue_job('deliver_outbox_emails', run_at=next_due)
+
+
+@app.route('/admin/api/email-outbox', methods=['GET'])
+@login_required
+def email_outbox_metrics():
+    """Outbox depth, delivery latency and failure counts, read from the shared table."""
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        now = datetime.utcnow()
+        since = now - timedelta(hours=24)
+        status_counts = dict(db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))
+                             .group_by(EmailOutbox.status).all())
+        oldest_pending = db.session.query(func.min(EmailOutbox.created_at)).filter(
+            EmailOutbox.status.in_(['pending', 'sending'])).scalar()
+        retrying = EmailOutbox.query.filter(EmailOutbox.status == 'pending', EmailOutbox.attempts > 0).count()
+        failed_attempts = db.session.query(func.coalesce(func.sum(EmailOutbox.attempts), 0)).filter(
+            EmailOutbox.created_at >= since).scalar()
+        recent_sent = EmailOutbox.query.with_entities(EmailOutbox.created_at, EmailOutbox.sent_at).filter(
+            EmailOutbox.status == 'sent', EmailOutbox.sent_at >= since).all()
+        latencies = sorted((row.sent_at - row.created_at).total_seconds() for row in recent_sent)
+        return jsonify({
+            "success": True,
+            "queue_depth": status_counts.get('pending', 0) + status_counts.get('sending', 0),
+            "by_status": status_counts,
+            "retrying": retrying,
+            "oldest_pending_seconds": round((now - oldest_pending).total_seconds(), 1) if oldest_pending else None,
+            "last_24h": {
+                "sent": len(latencies),
+                "failed_attempts": int(failed_attempts or 0),
+                "avg_latency_seconds": round(sum(latencies) / len(latencies), 2) if latencies else None,
+                "p95_latency_seconds": round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else None,
+                "max_latency_seconds": round(latencies[-1], 2) if latencies else None,
+            },
+        })
+    except Exception as e:
+        logger.error(f"Error reading email outbox metrics: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
 # ========== CONTACT FORM API ==========
 @app.route('/api/contact', methods=['POST'])
 @limiter.limit("3 per minute")  # Rate limit contact submissions
@@ -1914,9 +4731,9 @@ def handle_contact_form():
             form_origin=form_origin
         )
         db.session.add(contact_message)
-        db.session.commit()
+        db.session.flush()
 
-        # Send notification emails in background so SMTP timeout never kills the worker
+        # Notification emails go through the outbox, committed together with the message
         if NOTIFICATION_EMAILS:
             email_subject = f"New {form_origin} - {subject or 'General Inquiry'}"
             email_body = f"""
@@ -1948,18 +4765,13 @@ def handle_contact_form():
                     WhatsApp: +234 803 766 9462, +234 903 840 2914
                     Location: Malete, Kwara State, Nigeria
                     """
-            def _send_contact_emails(subject, body, reply, conf_body, user_email, user_name):
-                try:
-                    with app.app_context():
-                        mail.send(Message(subject=subject, recipients=NOTIFICATION_EMAILS, body=body, reply_to=reply))
-                        mail.send(Message(subject="Thank You for Contacting BrightWave Habitat Enterprise", recipients=[user_email], body=conf_body))
-                except Exception as e:
-                    logger.error(f"Contact email send failed: {str(e)}")
-            threading.Thread(
-                target=_send_contact_emails,
-                args=(email_subject, email_body, email, confirmation_body, email, full_name),
-                daemon=True
-            ).start()
+            key = submission_idempotency_key('contact', form_origin, full_name, email, phone, subject, message)
+            queue_email(f"{key}:notify", email_subject, NOTIFICATION_EMAILS, email_body, reply_to=email)
+            queue_email(f"{key}:confirm", "Thank You for Contacting BrightWave Habitat Enterprise",
+                        [email], confirmation_body)
+        db.session.commit()
+        if NOTIFICATION_EMAILS:
+            deliver_outbox_emails.delay()
 
         return jsonify({"success": True, "message": "Thank you! Your message has been received."})
     except Exception as e:
@@ -2012,7 +4824,7 @@ def handle_property_inquiry():
             year_of_study=year_of_study
         )
         db.session.add(inquiry)
-        db.session.commit()
+        db.session.flush()
 
         property_info = ""
         if property_id:
@@ -2038,22 +4850,18 @@ def handle_property_inquiry():
 
             Submitted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             """
-            def _send_inquiry_emails(subject, body, reply, user_email, user_name):
-                try:
-                    with app.app_context():
-                        mail.send(Message(subject=subject, recipients=NOTIFICATION_EMAILS, body=body, reply_to=reply))
-                        mail.send(Message(
-                            subject="Thank You for Your Property Inquiry",
-                            recipients=[user_email],
-                            body=f"Dear {user_name},\n\nThank you for your interest in our properties! We have received your inquiry and our team will contact you within 24-48 hours.\n\nBest regards,\nBrightWave Habitat Enterprise Team"
-                        ))
-                except Exception as e:
-                    logger.error(f"Inquiry email send failed: {str(e)}")
-            threading.Thread(
-                target=_send_inquiry_emails,
-                args=(email_subject, email_body, email, email, full_name),
-                daemon=True
-            ).start()
+            key = submission_idempotency_key('inquiry', property_id, full_name, email, phone, inquiry_type,
+                                             preferred_move_date, budget_range, message, university, year_of_study)
+            queue_email(f"{key}:notify", email_subject, NOTIFICATION_EMAILS, email_body, reply_to=email)
+            queue_email(
+                f"{key}:confirm",
+                "Thank You for Your Property Inquiry",
+                [email],
+                f"Dear {full_name},\n\nThank you for your interest in our properties! We have received your inquiry and our team will contact you within 24-48 hours.\n\nBest regards,\nBrightWave Habitat Enterprise Team"
+            )
+        db.session.commit()
+        if NOTIFICATION_EMAILS:
+            deliver_outbox_emails.delay()
 
         return jsonify({"success": True, "message": "Thank you! Your inquiry has been received."})
     except Exception as e:
@@ -2066,130 +4874,133 @@ def handle_property_inquiry():
 def admin_stats():
     """Get enhanced dashboard statistics, optionally filtered by property_id"""
     try:
-        admin = get_current_admin()
-        if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR'):
+        if not current_admin_has_any_role('CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR'):
             return jsonify({"success": False, "message": "Access restricted to management roles"}), 403
         from sqlalchemy import func as sqlfunc
-        ensure_cms_baseline()
 
         filter_prop_id = request.args.get('property_id', type=int)
         filter_prop = Property.query.get(filter_prop_id) if filter_prop_id else None
-        filter_prop_title = filter_prop.title if filter_prop else None
+
+        def _counts_by(column, query=None):
+            q = query if query is not None else db.session.query(column, sqlfunc.count())
+            return {key: count for key, count in q.group_by(column).all()}
 
         # --- Property-level counts (always portfolio-wide) ---
-        total_properties = Property.query.count()
-        active_properties = Property.query.filter_by(status='active').count()
-        hostels = Property.query.filter_by(property_type='hostel').count()
-        land_plots = Property.query.filter_by(property_type='land').count()
-        residential = Property.query.filter_by(property_type='residential').count()
+        property_rows = db.session.query(
+            Property.status, Property.property_type, sqlfunc.count(Property.id), sqlfunc.sum(Property.capital_budget)
+        ).group_by(Property.status, Property.property_type).all()
+        total_properties = sum(row[2] for row in property_rows)
+        active_properties = sum(row[2] for row in property_rows if row[0] == 'active')
+        type_counts = defaultdict(int)
+        for _, property_type, count, _ in property_rows:
+            type_counts[property_type] += count
+        hostels = type_counts['hostel']
+        land_plots = type_counts['land']
+        residential = type_counts['residential']
         active_team_members = TeamMember.query.filter_by(is_active=True).count()
 
-        total_inquiries = PropertyInquiry.query.count()
-        new_inquiries = PropertyInquiry.query.filter_by(status='new').count()
-        contact_messages = ContactMessage.query.count()
-        new_messages = ContactMessage.query.filter_by(status='new').count()
+        inquiry_counts = _counts_by(PropertyInquiry.status)
+        total_inquiries = sum(inquiry_counts.values())
+        new_inquiries = inquiry_counts.get('new', 0)
+        message_counts = _counts_by(ContactMessage.status)
+        contact_messages = sum(message_counts.values())
+        new_messages = message_counts.get('new', 0)
 
         # --- Tenant/unit stats (filterable by property) ---
         tenant_q = Tenant.query
-        if filter_prop_title:
-            tenant_q = tenant_q.filter(Tenant.property_name.ilike(f'%{filter_prop_title}%'))
-        active_tenants = tenant_q.filter_by(status='active').count()
-        total_tenants = tenant_q.count()
-        reserved_tenants = tenant_q.filter_by(status='reserved').count()
-        vacated_tenants = tenant_q.filter_by(status='vacated').count()
-
-        unit_q = PropertyUnit.query
+        tenant_count_q = db.session.query(Tenant.status, sqlfunc.count(Tenant.id))
+        if filter_prop_id:
+            tenant_q = tenant_q.filter(Tenant.property_id == filter_prop_id)
+            tenant_count_q = tenant_count_q.filter(Tenant.property_id == filter_prop_id)
+        tenant_counts = _counts_by(Tenant.status, tenant_count_q)
+        active_tenants = tenant_counts.get('active', 0)
+        total_tenants = sum(tenant_counts.values())
+        reserved_tenants = tenant_counts.get('reserved', 0)
+        vacated_tenants = tenant_counts.get('vacated', 0)
+
+        unit_count_q = db.session.query(PropertyUnit.status, sqlfunc.count(PropertyUnit.id))
         if filter_prop_id:
-            unit_q = unit_q.filter_by(property_id=filter_prop_id)
-        total_units = unit_q.count()
-        available_units = unit_q.filter_by(status='available').count()
-        occupied_units = unit_q.filter_by(status='occupied').count()
+            unit_count_q = unit_count_q.filter(PropertyUnit.property_id == filter_prop_id)
+        unit_counts = _counts_by(PropertyUnit.status, unit_count_q)
+        total_units = sum(unit_counts.values())
+        available_units = unit_counts.get('available', 0)
+        occupied_units = unit_counts.get('occupied', 0)
 
-        # --- Revenue stats (filterable via tenant property_name join) ---
+        # --- Revenue/capital by (year, month) from monthly_financial_rollup (filterable) ---
         now = datetime.utcnow()
-        month_start = date_type(now.year, now.month, 1)
-
-        def _rev_q(extra_filters=None):
-            q = db.session.query(sqlfunc.sum(PaymentRecord.amount))
-            if filter_prop_title:
-                q = q.join(Tenant, PaymentRecord.tenant_id == Tenant.id).filter(
-                    Tenant.property_name.ilike(f'%{filter_prop_title}%')
-                )
-            if extra_filters:
-                for f in extra_filters:
-                    q = q.filter(f)
-            return q.scalar() or 0
-
-        monthly_revenue = _rev_q([PaymentRecord.payment_date >= month_start])
-        total_revenue = _rev_q()
-
-        # --- Capital/expense stats (filterable by property_id) ---
-        def _exp_q(approval=None, extra_filters=None):
-            q = db.session.query(sqlfunc.sum(ProjectExpense.amount))
-            if filter_prop_id:
-                q = q.filter(ProjectExpense.property_id == filter_prop_id)
-            if approval:
-                q = q.filter(ProjectExpense.approval_status == approval)
-            if extra_filters:
-                for f in extra_filters:
-                    q = q.filter(f)
-            return q.scalar() or 0
+        current_month = (now.year, now.month)
+        R = MonthlyFinancialRollup
+        rollup_q = db.session.query(
+            R.year, R.month, sqlfunc.sum(R.revenue), sqlfunc.sum(R.approved_capital),
+            sqlfunc.sum(R.pending_capital), sqlfunc.sum(R.rejected_capital), sqlfunc.sum(R.expense_count),
+        )
+        if filter_prop_id:
+            rollup_q = rollup_q.filter(R.property_id == filter_prop_id)
+        revenue_by_month = {}
+        capital_by_month = {}
+        spent_by_status = defaultdict(float)
+        expense_years = set()
+        for yr, mo, revenue, approved, pending, rejected, expense_count in rollup_q.group_by(R.year, R.month).all():
+            revenue_by_month[(yr, mo)] = revenue or 0
+            capital_by_month[(yr, mo)] = approved or 0
+            spent_by_status['approved'] += approved or 0
+            spent_by_status['pending'] += pending or 0
+            spent_by_status['rejected'] += rejected or 0
+            if expense_count:
+                expense_years.add(yr)
+
+        total_revenue = sum(revenue_by_month.values())
+        monthly_revenue = sum(v for k, v in revenue_by_month.items() if k >= current_month)
 
         # total_capital_spent = approved only — only sanctioned spending counts
-        approved_capital_spent = _exp_q('approved')
+        approved_capital_spent = spent_by_status['approved']
         total_capital_spent = approved_capital_spent
-        monthly_capital_spent = _exp_q('approved', extra_filters=[ProjectExpense.expense_date >= month_start])
-        pending_capital_spent = _exp_q('pending')
-        rejected_capital_spent = _exp_q('rejected')
+        monthly_capital_spent = sum(v for k, v in capital_by_month.items() if k >= current_month)
+        pending_capital_spent = spent_by_status['pending']
+        rejected_capital_spent = spent_by_status['rejected']
 
         if filter_prop:
             total_capital_budget = filter_prop.capital_budget or 0
         else:
-            total_capital_budget = db.session.query(sqlfunc.sum(Property.capital_budget)).scalar() or 0
+            total_capital_budget = sum(row[3] or 0 for row in property_rows)
         capital_budget_remaining = total_capital_budget - approved_capital_spent
 
         # --- Monthly trend (last 24 months, filterable) ---
-        from calendar import monthrange as _mrange
-        monthly_trend = []
-        for _i in range(23, -1, -1):
-            _mo = now.replace(day=1) - timedelta(days=_i * 28)
-            _yr, _mo_n = _mo.year, _mo.month
-            _ms = date_type(_yr, _mo_n, 1)
-            _me = date_type(_yr, _mo_n, _mrange(_yr, _mo_n)[1])
-            _rev = _rev_q([PaymentRecord.payment_date >= _ms, PaymentRecord.payment_date <= _me])
-            _cap = _exp_q('approved', extra_filters=[ProjectExpense.expense_date >= _ms, ProjectExpense.expense_date <= _me])
-            monthly_trend.append({'month': _ms.strftime("%b '%y"), 'revenue': float(_rev), 'capital': float(_cap)})
+        trend_months = last_n_periods('month', 24, today=now.date())
+        monthly_trend = [{
+            'month': period['label'],
+            'revenue': float(revenue_by_month.get(period['key'], 0)),
+            'capital': float(capital_by_month.get(period['key'], 0)),
+        } for period in trend_months]
 
         # --- Yearly trend (all years from first record) ---
-        _earliest_pay = db.session.query(sqlfunc.min(PaymentRecord.payment_date)).scalar()
-        _earliest_exp = db.session.query(sqlfunc.min(ProjectExpense.expense_date)).scalar()
-        if filter_prop_id:
-            _earliest_exp = db.session.query(sqlfunc.min(ProjectExpense.expense_date)).filter(ProjectExpense.property_id == filter_prop_id).scalar()
-        _start_yr = now.year
-        if _earliest_pay: _start_yr = min(_start_yr, _earliest_pay.year)
-        if _earliest_exp: _start_yr = min(_start_yr, _earliest_exp.year)
-        yearly_trend = []
-        for _yr in range(_start_yr, now.year + 1):
-            _ys = date_type(_yr, 1, 1)
-            _ye = date_type(_yr, 12, 31)
-            _yrev = _rev_q([PaymentRecord.payment_date >= _ys, PaymentRecord.payment_date <= _ye])
-            _ycap = _exp_q('approved', extra_filters=[ProjectExpense.expense_date >= _ys, ProjectExpense.expense_date <= _ye])
-            yearly_trend.append({'year': str(_yr), 'revenue': float(_yrev), 'capital': float(_ycap)})
+        # The start year has always followed the earliest payment portfolio-wide.
+        fiscal_start = app.config['FISCAL_YEAR_START_MONTH']
+        _earliest_pay_year = db.session.query(sqlfunc.min(R.year)).filter(R.payment_count > 0).scalar()
+        _start_yr = min(({_earliest_pay_year} if _earliest_pay_year else set()) | expense_years | {now.year})
+        trend_years = iter_periods('year', date_type(_start_yr, 1, 1), now.date(), fiscal_start)
+        yearly_revenue = fold_into_periods(trend_years, 'year', revenue_by_month, fiscal_start)
+        yearly_capital = fold_into_periods(trend_years, 'year', capital_by_month, fiscal_start)
+        yearly_trend = [{
+            'year': period['label'],
+            'revenue': float(yearly_revenue[period['key']]),
+            'capital': float(yearly_capital[period['key']]),
+        } for period in trend_years]
 
         # --- Recent data (filterable) ---
         recent_inquiries = PropertyInquiry.query.order_by(PropertyInquiry.created_at.desc()).limit(5).all()
         recent_messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).limit(5).all()
         rec_pay_q = PaymentRecord.query
-        if filter_prop_title:
+        if filter_prop_id:
             rec_pay_q = rec_pay_q.join(Tenant, PaymentRecord.tenant_id == Tenant.id).filter(
-                Tenant.property_name.ilike(f'%{filter_prop_title}%')
+                Tenant.property_id == filter_prop_id
             )
         recent_payments = rec_pay_q.order_by(PaymentRecord.created_at.desc()).limit(5).all()
         recent_tenants = tenant_q.order_by(Tenant.created_at.desc()).limit(5).all()
         rec_exp_q = ProjectExpense.query
         if filter_prop_id:
             rec_exp_q = rec_exp_q.filter(ProjectExpense.property_id == filter_prop_id)
-        recent_expenses = rec_exp_q.order_by(ProjectExpense.expense_date.desc(), ProjectExpense.created_at.desc()).limit(5).all()
+        recent_expenses = rec_exp_q.options(joinedload(ProjectExpense.property)).order_by(ProjectExpense.expense_date.desc(), ProjectExpense.created_at.desc()).limit(5).all()
 
         return jsonify({
             'total_properties': total_properties,
@@ -2271,7 +5082,6 @@ def admin_stats():
 @login_required
 def admin_site_content():
     try:
-        ensure_cms_baseline()
         if request.method == 'GET':
             return jsonify({
                 item.slug: item.draft_value if item.draft_value is not None else item.value
@@ -2282,6 +5092,7 @@ def admin_site_content():
         if not admin or admin.role != 'CEO':
             return jsonify({"success": False, "message": "CEO access required"}), 403
         data = request.get_json() or {}
+        created_live = False
         for slug in DEFAULT_SITE_CONTENT.keys():
             if slug in data:
                 existing = SiteContent.query.filter_by(slug=slug).first()
@@ -2289,7 +5100,12 @@ def admin_site_content():
                     existing.draft_value = str(data.get(slug, '')).strip()
                 else:
                     db.session.add(SiteContent(slug=slug, value=str(data.get(slug, '')).strip(), draft_value=str(data.get(slug, '')).strip()))
+                    created_live = True
+        if created_live:
+            bump_cache_version(SITE_CONTENT_CACHE_KEY)
         db.session.commit()
+        if created_live:
+            invalidate_published_cache(SITE_CONTENT_CACHE_KEY)
         return jsonify({"success": True, "message": "Saved as draft — click Publish to go live"})
     except Exception as e:
         logger.error(f"Error updating site content: {str(e)}")
@@ -2308,11 +5124,8 @@ def upload_hero_bg():
         if file.filename == '':
             return jsonify({"success": False, "message": "No file selected"}), 400
         if file and allowed_file(file.filename):
-            ext = file.filename.rsplit('.', 1)[1].lower()
-            filename = secure_filename(f"hero_bg_{int(time())}.{ext}")
-            file_path = os.path.join(app.config['HERO_BG_FOLDER'], filename)
-            file.save(file_path)
-            path_value = f"images/site/{filename}"
+            path_value = store_upload(file, 'hero_bg').path
+            queue_image_processing(path_value)
             existing = SiteContent.query.filter_by(slug='home.hero_bg_path').first()
             if existing:
                 existing.draft_value = path_value
@@ -2340,10 +5153,7 @@ def upload_site_video():
         ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
         if ext not in ALLOWED_VIDEO_EXTENSIONS:
             return jsonify({"success": False, "message": "Invalid file type. Use MP4, WEBM, MOV, or OGG."}), 400
-        filename = secure_filename(f"site_video_{int(time())}.{ext}")
-        file_path = os.path.join(app.config['VIDEO_FOLDER'], filename)
-        file.save(file_path)
-        video_url = f"/assets/videos/site/{filename}"
+        video_url = f"/assets/{store_upload(file, 'site_video').path}"
         existing = SiteContent.query.filter_by(slug='home.video_url').first()
         if existing:
             existing.draft_value = video_url
@@ -2355,6 +5165,267 @@ def upload_site_video():
         logger.error(f"Error uploading site video: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
+# ========== CHUNKED UPLOADS ==========
+# Large CMS videos are sent as a series of raw PUT bodies instead of one multipart
+# request. Each chunk is streamed straight onto `<final path>.part` (no spooled
+# temp copy) and may carry an X-Chunk-SHA256 header; a bad chunk is cut back off.
+# The file's size on disk is the resume offset, so a client that lost its
+# connection asks for the session and carries on from there. Finalize renames the
+# part file to its content address and queues the faststart remux and poster frame.
+FASTSTART_VIDEO_EXTENSIONS = {'mp4', 'm4v', 'mov'}
+
+
+def serialize_upload_session(upload, offset=None):
+    if offset is None and upload.kind == 'direct_video':
+        offset = 0 if upload.status == 'uploading' else upload.total_size
+    elif offset is None:
+        part_path = upload.file_path + '.part'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else upload.total_size
+    return {
+        'upload_id': upload.id,
+        'status': upload.status,
+        'offset': offset,
+        'total_size': upload.total_size,
+        'chunk_size': app.config['UPLOAD_CHUNK_SIZE'],
+        'url': upload.public_url,
+        'error': upload.error or '',
+    }
+
+
+def video_poster_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}.poster.jpg"
+
+
+@background_job(max_attempts=2)
+def process_uploaded_video(upload_id):
+    """Move the MP4 index to the front (faststart) and grab a poster frame with ffmpeg, if present."""
+    upload = UploadSession.query.get(upload_id)
+    if not upload:
+        return
+    ffmpeg = shutil.which('ffmpeg')
+    try:
+        if ffmpeg:
+            storage = get_storage()
+            key = upload.public_url[len('/assets/'):]
+            with storage.local_copy(key, writeback=True) as file_path:
+                extension = key.rsplit('.', 1)[-1].lower()
+                if extension in FASTSTART_VIDEO_EXTENSIONS:
+                    remuxed_path = f"{file_path}.faststart.{extension}"
+                    subprocess.run([ffmpeg, '-v', 'error', '-y', '-i', file_path, '-map', '0', '-c', 'copy',
+                                    '-movflags', '+faststart', remuxed_path], check=True, timeout=900)
+                    os.replace(remuxed_path, file_path)
+                poster_key = video_poster_path(key)
+                poster_path = storage.staging_path(poster_key)
+                subprocess.run([ffmpeg, '-v', 'error', '-y', '-ss', '1', '-i', file_path, '-frames:v', '1',
+                                '-q:v', '3', poster_path], check=True, timeout=300)
+                storage.put_path(poster_key, poster_path)
+            video_draft = SiteContent.query.filter_by(slug='home.video_url').first()
+            if video_draft and video_draft.draft_value == upload.public_url:
+                poster_draft = SiteContent.query.filter_by(slug='home.video_poster_url').first()
+                if poster_draft:
+                    poster_draft.draft_value = f"/assets/{poster_key}"
+                else:
+                    db.session.add(SiteContent(slug='home.video_poster_url', value='',
+                                               draft_value=f"/assets/{poster_key}"))
+        else:
+            logger.info(f"ffmpeg not found; upload {upload_id} kept as uploaded")
+        upload.status = 'ready'
+    except (OSError, subprocess.SubprocessError) as e:
+        # Recorded for the dashboard, then raised so the job is retried; a later success marks it ready
+        logger.error(f"Video post-processing failed for upload {upload_id}: {str(e)}")
+        upload.status = 'failed'
+        upload.error = str(e)[:500]
+        db.session.commit()
+        raise
+    upload.error = None
+    db.session.commit()
+
+
+@app.route('/admin/api/uploads/video', methods=['POST'])
+@login_required
+def start_video_upload():
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        data = request.get_json() or {}
+        original_name = (data.get('filename') or '').strip()
+        ext = original_name.rsplit('.', 1)[1].lower() if '.' in original_name else ''
+        if ext not in ALLOWED_VIDEO_EXTENSIONS:
+            return jsonify({"success": False, "message": "Invalid file type. Use MP4, WEBM, MOV, or OGG."}), 400
+        try:
+            total_size = int(data.get('size') or 0)
+        except (TypeError, ValueError):
+            total_size = 0
+        if total_size <= 0:
+            return jsonify({"success": False, "message": "File size is required"}), 400
+        if total_size > app.config['MAX_CHUNKED_UPLOAD_SIZE']:
+            return jsonify({"success": False, "message": "File too large"}), 413
+        checksum = (data.get('sha256') or '').strip().lower() or None
+        if checksum and not re.fullmatch(r'[0-9a-f]{64}', checksum):
+            return jsonify({"success": False, "message": "sha256 must be a hex digest"}), 400
+
+        storage = get_storage()
+        if storage.remote and data.get('direct'):
+            # The browser PUTs straight to the bucket. With a sha256 the object is content-addressed
+            # and the bucket checks the body; without one it is keyed by the upload id.
+            upload_id = secrets.token_hex(16)
+            key = f"{UPLOAD_KIND_FOLDERS['site_video'][1]}/{checksum or upload_id}.{ext}"
+            upload = UploadSession(id=upload_id, kind='direct_video', original_name=original_name[:255],
+                                   file_path=key, public_url=f"/assets/{key}", total_size=total_size,
+                                   sha256=checksum, created_by=admin.id)
+            db.session.add(upload)
+            db.session.commit()
+            direct = None if checksum and storage.exists(key) else storage.presigned_upload(key, total_size, checksum)
+            return jsonify({"success": True, **serialize_upload_session(upload, 0), "direct": direct})
+
+        filename = secure_filename(f"site_video_{int(time())}_{secrets.token_hex(4)}.{ext}")
+        upload = UploadSession(
+            id=secrets.token_hex(16),
+            original_name=original_name[:255],
+            file_path=os.path.join(app.config['VIDEO_FOLDER'], filename),
+            public_url=f"/assets/videos/site/{filename}",
+            total_size=total_size,
+            sha256=checksum,
+            created_by=admin.id,
+        )
+        open(upload.file_path + '.part', 'wb').close()
+        db.session.add(upload)
+        db.session.commit()
+        return jsonify({"success": True, **serialize_upload_session(upload, 0)})
+    except Exception as e:
+        logger.error(f"Error starting video upload: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+
+@app.route('/admin/api/uploads/<upload_id>', methods=['GET', 'PUT'])
+@login_required
+def video_upload_chunk(upload_id):
+    """GET reports the resume offset; PUT appends the raw request body at ?offset=."""
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        upload = UploadSession.query.get_or_404(upload_id)
+        if request.method == 'GET':
+            return jsonify({"success": True, **serialize_upload_session(upload)})
+        if upload.kind == 'direct_video':
+            return jsonify({"success": False, "message": "This upload goes directly to storage"}), 409
+        if upload.status != 'uploading':
+            return jsonify({"success": False, "message": "Upload already finalized"}), 409
+
+        part_path = upload.file_path + '.part'
+        with open(part_path, 'ab') as part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return jsonify({"success": False, "message": "Another chunk is being written"}), 409
+            offset = part.seek(0, os.SEEK_END)
+            if request.args.get('offset', type=int) != offset:
+                return jsonify({"success": False, "message": "Offset mismatch", "offset": offset}), 409
+            digest = hashlib.sha256()
+            written = 0
+            while True:
+                block = request.stream.read(1024 * 1024)
+                if not block:
+                    break
+                written += len(block)
+                if offset + written > upload.total_size:
+                    part.truncate(offset)
+                    return jsonify({"success": False, "message": "Chunk runs past the declared size", "offset": offset}), 413
+                digest.update(block)
+                part.write(block)
+            expected = (request.headers.get('X-Chunk-SHA256') or '').strip().lower()
+            if not written or (expected and digest.hexdigest() != expected):
+                part.truncate(offset)
+                return jsonify({"success": False, "message": "Chunk checksum mismatch", "offset": offset}), 400
+        return jsonify({"success": True, **serialize_upload_session(upload, offset + written)})
+    except Exception as e:
+        logger.error(f"Error writing chunk for upload {upload_id}: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+
+@app.route('/admin/api/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_video_upload(upload_id):
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        upload = UploadSession.query.get_or_404(upload_id)
+        if upload.status != 'uploading':
+            return jsonify({"success": True, **serialize_upload_session(upload)})
+        if upload.kind == 'direct_video':
+            size = get_storage().size(upload.file_path)
+            if size != upload.total_size:
+                return jsonify({"success": False, "message": "Upload incomplete", "offset": size or 0}), 409
+            upload.status = 'processing'
+            record_upload('site_video', upload.sha256 or '', upload.file_path, upload.original_name, upload.total_size)
+        else:
+            part_path = upload.file_path + '.part'
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if offset != upload.total_size:
+                return jsonify({"success": False, "message": "Upload incomplete", "offset": offset}), 409
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as part:
+                for block in iter(lambda: part.read(1024 * 1024), b''):
+                    digest.update(block)
+            if upload.sha256 and digest.hexdigest() != upload.sha256:
+                os.remove(part_path)
+                upload.status = 'failed'
+                upload.error = 'File checksum mismatch'
+                db.session.commit()
+                return jsonify({"success": False, "message": "File checksum mismatch"}), 400
+
+            upload.status = 'processing'
+            extension = upload.file_path.rsplit('.', 1)[1]
+            stored = commit_upload_blob(part_path, digest.hexdigest(), extension, 'site_video',
+                                        upload.original_name, upload.total_size)
+            upload.public_url = f"/assets/{stored.path}"
+        # The previous video's poster no longer matches; process_uploaded_video drafts the new
+        # one once ffmpeg has written it.
+        drafts = {'home.video_url': upload.public_url, 'home.video_poster_url': ''}
+        for slug, value in drafts.items():
+            existing = SiteContent.query.filter_by(slug=slug).first()
+            if existing:
+                existing.draft_value = value
+            else:
+                db.session.add(SiteContent(slug=slug, value='', draft_value=value))
+        db.session.commit()
+        process_uploaded_video.delay(upload.id)
+        return jsonify({"success": True, **serialize_upload_session(upload, upload.total_size),
+                        "message": "Video saved as draft — click Publish to go live"})
+    except Exception as e:
+        logger.error(f"Error finalizing upload {upload_id}: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+
+@app.cli.command('purge-stale-uploads')
+def purge_stale_uploads_command():
+    """Delete chunked uploads that were never finalized, after two days."""
+    cutoff = time() - 2 * 24 * 3600
+    stale = []
+    for upload in UploadSession.query.filter_by(status='uploading').all():
+        if upload.kind == 'direct_video':
+            if upload.updated_at >= datetime.utcfromtimestamp(cutoff):
+                continue
+            # An abandoned direct PUT may still have landed; drop it unless another upload owns it.
+            if not StoredUpload.query.filter_by(path=upload.file_path).first():
+                get_storage().delete(upload.file_path)
+            stale.append(upload)
+            db.session.delete(upload)
+            continue
+        part_path = upload.file_path + '.part'
+        # Chunks don't touch the row, so the part file's mtime is the last activity.
+        if os.path.exists(part_path):
+            if os.path.getmtime(part_path) >= cutoff:
+                continue
+            os.remove(part_path)
+        stale.append(upload)
+        db.session.delete(upload)
+    db.session.commit()
+    print(f"Purged {len(stale)} stale uploads")
+
 @app.route('/admin/api/site-content/draft-status', methods=['GET'])
 @login_required
 def site_content_draft_status():
@@ -2377,7 +5448,10 @@ def publish_site_content():
         for item in items:
             item.value = item.draft_value
             item.draft_value = None
+        if count:
+            bump_cache_version(SITE_CONTENT_CACHE_KEY)
         db.session.commit()
+        invalidate_published_cache(SITE_CONTENT_CACHE_KEY)
         return jsonify({"success": True, "message": f"Published {count} change(s) to the live website", "published": count})
     except Exception as e:
         logger.error(f"Error publishing site content: {str(e)}")
@@ -2387,7 +5461,6 @@ def publish_site_content():
 @login_required
 def admin_team_members():
     try:
-        ensure_cms_baseline()
         if request.method == 'GET':
             members = TeamMember.query.order_by(TeamMember.sort_order.asc(), TeamMember.created_at.asc()).all()
             return jsonify([serialize_team_member(member) for member in members])
@@ -2408,7 +5481,9 @@ def admin_team_members():
             is_active=bool(data.get('is_active', True))
         )
         db.session.add(member)
+        bump_cache_version(TEAM_MEMBERS_CACHE_KEY)
         db.session.commit()
+        invalidate_published_cache(TEAM_MEMBERS_CACHE_KEY)
         return jsonify({"success": True, "message": "Team member added successfully", "member": serialize_team_member(member)})
     except Exception as e:
         logger.error(f"Error creating team member: {str(e)}")
@@ -2418,7 +5493,6 @@ def admin_team_members():
 @login_required
 def admin_team_member_detail(member_id):
     try:
-        ensure_cms_baseline()
         admin = get_current_admin()
         if not admin or admin.role != 'CEO':
             return jsonify({"success": False, "message": "CEO access required"}), 403
@@ -2426,7 +5500,9 @@ def admin_team_member_detail(member_id):
 
         if request.method == 'DELETE':
             db.session.delete(member)
+            bump_cache_version(TEAM_MEMBERS_CACHE_KEY)
             db.session.commit()
+            invalidate_published_cache(TEAM_MEMBERS_CACHE_KEY)
             return jsonify({"success": True, "message": "Team member removed successfully"})
 
         data = request.get_json() or {}
@@ -2440,12 +5516,331 @@ def admin_team_member_detail(member_id):
         member.sort_order = int(data.get('sort_order') or 0)
         member.is_active = bool(data.get('is_active', True))
         member.updated_at = datetime.utcnow()
+        bump_cache_version(TEAM_MEMBERS_CACHE_KEY)
         db.session.commit()
+        invalidate_published_cache(TEAM_MEMBERS_CACHE_KEY)
         return jsonify({"success": True, "message": "Team member updated successfully", "member": serialize_team_member(member)})
     except Exception as e:
         logger.error(f"Error updating team member {member_id}: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
+# ========== CONTENT-ADDRESSED UPLOADS ==========
+# Uploads are streamed through SHA-256 into a temp file next to their destination and
+# then renamed to `<sha256>.<ext>`. If that blob already exists, the temp copy is
+# dropped, so re-uploading the same photo or receipt costs no disk. The name is the
+# hash of the bytes as received; EXIF stripping and faststart rewrite the blob in
+# place afterwards. Each upload gets a StoredUpload row. `flask gc-uploads` deletes
+# blobs that nothing in the database points at any more.
+UPLOAD_KIND_FOLDERS = {
+    'property_image': ('UPLOAD_FOLDER', 'images/properties'),
+    'expense_receipt': ('EXPENSE_RECEIPT_FOLDER', 'uploads/expense-receipts'),
+    'hero_bg': ('HERO_BG_FOLDER', 'images/site'),
+    'site_video': ('VIDEO_FOLDER', 'videos/site'),
+}
+# Uploads happen before the form that references them is saved.
+UPLOAD_GC_GRACE = timedelta(days=1)
+
+
+def record_upload(kind, digest, path, original_name, size_bytes):
+    stored = StoredUpload(
+        kind=kind,
+        sha256=digest,
+        path=path,
+        original_name=(original_name or '')[:255] or None,
+        uploaded_by=session.get('admin_id'),
+        size_bytes=size_bytes,
+        mimetype=mimetypes.guess_type(path)[0],
+    )
+    db.session.add(stored)
+    db.session.commit()
+    return stored
+
+
+def commit_upload_blob(tmp_path, digest, extension, kind, original_name, size_bytes):
+    """Move a fully written temp file to its content address and record the upload. Returns the row."""
+    path = f"{UPLOAD_KIND_FOLDERS[kind][1]}/{digest}.{extension}"
+    storage = get_storage()
+    if storage.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.chmod(tmp_path, 0o644)
+        storage.put_path(path, tmp_path)
+    return record_upload(kind, digest, path, original_name, size_bytes)
+
+
+def store_upload(file, kind):
+    """Stream a request FileStorage into the content-addressed store. Returns the StoredUpload row."""
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    digest = hashlib.sha256()
+    size_bytes = 0
+    # Stage beside the destination so the local rename is atomic; remote backends upload from /tmp.
+    staging_dir = None if get_storage().remote else app.config[UPLOAD_KIND_FOLDERS[kind][0]]
+    with tempfile.NamedTemporaryFile(dir=staging_dir, suffix='.part', delete=False) as tmp:
+        try:
+            for block in iter(lambda: file.stream.read(1024 * 1024), b''):
+                digest.update(block)
+                size_bytes += len(block)
+                tmp.write(block)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+    return commit_upload_blob(tmp.name, digest.hexdigest(), extension, kind, file.filename, size_bytes)
+
+
+def referenced_upload_text():
+    """Every stored value that may point at an upload, joined so blob paths can be substring-matched."""
+    values = []
+    for (images,) in db.session.query(Property.images):
+        values.extend(str(image) for image in images or [])
+    for value, draft_value in db.session.query(SiteContent.value, SiteContent.draft_value):
+        values.extend([value or '', draft_value or ''])
+    values.extend(path for (path,) in db.session.query(ProjectExpense.receipt_path) if path)
+    values.extend(path for (path,) in db.session.query(TeamMember.image_path) if path)
+    return '\n'.join(values)
+
+
+def collect_unreferenced_uploads(dry_run=False):
+    """Delete content-addressed blobs (and their derivatives) nothing refers to. Returns the removed paths."""
+    references = referenced_upload_text()
+    cutoff = datetime.utcnow() - UPLOAD_GC_GRACE
+    rows_by_path = defaultdict(list)
+    for stored in StoredUpload.query.all():
+        rows_by_path[stored.path].append(stored)
+    removed = []
+    for path, rows in rows_by_path.items():
+        if path in references or max(row.created_at for row in rows) > cutoff:
+            continue
+        removed.append(path)
+        if dry_run:
+            continue
+        doomed = [path, video_poster_path(path)] if rows[0].kind == 'site_video' else [path]
+        for derivative in ImageDerivative.query.filter_by(source_path=path).all():
+            doomed.append(derivative.path)
+            db.session.delete(derivative)
+        storage = get_storage()
+        for key in doomed:
+            if storage.exists(key):
+                storage.delete(key)
+        for row in rows:
+            db.session.delete(row)
+    if removed and not dry_run:
+        db.session.commit()
+        invalidate_published_cache(IMAGE_DERIVATIVES_CACHE_KEY)
+    return removed
+
+
+@app.cli.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='List unreferenced blobs without deleting them.')
+def gc_uploads_command(dry_run):
+    """Remove uploaded blobs that no property, site content, expense or team member references."""
+    removed = collect_unreferenced_uploads(dry_run=dry_run)
+    for path in removed:
+        print(path)
+    print(f"{'Would remove' if dry_run else 'Removed'} {len(removed)} unreferenced uploads")
+
+# ========== STORAGE BACKENDS ==========
+# Uploaded blobs, video posters and image derivatives are addressed by their path
+# under assets/, the same strings the database stores, and go through get_storage().
+# LocalStorage keeps them in the configured upload folders. STORAGE_BACKEND=s3 puts
+# them in an S3-compatible bucket (AWS, MinIO) so workers and replicas need no
+# shared disk. /assets/ then redirects to the bucket, and site videos can be PUT
+# straight to it through a presigned URL. Bundled site assets always stay local.
+STORAGE_KEY_FOLDERS = tuple(
+    [(f"{url_prefix}/", config_key) for config_key, url_prefix in UPLOAD_KIND_FOLDERS.values()]
+    + [(IMAGE_DERIVATIVE_URL_PREFIX, 'IMAGE_DERIVATIVE_FOLDER')]
+)
+storage_backends = {}
+
+
+def is_storage_key(key):
+    return any(key.startswith(prefix) for prefix, _ in STORAGE_KEY_FOLDERS)
+
+
+class LocalStorage:
+    """Blobs on this machine's disk, in the folders named by the *_FOLDER settings."""
+    remote = False
+
+    def path(self, key):
+        for prefix, config_key in STORAGE_KEY_FOLDERS:
+            if key.startswith(prefix):
+                return os.path.join(app.config[config_key], key[len(prefix):])
+        return os.path.join('assets', key)
+
+    def staging_path(self, key):
+        """Where to write a file that will be stored under `key` with put_path()."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key)) if self.exists(key) else None
+
+    def put_path(self, key, local_path):
+        """Move a finished local file to `key`."""
+        target = self.staging_path(key)
+        if os.path.abspath(local_path) != os.path.abspath(target):
+            os.replace(local_path, target)
+
+    def put_stream(self, key, stream):
+        target = self.staging_path(key)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as output:
+            shutil.copyfileobj(stream, output, 1024 * 1024)
+        os.replace(tmp_path, target)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        if self.exists(key):
+            os.remove(self.path(key))
+
+    @contextmanager
+    def local_copy(self, key, writeback=False):
+        """A filesystem path for `key`; edits made with writeback=True are kept."""
+        yield self.path(key)
+
+    def url(self, key, private=False):
+        return f"/assets/{key}"
+
+
+PRESIGNED_URL_SECONDS = 300
+
+
+class S3Storage:
+    """Blobs in an S3-compatible bucket, optionally under a key prefix."""
+    remote = True
+
+    def __init__(self, bucket, prefix='', public_url='', **client_options):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip('/')
+        self.client = boto3.client('s3', config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path'}),
+                                   **client_options)
+
+    def object_key(self, key):
+        return f"{self.prefix}{key}"
+
+    def staging_path(self, key):
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        return path
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))['ContentLength']
+        except BotoClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, key):
+        return self.size(key) is not None
+
+    def put_path(self, key, local_path):
+        """Upload a finished local file to `key` and remove the local copy."""
+        self.client.upload_file(local_path, self.bucket, self.object_key(key), ExtraArgs={
+            'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream'})
+        os.remove(local_path)
+
+    def put_stream(self, key, stream):
+        self.client.upload_fileobj(stream, self.bucket, self.object_key(key), ExtraArgs={
+            'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream'})
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    @contextmanager
+    def local_copy(self, key, writeback=False):
+        """Download `key` to a temp file; with writeback=True upload it again if it was changed."""
+        path = self.staging_path(key)
+        try:
+            self.client.download_file(self.bucket, self.object_key(key), path)
+            before = os.stat(path)
+            yield path
+            after = os.stat(path)
+            if writeback and (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+                self.put_path(key, path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def url(self, key, private=False):
+        if self.public_url and not private:
+            return f"{self.public_url}/{self.object_key(key)}"
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.object_key(key)}, ExpiresIn=PRESIGNED_URL_SECONDS)
+
+    def presigned_upload(self, key, size, sha256=None):
+        """A URL and headers the browser can PUT `size` bytes to. With sha256 the bucket verifies the body."""
+        params = {'Bucket': self.bucket, 'Key': self.object_key(key), 'ContentLength': size,
+                  'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream'}
+        headers = {'Content-Type': params['ContentType']}
+        if sha256:
+            params['ChecksumSHA256'] = headers['x-amz-checksum-sha256'] = \
+                base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        url = self.client.generate_presigned_url('put_object', Params=params, ExpiresIn=3600)
+        return {'url': url, 'method': 'PUT', 'headers': headers}
+
+
+def get_storage():
+    """The configured storage backend, built once per distinct configuration."""
+    settings = tuple(app.config[key] for key in (
+        'STORAGE_BACKEND', 'S3_BUCKET', 'S3_ENDPOINT_URL', 'S3_REGION', 'S3_KEY_PREFIX', 'STORAGE_PUBLIC_URL'))
+    storage = storage_backends.get(settings)
+    if storage is None:
+        if app.config['STORAGE_BACKEND'] == 's3':
+            storage = S3Storage(
+                app.config['S3_BUCKET'], prefix=app.config['S3_KEY_PREFIX'],
+                public_url=app.config['STORAGE_PUBLIC_URL'], endpoint_url=app.config['S3_ENDPOINT_URL'] or None,
+                region_name=app.config['S3_REGION'] or None,
+                aws_access_key_id=app.config['S3_ACCESS_KEY_ID'] or None,
+                aws_secret_access_key=app.config['S3_SECRET_ACCESS_KEY'] or None,
+            )
+        else:
+            storage = LocalStorage()
+        storage_backends[settings] = storage
+    return storage
+
+
+def migrate_local_uploads(delete_local=False):
+    """Copy every file in the local upload and derivative folders into the configured backend."""
+    storage = get_storage()
+    copied = 0
+    for prefix, config_key in STORAGE_KEY_FOLDERS:
+        folder = app.config[config_key]
+        for dirpath, _, filenames in os.walk(folder):
+            for name in sorted(filenames):
+                if name.endswith(('.part', '.tmp')):
+                    continue
+                local_path = os.path.join(dirpath, name)
+                key = prefix + os.path.relpath(local_path, folder).replace(os.sep, '/')
+                if not storage.exists(key):
+                    with open(local_path, 'rb') as source:
+                        storage.put_stream(key, source)
+                    copied += 1
+                if delete_local:
+                    os.remove(local_path)
+    return copied
+
+
+@app.cli.command('migrate-storage')
+@click.option('--delete-local', is_flag=True, help='Remove local files once they are in the bucket.')
+def migrate_storage_command(delete_local):
+    """Copy existing uploads and image derivatives from local folders into the configured storage backend."""
+    if not get_storage().remote:
+        print("STORAGE_BACKEND is local; nothing to migrate")
+        return
+    print(f"Copied {migrate_local_uploads(delete_local=delete_local)} files to storage")
+
 # ========== FILE UPLOAD API ==========
 @app.route('/admin/api/upload', methods=['POST'])
 @login_required
@@ -2458,10 +5853,9 @@ def upload_image():
         if file.filename == '':
             return jsonify({"success": False, "message": "No file selected"}), 400
         if file and allowed_file(file.filename):
-            filename = secure_filename(f"{int(time())}_{file.filename}")
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            return jsonify({"success": True, "filename": f"images/properties/{filename}"})
+            stored = store_upload(file, 'property_image')
+            queue_image_processing(stored.path)
+            return jsonify({"success": True, "filename": stored.path})
         return jsonify({"success": False, "message": "Invalid file type"}), 400
     except Exception as e:
         logger.error(f"Error uploading image: {str(e)}")
@@ -2481,13 +5875,70 @@ def upload_expense_receipt():
         if file.filename == '':
             return jsonify({"success": False, "message": "No file selected"}), 400
         if file and allowed_receipt_file(file.filename):
-            filename = secure_filename(f"{int(time())}_{file.filename}")
-            file_path = os.path.join(app.config['EXPENSE_RECEIPT_FOLDER'], filename)
-            file.save(file_path)
-            return jsonify({"success": True, "filename": f"uploads/expense-receipts/{filename}"})
+            stored = store_upload(file, 'expense_receipt')
+            queue_image_processing(stored.path, derivatives=False)
+            return jsonify({"success": True, "filename": stored.path})
         return jsonify({"success": False, "message": "Invalid receipt file type"}), 400
     except Exception as e:
-        logger.error(f"Error uploading expense receipt: {str(e)}")
+        logger.error(f"Error uploading expense receipt: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+@app.route('/admin/api/rate-limit-metrics', methods=['GET'])
+@login_required
+def rate_limit_metrics():
+    """Rate-limiter hit/miss/throttle totals for every worker sharing the limiter store."""
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        storage = limiter.storage
+        shared = isinstance(storage, SharedRateLimitStorage)
+        return jsonify({
+            "success": True,
+            "storage": urllib.parse.urlparse(app.config['RATELIMIT_STORAGE_URI']).scheme,
+            "strategy": app.config['RATELIMIT_STRATEGY'],
+            "metrics": storage.metrics() if shared else None,
+        })
+    except Exception as e:
+        logger.error(f"Error reading rate-limit metrics: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+@app.route('/admin/api/jobs', methods=['GET'])
+@login_required
+def background_jobs_overview():
+    """Pending, running and failed background jobs for the CEO dashboard."""
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        return jsonify({"success": True, **background_job_summary()})
+    except Exception as e:
+        logger.error(f"Error reading background jobs: {str(e)}")
+        return jsonify({"success": False, "message": "Internal server error"}), 500
+
+
+@app.route('/admin/api/jobs/retry', methods=['POST'])
+@login_required
+def retry_background_jobs():
+    """Put failed jobs (one by `id`, or all of them) back in the queue."""
+    try:
+        admin = get_current_admin()
+        if not admin or admin.role != 'CEO':
+            return jsonify({"success": False, "message": "CEO access required"}), 403
+        data = request.get_json(silent=True) or {}
+        query = BackgroundJob.query.filter_by(status='failed')
+        if data.get('id'):
+            query = query.filter_by(id=int(data['id']))
+        retried = query.update({
+            'status': 'pending', 'attempts': 0, 'run_at': datetime.utcnow(), 'last_error': None,
+        }, synchronize_session=False)
+        db.session.commit()
+        if retried:
+            wake_job_workers()
+        return jsonify({"success": True, "retried": retried})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error retrying background jobs: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
 # ========== ADMIN AUTHENTICATION ==========
@@ -2533,10 +5984,15 @@ def reset_password(token):
         elif new_pw != confirm_pw:
             error = 'Passwords do not match.'
         if error:
-            return render_template_string(RESET_PASSWORD_TEMPLATE, error=error, token=token)
+            return render_template_string(fingerprinted_template(RESET_PASSWORD_TEMPLATE), error=error, token=token)
         user = Admin.query.get(prt.user_id)
         if user:
-            user.password_hash = generate_password_hash(new_pw)
+            try:
+                user.password_hash = hash_password(new_pw)
+            except PasswordHasherBusy:
+                return render_template_string(fingerprinted_template(RESET_PASSWORD_TEMPLATE),
+                                              error='Server is busy. Please try again shortly.',
+                                              token=token), 503, {'Retry-After': '5'}
             prt.used = True
             db.session.commit()
             return render_template_string("""<!DOCTYPE html><html><head><meta charset="UTF-8"><title>Password Reset</title>
@@ -2548,7 +6004,7 @@ def reset_password(token):
             <p class="text-gray-400 mb-6">You can now log in with your new password.</p>
             <a href="/admin/login" class="bg-emerald-700 hover:bg-emerald-600 text-white px-6 py-2 rounded-lg">Go to Login</a>
             </div></body></html>""")
-    return render_template_string(RESET_PASSWORD_TEMPLATE, error=None, token=token)
+    return render_template_string(fingerprinted_template(RESET_PASSWORD_TEMPLATE), error=None, token=token)
 
 @app.route('/admin/api/reset-requests', methods=['GET'])
 @login_required
@@ -2596,24 +6052,29 @@ def admin_login():
             
             admin = Admin.query.filter_by(username=username, is_active=True).first()
             
-            if admin and check_password_hash(admin.password_hash, password):
+            if admin and verify_account_password(admin, password):
                 session['admin_id'] = admin.id
                 session['admin_role'] = admin.role
                 session['csrf_token'] = secrets.token_urlsafe(32)
+                issue_admin_claim(admin)
                 return jsonify({"success": True, "message": "Login successful", "redirect": "/admin/dashboard"})
             else:
                 return jsonify({"success": False, "message": "Invalid credentials"}), 401
+        except PasswordHasherBusy:
+            logger.warning("Login rejected: password hashing pool is saturated")
+            return jsonify({"success": False, "message": "Too many sign-in attempts right now. Please try again shortly."}), 503, {'Retry-After': '5'}
         except Exception as e:
             logger.error(f"Error during login: {str(e)}")
             return jsonify({"success": False, "message": "Internal server error"}), 500
     
-    return render_template_string(LOGIN_TEMPLATE)
+    return render_template_string(fingerprinted_template(LOGIN_TEMPLATE))
 
 @app.route('/admin/logout')
 @login_required
 def admin_logout():
     """Handle admin logout"""
     session.pop('admin_id', None)
+    session.pop('admin_claim', None)
     session.pop('csrf_token', None)
     return redirect(url_for('admin_login'))
 
@@ -2624,7 +6085,7 @@ SIGNUP_ALLOWED_ROLES = {'INVESTOR', 'MANAGER', 'ACCOUNTANT', 'REALTOR', 'PA'}
 
 @app.route('/signup', methods=['GET'])
 def public_signup_page():
-    return render_template_string(SIGNUP_TEMPLATE)
+    return render_template_string(fingerprinted_template(SIGNUP_TEMPLATE))
 
 
 @app.route('/api/signup', methods=['POST'])
@@ -2693,7 +6154,7 @@ def api_public_signup():
             email=email,
             phone=phone,
             role=role,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             role_data=role_data,
             ip_address=(request.headers.get('X-Forwarded-For') or request.remote_addr or '')[:64] or None,
         )
@@ -2706,6 +6167,9 @@ def api_public_signup():
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "A request with this email is already pending."}), 409
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Server is busy. Please try again shortly."}), 503, {'Retry-After': '5'}
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error submitting signup: {str(e)}")
@@ -2728,11 +6192,13 @@ def update_admin_password():
         admin = Admin.query.get(session['admin_id'])
         if not admin:
             return jsonify({"success": False, "message": "Admin not found"}), 404
-        if not check_password_hash(admin.password_hash, current_password):
+        if not verify_password(admin.password_hash, current_password):
             return jsonify({"success": False, "message": "Current password is incorrect"}), 403
-        admin.password_hash = generate_password_hash(new_password)
+        admin.password_hash = hash_password(new_password)
         db.session.commit()
         return jsonify({"success": True, "message": "Password updated successfully"})
+    except PasswordHasherBusy:
+        return jsonify({"success": False, "message": "Server is busy. Please try again shortly."}), 503, {'Retry-After': '5'}
     except Exception as e:
         logger.error(f"Error updating password: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
@@ -2758,12 +6224,13 @@ def admin_dashboard():
         pending_sigs_count = UserContract.query.filter_by(status='pending_ceo_signature').count()
         from flask import make_response
         resp = make_response(render_template_string(
-            ENHANCED_ADMIN_DASHBOARD_TEMPLATE,
+            fingerprinted_template(ENHANCED_ADMIN_DASHBOARD_TEMPLATE),
             csrf_token=get_csrf_token(),
             user_role='CEO',
             user_name=user_name,
             pending_sigs_count=pending_sigs_count,
             has_seen_tour=bool(admin.has_seen_tour),
+            direct_video_uploads=get_storage().remote,
         ))
         for k, v in no_cache_headers.items():
             resp.headers[k] = v
@@ -2797,7 +6264,7 @@ def admin_dashboard():
 
     from flask import make_response
     resp = make_response(render_template_string(
-        ROLE_DASHBOARD_TEMPLATE,
+        fingerprinted_template(ROLE_DASHBOARD_TEMPLATE),
         csrf_token=get_csrf_token(),
         user_role=admin.role,
         all_roles=all_roles,
@@ -2936,9 +6403,14 @@ def admin_property_detail(property_id):
             property.updated_at = datetime.utcnow()
             
             db.session.commit()
+            sync_property_units_from_tenants.delay(property.id)
             return jsonify({"success": True, "message": "Property updated successfully"})
         
         elif request.method == 'DELETE':
+            release_property_rollup(property.id)
+            Tenant.query.filter_by(property_id=property.id).update(
+                {Tenant.property_id: None, Tenant.unit_id: None}, synchronize_session=False
+            )
             db.session.delete(property)
             db.session.commit()
             return jsonify({"success": True, "message": "Property deleted successfully"})
@@ -2951,12 +6423,10 @@ def admin_property_detail(property_id):
 @login_required
 def admin_units():
     try:
-        admin = get_current_admin()
-        if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR'):
+        if not current_admin_has_any_role('CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR'):
             return jsonify({"success": False, "message": "Access restricted to CEO, Manager, Accountant, or Realtor"}), 403
-        sync_property_units_from_tenants()
         property_id = request.args.get('property_id', type=int)
-        query = PropertyUnit.query
+        query = PropertyUnit.query.options(joinedload(PropertyUnit.property))
         if property_id:
             query = query.filter_by(property_id=property_id)
         units = query.order_by(PropertyUnit.property_id.asc(), PropertyUnit.sort_order.asc(), PropertyUnit.unit_code.asc()).all()
@@ -2983,7 +6453,7 @@ def admin_unit_detail(unit_id):
             unit.notes = (data['notes'] or '').strip() or None
         unit.updated_at = datetime.utcnow()
         db.session.commit()
-        sync_property_units_from_tenants()
+        sync_units([unit.id])
         return jsonify({"success": True, "message": "Unit updated", "unit": serialize_property_unit(unit)})
     except Exception as e:
         logger.error(f"Error updating unit {unit_id}: {str(e)}")
@@ -2995,12 +6465,11 @@ def admin_unit_detail(unit_id):
 def admin_construction_updates():
     try:
         if request.method == 'GET':
-            admin = get_current_admin()
-            if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR', 'INVESTOR'):
+            if not current_admin_has_any_role('CEO', 'MANAGER', 'ACCOUNTANT', 'REALTOR', 'INVESTOR'):
                 return jsonify({"success": False, "message": "Access restricted to authorized roles"}), 403
             property_id = request.args.get('property_id', type=int)
             public_only = request.args.get('public_only', 'false').lower() == 'true'
-            query = ConstructionUpdate.query
+            query = ConstructionUpdate.query.options(joinedload(ConstructionUpdate.property))
             if property_id:
                 query = query.filter_by(property_id=property_id)
             if public_only:
@@ -3085,6 +6554,10 @@ def admin_project_expenses():
         if request.method == 'GET':
             if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT'):
                 return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
+            try:
+                list_args = parse_list_args()
+            except ListArgumentError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
             property_id = request.args.get('property_id', type=int)
             approval_status = (request.args.get('approval_status') or '').strip().lower()
             has_receipt = (request.args.get('has_receipt') or '').strip().lower()
@@ -3099,16 +6572,18 @@ def admin_project_expenses():
                 query = query.filter(ProjectExpense.receipt_path.isnot(None), ProjectExpense.receipt_path != '')
             if category_filter in {'materials', 'labour', 'transport', 'equipment', 'permits', 'land', 'other'}:
                 query = query.filter_by(category=category_filter)
-            expenses = query.order_by(ProjectExpense.expense_date.desc(), ProjectExpense.created_at.desc()).all()
-            total_amount = round(sum(exp.amount or 0 for exp in expenses), 2)
-            by_category = {}
-            for exp in expenses:
-                by_category[exp.category] = round(by_category.get(exp.category, 0) + (exp.amount or 0), 2)
+            query = apply_list_search(query, ProjectExpense.item_name, ProjectExpense.payee_name)
+            query = apply_list_date_range(query, ProjectExpense.expense_date, list_args)
+            amount_sum = func.coalesce(func.sum(ProjectExpense.amount), 0)
+            category_rows = query.order_by(None).with_entities(
+                ProjectExpense.category, amount_sum, func.count()).group_by(ProjectExpense.category).all()
+            by_category = {category: round(amount or 0, 2) for category, amount, _ in category_rows}
+            total_amount = round(sum(amount or 0 for _, amount, _ in category_rows), 2)
+            status_key = func.coalesce(ProjectExpense.approval_status, 'pending')
             approval_totals = {'pending': 0.0, 'approved': 0.0, 'rejected': 0.0}
-            for exp in summary_query.all():
-                key = exp.approval_status or 'pending'
+            for key, amount in summary_query.with_entities(status_key, amount_sum).group_by(status_key).all():
                 if key in approval_totals:
-                    approval_totals[key] = round(approval_totals[key] + (exp.amount or 0), 2)
+                    approval_totals[key] = round(amount or 0, 2)
             budget_total = None
             budget_remaining = None
             over_budget = False
@@ -3118,15 +6593,27 @@ def admin_project_expenses():
                     budget_total = round(prop.capital_budget, 2)
                     budget_remaining = round(budget_total - approval_totals['approved'], 2)
                     over_budget = budget_remaining < 0
-            return jsonify({
-                'expenses': [serialize_project_expense(expense) for expense in expenses],
+            payload = {
+                'expenses': [],
+                'count': sum(count for _, _, count in category_rows),
                 'total_amount': total_amount,
                 'by_category': by_category,
                 'approval_totals': approval_totals,
                 'budget_total': budget_total,
                 'budget_remaining': budget_remaining,
                 'over_budget': over_budget,
-            })
+            }
+            if list_args['limit']:
+                page, payload['next_cursor'] = keyset_page(
+                    query.options(joinedload(ProjectExpense.property)), ProjectExpense,
+                    list_args['cursor'], list_args['limit'], ProjectExpense.expense_date)
+                payload['expenses'] = shape_list_rows(page, serialize_project_expense, list_args['fields'])
+                payload['limit'] = list_args['limit']
+            else:
+                expenses = query.options(joinedload(ProjectExpense.property)).order_by(
+                    ProjectExpense.expense_date.desc(), ProjectExpense.id.desc()).all()
+                payload['expenses'] = shape_list_rows(expenses, serialize_project_expense, list_args['fields'])
+            return jsonify(payload)
 
         if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT'):
             return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
@@ -3169,6 +6656,7 @@ def admin_project_expenses():
             recorded_by=admin.display_name or admin.username,
         )
         db.session.add(expense)
+        apply_rollup_change(None, expense_rollup_contribution(expense))
         if payee_name:
             existing_vendor = VendorContact.query.filter_by(name=payee_name).first()
             if not existing_vendor:
@@ -3180,6 +6668,7 @@ def admin_project_expenses():
         db.session.commit()
         return jsonify({"success": True, "message": "Project expense recorded", "expense": serialize_project_expense(expense)})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error managing project expenses: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -3193,7 +6682,9 @@ def admin_project_expense_detail(expense_id):
             return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
 
         expense = ProjectExpense.query.get_or_404(expense_id)
+        rollup_before = expense_rollup_contribution(expense)
         if request.method == 'DELETE':
+            apply_rollup_change(rollup_before, None)
             db.session.delete(expense)
             db.session.commit()
             return jsonify({"success": True, "message": "Project expense removed"})
@@ -3250,6 +6741,7 @@ def admin_project_expense_detail(expense_id):
                     is_active=True,
                 ))
         expense.updated_at = datetime.utcnow()
+        apply_rollup_change(rollup_before, expense_rollup_contribution(expense))
         db.session.commit()
         return jsonify({"success": True, "message": "Project expense updated", "expense": serialize_project_expense(expense)})
     except Exception as e:
@@ -3297,25 +6789,28 @@ def admin_maintenance():
         if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER'):
             return jsonify({"success": False, "message": "Access restricted"}), 403
         if request.method == 'GET':
+            try:
+                list_args = parse_list_args()
+            except ListArgumentError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
             property_id = request.args.get('property_id')
             q = MaintenanceRecord.query
             if property_id:
                 q = q.filter_by(property_id=int(property_id))
-            records = q.order_by(MaintenanceRecord.maintenance_date.desc(), MaintenanceRecord.id.desc()).all()
-            return jsonify([{
-                'id': r.id,
-                'property_id': r.property_id,
-                'property_title': r.property.title if r.property else '',
-                'maintenance_date': r.maintenance_date.isoformat() if r.maintenance_date else '',
-                'title': r.title,
-                'category': r.category,
-                'description': r.description or '',
-                'vendor_name': r.vendor_name or '',
-                'cost': r.cost,
-                'status': r.status,
-                'recorded_by': r.recorded_by or '',
-                'created_at': r.created_at.strftime('%Y-%m-%d %H:%M') if r.created_at else '',
-            } for r in records])
+            if request.args.get('status'):
+                q = q.filter_by(status=request.args['status'])
+            if request.args.get('category'):
+                q = q.filter_by(category=request.args['category'])
+            q = apply_list_search(q, MaintenanceRecord.title, MaintenanceRecord.vendor_name)
+            q = apply_list_date_range(q, MaintenanceRecord.maintenance_date, list_args)
+            page_q = q.options(joinedload(MaintenanceRecord.property))
+            if list_args['limit']:
+                totals = count_by_column(q, MaintenanceRecord.status)
+                totals['cost'] = round(q.order_by(None).with_entities(func.coalesce(func.sum(MaintenanceRecord.cost), 0)).scalar() or 0, 2)
+                return list_page_response(page_q, MaintenanceRecord, serialize_maintenance_record, list_args, totals,
+                                          MaintenanceRecord.maintenance_date)
+            records = page_q.order_by(MaintenanceRecord.maintenance_date.desc(), MaintenanceRecord.id.desc()).all()
+            return jsonify(shape_list_rows(records, serialize_maintenance_record, list_args['fields']))
         data = request.get_json() or {}
         title = (data.get('title') or '').strip()
         if not title:
@@ -3338,6 +6833,7 @@ def admin_maintenance():
         db.session.commit()
         return jsonify({"success": True, "message": "Maintenance record saved", "id": record.id})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error managing maintenance: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -3403,26 +6899,28 @@ def admin_get_inquiries():
             db.session.add(inq)
             db.session.commit()
             return jsonify({"success": True, "message": "Lead added", "id": inq.id})
-        inquiries = PropertyInquiry.query.order_by(PropertyInquiry.created_at.desc()).all()
-        return jsonify([{
-            'id': inquiry.id,
-            'property_id': inquiry.property_id,
-            'property_title': inquiry.property.title if inquiry.property else 'General Inquiry',
-            'full_name': inquiry.full_name,
-            'email': inquiry.email,
-            'phone': inquiry.phone,
-            'inquiry_type': inquiry.inquiry_type,
-            'university': inquiry.university,
-            'year_of_study': inquiry.year_of_study,
-            'budget_range': inquiry.budget_range,
-            'preferred_move_date': inquiry.preferred_move_date.isoformat() if inquiry.preferred_move_date else None,
-            'message': inquiry.message,
-            'status': inquiry.status,
-            'priority': inquiry.priority,
-            'inquiry_notes': inquiry.inquiry_notes or '',
-            'created_at': inquiry.created_at.isoformat()
-        } for inquiry in inquiries])
+        try:
+            list_args = parse_list_args()
+        except ListArgumentError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        query = PropertyInquiry.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args['status'])
+        if request.args.get('inquiry_type'):
+            query = query.filter_by(inquiry_type=request.args['inquiry_type'])
+        if request.args.get('property_id', type=int):
+            query = query.filter_by(property_id=request.args.get('property_id', type=int))
+        query = apply_list_search(query, PropertyInquiry.full_name, PropertyInquiry.email, PropertyInquiry.phone)
+        query = apply_list_date_range(query, PropertyInquiry.created_at, list_args)
+        if list_args['limit']:
+            return list_page_response(query.options(joinedload(PropertyInquiry.property)), PropertyInquiry,
+                                      serialize_property_inquiry, list_args,
+                                      count_by_column(query, PropertyInquiry.status))
+        inquiries = query.options(joinedload(PropertyInquiry.property)).order_by(
+            PropertyInquiry.created_at.desc(), PropertyInquiry.id.desc()).all()
+        return jsonify(shape_list_rows(inquiries, serialize_property_inquiry, list_args['fields']))
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error fetching inquiries: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -3464,22 +6962,26 @@ def admin_update_inquiry(inquiry_id):
 def admin_get_contact_messages():
     """Get all contact messages with form origin tracking"""
     try:
-        admin = get_current_admin()
-        if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER'):
+        if not current_admin_has_any_role('CEO', 'MANAGER'):
             return jsonify({"success": False, "message": "Access restricted to CEO or Manager"}), 403
-        messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
-        return jsonify([{
-            'id': msg.id,
-            'full_name': msg.full_name,
-            'email': msg.email,
-            'phone': msg.phone,
-            'subject': msg.subject,
-            'message': msg.message,
-            'form_origin': msg.form_origin,
-            'status': msg.status,
-            'created_at': msg.created_at.isoformat()
-        } for msg in messages])
+        try:
+            list_args = parse_list_args()
+        except ListArgumentError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        query = ContactMessage.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args['status'])
+        if request.args.get('form_origin'):
+            query = query.filter_by(form_origin=request.args['form_origin'])
+        query = apply_list_search(query, ContactMessage.full_name, ContactMessage.email, ContactMessage.subject)
+        query = apply_list_date_range(query, ContactMessage.created_at, list_args)
+        if list_args['limit']:
+            return list_page_response(query, ContactMessage, serialize_contact_message, list_args,
+                                      count_by_column(query, ContactMessage.status))
+        messages = query.order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).all()
+        return jsonify(shape_list_rows(messages, serialize_contact_message, list_args['fields']))
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error fetching contact messages: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -3571,16 +7073,32 @@ def get_contract_detail(contract_id):
         "ceo_signed_at": contract.ceo_signed_at.strftime("%d %b %Y, %H:%M UTC") if contract.ceo_signed_at else None,
     })
 
+def latest_contract_status_by_user():
+    """{user_id: status} of each user's most recent UserContract, in one windowed query."""
+    from sqlalchemy import func as sqlfunc
+
+    ranked = db.session.query(
+        UserContract.user_id,
+        UserContract.status,
+        sqlfunc.row_number().over(
+            partition_by=UserContract.user_id,
+            order_by=(UserContract.created_at.desc(), UserContract.id.desc()),
+        ).label('position'),
+    ).subquery()
+    return dict(db.session.query(ranked.c.user_id, ranked.c.status).filter(ranked.c.position == 1).all())
+
+
 @app.route("/admin/api/completed-contracts", methods=["GET"])
 @login_required
 def get_completed_contracts():
     admin = get_current_admin()
     if not admin or admin.role != "CEO":
         return jsonify({"success": False, "message": "CEO access required"}), 403
-    contracts = UserContract.query.filter_by(status="completed").order_by(UserContract.ceo_signed_at.desc()).all()
+    contracts = UserContract.query.options(joinedload(UserContract.user)).filter_by(
+        status="completed").order_by(UserContract.ceo_signed_at.desc()).all()
     result = []
     for c in contracts:
-        user = Admin.query.get(c.user_id)
+        user = c.user
         result.append({
             "id": c.id, "role": c.contract_type,
             "user_name": user.display_name if user else "Unknown",
@@ -3594,10 +7112,11 @@ def get_completed_contracts():
 @ceo_required
 def get_pending_contracts():
     try:
-        contracts = UserContract.query.filter_by(status='pending_ceo_signature').order_by(UserContract.created_at.asc()).all()
+        contracts = UserContract.query.options(joinedload(UserContract.user)).filter_by(
+            status='pending_ceo_signature').order_by(UserContract.created_at.asc()).all()
         result = []
         for c in contracts:
-            user = Admin.query.get(c.user_id)
+            user = c.user
             result.append({
                 'id': c.id,
                 'user_id': c.user_id,
@@ -3799,9 +7318,9 @@ def admin_accounts():
     try:
         if request.method == 'GET':
             accounts = Admin.query.order_by(Admin.created_at.desc()).all()
+            contract_status = latest_contract_status_by_user()
             result = []
             for a in accounts:
-                contract = UserContract.query.filter_by(user_id=a.id).order_by(UserContract.created_at.desc()).first()
                 result.append({
                     'id': a.id,
                     'username': a.username,
@@ -3811,7 +7330,7 @@ def admin_accounts():
                     'display_name': a.display_name or '',
                     'is_active': a.is_active,
                     'has_signed_contract': a.has_signed_contract,
-                    'contract_status': contract.status if contract else 'no_contract',
+                    'contract_status': contract_status.get(a.id, 'no_contract'),
                     'monthly_salary': float(a.monthly_salary or 0),
                     'created_at': a.created_at.strftime('%Y-%m-%d'),
                 })
@@ -3842,7 +7361,7 @@ def admin_accounts():
         new_admin = Admin(
             username=data['username'].strip(),
             email=data['email'].strip().lower(),
-            password_hash=generate_password_hash(data['password']),
+            password_hash=hash_password(data['password']),
             role=data['role'],
             secondary_roles=secondary,
             display_name=(data.get('display_name') or '').strip() or None,
@@ -3860,6 +7379,9 @@ def admin_accounts():
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Username or email already exists"}), 409
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Server is busy. Please try again shortly."}), 503, {'Retry-After': '5'}
     except Exception as e:
         logger.error(f"Error managing accounts: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
@@ -3874,6 +7396,7 @@ def admin_account_detail(account_id):
 
         if request.method == 'PUT':
             data = request.get_json()
+            access_before = (account.role, tuple(account.secondary_roles or ()), account.is_active)
             if 'display_name' in data:
                 account.display_name = (data['display_name'] or '').strip() or None
             if 'username' in data and account.id != ceo.id:
@@ -3910,8 +7433,13 @@ def admin_account_detail(account_id):
                     _record_salary_change(account, new_salary, ceo)
                     account.monthly_salary = new_salary
             if data.get('new_password') and len(data['new_password']) >= 8:
-                account.password_hash = generate_password_hash(data['new_password'])
+                account.password_hash = hash_password(data['new_password'])
+            access_changed = access_before != (account.role, tuple(account.secondary_roles or ()), account.is_active)
+            if access_changed:
+                bump_admin_role_version(account.id)
             db.session.commit()
+            if access_changed:
+                invalidate_published_cache(ADMIN_ROLES_CACHE_KEY)
             return jsonify({"success": True, "message": "Account updated"})
 
         if account.id == ceo.id:
@@ -3921,15 +7449,31 @@ def admin_account_detail(account_id):
         UserContract.query.filter_by(user_id=account.id).delete()
         InvestorProfile.query.filter_by(user_id=account.id).delete()
         db.session.delete(account)
+        bump_admin_role_version(account.id)
         db.session.commit()
+        invalidate_published_cache(ADMIN_ROLES_CACHE_KEY)
         return jsonify({"success": True, "message": "Account deleted"})
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Server is busy. Please try again shortly."}), 503, {'Retry-After': '5'}
     except Exception as e:
         logger.error(f"Error on account {account_id}: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
 # ========== PROPERTY UNIT TYPE API ==========
-def _serialize_unit_type(ut):
-    occupied = Tenant.query.filter_by(unit_type_id=ut.id, status='active').count()
+def active_tenant_counts_by_unit_type(unit_type_ids):
+    from sqlalchemy import func as sqlfunc
+
+    if not unit_type_ids:
+        return {}
+    return dict(db.session.query(Tenant.unit_type_id, sqlfunc.count(Tenant.id)).filter(
+        Tenant.unit_type_id.in_(unit_type_ids), Tenant.status == 'active'
+    ).group_by(Tenant.unit_type_id).all())
+
+
+def _serialize_unit_type(ut, occupied=None):
+    if occupied is None:
+        occupied = Tenant.query.filter_by(unit_type_id=ut.id, status='active').count()
     return {
         'id': ut.id,
         'property_id': ut.property_id,
@@ -3951,11 +7495,12 @@ def admin_unit_types():
     try:
         if request.method == 'GET':
             prop_id = request.args.get('property_id', type=int)
-            q = PropertyUnitType.query
+            q = PropertyUnitType.query.options(joinedload(PropertyUnitType.property))
             if prop_id:
                 q = q.filter_by(property_id=prop_id)
             unit_types = q.order_by(PropertyUnitType.property_id.asc(), PropertyUnitType.name.asc()).all()
-            return jsonify([_serialize_unit_type(ut) for ut in unit_types])
+            occupied = active_tenant_counts_by_unit_type([ut.id for ut in unit_types])
+            return jsonify([_serialize_unit_type(ut, occupied.get(ut.id, 0)) for ut in unit_types])
 
         admin = get_current_admin()
         if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER'):
@@ -4042,32 +7587,26 @@ def admin_unit_type_detail(unit_type_id):
 def admin_tenants():
     try:
         if request.method == 'GET':
-            admin = get_current_admin()
-            if not admin or not admin_has_any_role(admin, 'CEO', 'MANAGER', 'ACCOUNTANT'):
+            if not current_admin_has_any_role('CEO', 'MANAGER', 'ACCOUNTANT'):
                 return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
+            try:
+                list_args = parse_list_args()
+            except ListArgumentError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
             status_filter = request.args.get('status')
             q = Tenant.query
             if status_filter:
                 q = q.filter_by(status=status_filter)
-            tenants = q.order_by(Tenant.created_at.desc()).all()
-            return jsonify([{
-                'id': t.id,
-                'name': t.name,
-                'email': t.email or '',
-                'phone': t.phone or '',
-                'property_name': t.property_name or '',
-                'unit_number': t.unit_number or '',
-                'unit_type_id': t.unit_type_id,
-                'unit_type_name': t.unit_type.name if t.unit_type else '',
-                'lease_start': t.lease_start.isoformat() if t.lease_start else '',
-                'lease_end': t.lease_end.isoformat() if t.lease_end else '',
-                'monthly_rent': t.monthly_rent or 0,
-                'status': t.status,
-                'notes': t.notes or '',
-                'serviced_by_id': t.serviced_by_id,
-                'serviced_by_name': (t.serviced_by.display_name or t.serviced_by.username) if t.serviced_by else '',
-                'created_at': t.created_at.strftime('%Y-%m-%d'),
-            } for t in tenants])
+            if request.args.get('property_id', type=int):
+                q = q.filter_by(property_id=request.args.get('property_id', type=int))
+            q = apply_list_search(q, Tenant.name, Tenant.email, Tenant.phone, Tenant.unit_number)
+            q = apply_list_date_range(q, Tenant.created_at, list_args)
+            page_q = q.options(joinedload(Tenant.unit_type), joinedload(Tenant.serviced_by))
+            if list_args['limit']:
+                return list_page_response(page_q, Tenant, serialize_tenant, list_args,
+                                          count_by_column(q, Tenant.status))
+            tenants = page_q.order_by(Tenant.created_at.desc(), Tenant.id.desc()).all()
+            return jsonify(shape_list_rows(tenants, serialize_tenant, list_args['fields']))
 
         _tenant_admin = get_current_admin()
         if not _tenant_admin or not admin_has_any_role(_tenant_admin, 'CEO', 'MANAGER'):
@@ -4102,11 +7641,13 @@ def admin_tenants():
             notes=(data.get('notes') or '').strip() or None,
             serviced_by_id=int(serviced_by_id) if serviced_by_id else None,
         )
+        link_tenant_to_property(tenant, data.get('property_id'))
         db.session.add(tenant)
         db.session.commit()
-        sync_property_units_from_tenants()
+        sync_units([tenant.unit_id])
         return jsonify({"success": True, "message": "Tenant added", "id": tenant.id})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error managing tenants: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -4118,17 +7659,19 @@ def admin_tenant_detail(tenant_id):
         if not _tenant_admin or not admin_has_any_role(_tenant_admin, 'CEO', 'MANAGER'):
             return jsonify({"success": False, "message": "CEO or Manager access required"}), 403
         tenant = Tenant.query.get_or_404(tenant_id)
+        old_property_id, old_unit_id = tenant.property_id, tenant.unit_id
         if request.method == 'DELETE':
             if request.args.get('hard') == '1':
                 if not admin_has_any_role(_tenant_admin, 'CEO'):
                     return jsonify({"success": False, "message": "CEO access required"}), 403
+                reattribute_tenant_payments(tenant, old_property_id, None)
                 db.session.delete(tenant)
                 db.session.commit()
-                sync_property_units_from_tenants()
+                sync_units([old_unit_id])
                 return jsonify({"success": True, "message": "Tenant removed"})
             tenant.status = 'vacated'
             db.session.commit()
-            sync_property_units_from_tenants()
+            sync_units([old_unit_id])
             return jsonify({"success": True, "message": "Tenant marked as vacated"})
         data = request.get_json() or {}
         for field in ['name', 'email', 'phone', 'property_name', 'unit_number', 'status', 'notes']:
@@ -4150,8 +7693,11 @@ def admin_tenant_detail(tenant_id):
         if 'serviced_by_id' in data:
             sb = data.get('serviced_by_id')
             tenant.serviced_by_id = int(sb) if sb else None
+        if any(field in data for field in ('property_id', 'property_name', 'unit_number', 'unit_type_id')):
+            link_tenant_to_property(tenant, data.get('property_id'))
+        reattribute_tenant_payments(tenant, old_property_id, tenant.property_id)
         db.session.commit()
-        sync_property_units_from_tenants()
+        sync_units([old_unit_id, tenant.unit_id])
         return jsonify({"success": True, "message": "Tenant updated"})
     except Exception as e:
         logger.error(f"Error on tenant {tenant_id}: {str(e)}")
@@ -4167,8 +7713,27 @@ def admin_payments():
             return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
 
         if request.method == 'GET':
-            payments = PaymentRecord.query.order_by(PaymentRecord.created_at.desc()).limit(50).all()
-            return jsonify([serialize_payment_record(p) for p in payments])
+            try:
+                list_args = parse_list_args()
+            except ListArgumentError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
+            query = PaymentRecord.query
+            if request.args.get('tenant_id', type=int):
+                query = query.filter_by(tenant_id=request.args.get('tenant_id', type=int))
+            if request.args.get('payment_type'):
+                query = query.filter_by(payment_type=request.args['payment_type'])
+            query = apply_list_search(query, PaymentRecord.tenant_name, PaymentRecord.description)
+            query = apply_list_date_range(query, PaymentRecord.payment_date, list_args)
+            if list_args['limit']:
+                totals = count_by_column(query, PaymentRecord.payment_type)
+                totals['amount'] = round(query.order_by(None).with_entities(func.coalesce(func.sum(PaymentRecord.amount), 0)).scalar() or 0, 2)
+                return list_page_response(query, PaymentRecord, serialize_payment_record, list_args, totals)
+            # Legacy callers get the newest page as a bare array; the rest is reachable via the cursor.
+            payments, next_cursor = keyset_page(query, PaymentRecord, None, DEFAULT_PAGE_SIZE)
+            response = jsonify(shape_list_rows(payments, serialize_payment_record, list_args['fields']))
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
 
         data = request.get_json() or {}
         if not data.get('amount'):
@@ -4189,9 +7754,11 @@ def admin_payments():
             recorded_by=admin.display_name or admin.username if admin else None,
         )
         db.session.add(payment)
+        apply_rollup_change(None, payment_rollup_contribution(payment))
         db.session.commit()
         return jsonify({"success": True, "message": "Payment recorded", "id": payment.id})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error managing payments: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
 
@@ -4205,7 +7772,9 @@ def admin_payment_detail(payment_id):
             return jsonify({"success": False, "message": "Access restricted to CEO, Manager, or Accountant"}), 403
 
         payment = PaymentRecord.query.get_or_404(payment_id)
+        rollup_before = payment_rollup_contribution(payment)
         if request.method == 'DELETE':
+            apply_rollup_change(rollup_before, None)
             db.session.delete(payment)
             db.session.commit()
             return jsonify({"success": True, "message": "Payment removed"})
@@ -4233,6 +7802,7 @@ def admin_payment_detail(payment_id):
             payment.tenant_name = tenant_name
 
         payment.recorded_by = admin.display_name or admin.username
+        apply_rollup_change(rollup_before, payment_rollup_contribution(payment))
         db.session.commit()
         return jsonify({"success": True, "message": "Payment updated", "payment": serialize_payment_record(payment)})
     except Exception as e:
@@ -4281,13 +7851,10 @@ def get_effective_monthly_salary(user, year, month):
     """
     if not user:
         return 0.0
-    # Last day of the requested month
-    import calendar
-    last_day = calendar.monthrange(year, month)[1]
-    end_of_month = date_type(year, month, last_day)
+    period = period_for('month', date_type(year, month, 1))
     row = (
         SalaryHistory.query
-        .filter(SalaryHistory.user_id == user.id, SalaryHistory.effective_from <= end_of_month)
+        .filter(SalaryHistory.user_id == user.id, SalaryHistory.effective_from < period['end'])
         .order_by(SalaryHistory.effective_from.desc(), SalaryHistory.id.desc())
         .first()
     )
@@ -4307,42 +7874,26 @@ def _user_qualifies_for_commission(user):
     return False
 
 
-def compute_user_payroll(user, year, month):
-    """Return commission + salary breakdown for a single user in a (year, month)."""
-    from sqlalchemy import extract
-
-    commission_lines = []
-    commission_total = 0.0
-    if _user_qualifies_for_commission(user):
-        tenants = Tenant.query.filter(
-            Tenant.serviced_by_id == user.id,
-            extract('year', Tenant.created_at) == year,
-            extract('month', Tenant.created_at) == month,
-        ).all()
-        for t in tenants:
-            total_paid = float(t.monthly_rent or 0)  # legacy field name; stores gross yearly total
-            base = total_paid / (1 + PAYROLL_COMMISSION_RATE)
-            commission = total_paid - base
-            commission_total += commission
-            commission_lines.append({
-                'tenant_id': t.id,
-                'tenant_name': t.name,
-                'unit_number': t.unit_number,
-                'annual_rent': total_paid,
-                'base_rent': base,
-                'commission': commission,
-            })
+def _commission_line(tenant):
+    total_paid = float(tenant.monthly_rent or 0)  # legacy field name; stores gross yearly total
+    base = total_paid / (1 + PAYROLL_COMMISSION_RATE)
+    return {
+        'tenant_id': tenant.id,
+        'tenant_name': tenant.name,
+        'unit_number': tenant.unit_number,
+        'annual_rent': total_paid,
+        'base_rent': base,
+        'commission': total_paid - base,
+    }
 
-    salary = get_effective_monthly_salary(user, year, month)
 
-    payments_q = (
-        PayrollPayment.query
-        .filter(PayrollPayment.user_id == user.id,
-                PayrollPayment.period_year == year,
-                PayrollPayment.period_month == month)
-        .order_by(PayrollPayment.paid_at.desc())
-        .all()
-    )
+def _build_payroll_row(user, tenants, salary, payments):
+    """Assemble one payroll row from already-loaded tenants, salary and PayrollPayment rows."""
+    qualifies = _user_qualifies_for_commission(user)
+    commission_lines = [_commission_line(t) for t in tenants] if qualifies else []
+    commission_total = 0.0
+    for line in commission_lines:
+        commission_total += line['commission']
     payment_history = [{
         'id': p.id,
         'amount': float(p.amount or 0),
@@ -4350,7 +7901,7 @@ def compute_user_payroll(user, year, month):
         'notes': p.notes or '',
         'paid_by': p.paid_by or '',
         'paid_at': p.paid_at.isoformat() if p.paid_at else None,
-    } for p in payments_q]
+    } for p in payments]
     already_paid = float(sum(p['amount'] for p in payment_history))
 
     total_earned = commission_total + salary
@@ -4360,7 +7911,7 @@ def compute_user_payroll(user, year, month):
         'display_name': user.display_name or user.username,
         'role': user.role,
         'secondary_roles': user.secondary_roles or [],
-        'qualifies_for_commission': _user_qualifies_for_commission(user),
+        'qualifies_for_commission': qualifies,
         'commission_lines': commission_lines,
         'commission_total': commission_total,
         'salary': salary,
@@ -4371,15 +7922,107 @@ def compute_user_payroll(user, year, month):
     }
 
 
+def compute_user_payroll(user, year, month):
+    """Return commission + salary breakdown for a single user in a (year, month)."""
+    period = period_for('month', date_type(year, month, 1))
+    tenants = []
+    if _user_qualifies_for_commission(user):
+        tenants = Tenant.query.filter(
+            Tenant.serviced_by_id == user.id,
+            Tenant.created_at >= period['start'],
+            Tenant.created_at < period['end'],
+        ).order_by(Tenant.id.asc()).all()
+
+    salary = get_effective_monthly_salary(user, year, month)
+
+    payments = (
+        PayrollPayment.query
+        .filter(PayrollPayment.user_id == user.id,
+                PayrollPayment.period_year == year,
+                PayrollPayment.period_month == month)
+        .order_by(PayrollPayment.paid_at.desc(), PayrollPayment.id.desc())
+        .all()
+    )
+    return _build_payroll_row(user, tenants, salary, payments)
+
+
+def compute_payroll_batch(users, periods):
+    """Payroll rows for every user in every month period using three set-based queries.
+
+    Returns {(year, month): [row, ...]} with rows in `users` order; each row matches
+    compute_user_payroll() for the same user and month.
+    """
+    user_ids = [u.id for u in users]
+    commission_ids = [u.id for u in users if _user_qualifies_for_commission(u)]
+    first, last = periods[0], periods[-1]
+    result = {period['key']: [] for period in periods}
+    if not user_ids:
+        return result
+
+    tenants_by_slot = defaultdict(list)
+    if commission_ids:
+        for t in Tenant.query.filter(
+            Tenant.serviced_by_id.in_(commission_ids),
+            Tenant.created_at >= first['start'],
+            Tenant.created_at < last['end'],
+        ).order_by(Tenant.id.asc()).all():
+            tenants_by_slot[(t.serviced_by_id, (t.created_at.year, t.created_at.month))].append(t)
+
+    history_by_user = defaultdict(list)
+    for row in SalaryHistory.query.filter(
+        SalaryHistory.user_id.in_(user_ids),
+        SalaryHistory.effective_from < last['end'],
+    ).order_by(SalaryHistory.effective_from.desc(), SalaryHistory.id.desc()).all():
+        history_by_user[row.user_id].append(row)
+
+    payments_by_slot = defaultdict(list)
+    if first['key'][0] == last['key'][0]:
+        period_filters = [PayrollPayment.period_year == first['key'][0],
+                          PayrollPayment.period_month >= first['key'][1],
+                          PayrollPayment.period_month <= last['key'][1]]
+    else:
+        period_filters = [PayrollPayment.period_year >= first['key'][0],
+                          PayrollPayment.period_year <= last['key'][0]]
+    for p in PayrollPayment.query.filter(
+        PayrollPayment.user_id.in_(user_ids),
+        *period_filters,
+    ).order_by(PayrollPayment.paid_at.desc(), PayrollPayment.id.desc()).all():
+        payments_by_slot[(p.user_id, (p.period_year, p.period_month))].append(p)
+
+    for period in periods:
+        for user in users:
+            # Same rule as get_effective_monthly_salary(): latest row effective before month end.
+            in_effect = next((h for h in history_by_user[user.id] if h.effective_from < period['end']), None)
+            salary = float(in_effect.monthly_salary or 0) if in_effect is not None else float(user.monthly_salary or 0)
+            result[period['key']].append(_build_payroll_row(
+                user,
+                tenants_by_slot[(user.id, period['key'])],
+                salary,
+                payments_by_slot[(user.id, period['key'])],
+            ))
+    return result
+
+
+def payroll_totals(rows):
+    return {
+        'commission_total': sum(r['commission_total'] for r in rows),
+        'salary_total': sum(r['salary'] for r in rows),
+        'earned_total': sum(r['total_earned'] for r in rows),
+        'paid_total': sum(r['already_paid'] for r in rows),
+        'outstanding_total': sum(r['outstanding'] for r in rows),
+    }
+
+
 @app.route('/admin/api/payroll/summary')
 @login_required
 @ceo_required
 def admin_payroll_summary():
     try:
         today = date_type.today()
+        annual = request.args.get('scope') == 'year'
         try:
             year = int(request.args.get('year', today.year))
-            month = int(request.args.get('month', today.month))
+            month = 1 if annual else int(request.args.get('month', today.month))
         except (TypeError, ValueError):
             return jsonify({"success": False, "message": "Invalid year or month"}), 400
         if not (1 <= month <= 12):
@@ -4387,16 +8030,23 @@ def admin_payroll_summary():
 
         users = Admin.query.filter_by(is_active=True).order_by(Admin.role.asc(), Admin.username.asc()).all()
         # CEO and INVESTOR roles are not on payroll
-        rows = [compute_user_payroll(u, year, month) for u in users if (u.role or '').upper() not in ('CEO', 'INVESTOR')]
-
-        totals = {
-            'commission_total': sum(r['commission_total'] for r in rows),
-            'salary_total': sum(r['salary'] for r in rows),
-            'earned_total': sum(r['total_earned'] for r in rows),
-            'paid_total': sum(r['already_paid'] for r in rows),
-            'outstanding_total': sum(r['outstanding'] for r in rows),
-        }
-        return jsonify({'success': True, 'year': year, 'month': month, 'rows': rows, 'totals': totals})
+        payroll_users = [u for u in users if (u.role or '').upper() not in ('CEO', 'INVESTOR')]
+
+        if annual:
+            periods = iter_periods('month', date_type(year, 1, 1), date_type(year, 12, 1))
+            by_month = compute_payroll_batch(payroll_users, periods)
+            months = [{
+                'month': period['key'][1],
+                'label': period['label'],
+                'rows': by_month[period['key']],
+                'totals': payroll_totals(by_month[period['key']]),
+            } for period in periods]
+            all_rows = [row for entry in months for row in entry['rows']]
+            return jsonify({'success': True, 'year': year, 'scope': 'year', 'months': months, 'totals': payroll_totals(all_rows)})
+
+        period = period_for('month', date_type(year, month, 1))
+        rows = compute_payroll_batch(payroll_users, [period])[period['key']]
+        return jsonify({'success': True, 'year': year, 'month': month, 'rows': rows, 'totals': payroll_totals(rows)})
     except Exception as e:
         logger.error(f"Error in payroll summary: {str(e)}")
         return jsonify({"success": False, "message": "Internal server error"}), 500
@@ -4576,10 +8226,12 @@ def admin_payroll_pay_detail(payment_id):
 def admin_investors():
     try:
         if request.method == 'GET':
-            profiles = InvestorProfile.query.order_by(InvestorProfile.created_at.desc()).all()
+            profiles = InvestorProfile.query.options(
+                joinedload(InvestorProfile.user), joinedload(InvestorProfile.property)
+            ).order_by(InvestorProfile.created_at.desc()).all()
             result = []
             for p in profiles:
-                user = Admin.query.get(p.user_id)
+                user = p.user
                 result.append({
                     'id': p.id,
                     'user_id': p.user_id,
@@ -6363,7 +10015,7 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                             <input type="text" id="home_video_url" placeholder="https://www.youtube.com/embed/VIDEO_ID" class="w-full px-3 py-2 bg-gray-700 border border-gray-600 rounded-lg text-sm">
                         </div>
                         <div id="videoPanelUpload" class="hidden">
-                            <label class="block text-xs text-gray-400 mb-1">Select a video from your device (MP4, WEBM, MOV — max 200 MB)</label>
+                            <label class="block text-xs text-gray-400 mb-1">Select a video from your device (MP4, WEBM, MOV — max 2 GB, resumable)</label>
                             <input type="file" id="videoFileInput" accept="video/mp4,video/webm,video/quicktime,video/ogg,.mp4,.webm,.mov,.ogg,.m4v" class="w-full px-3 py-2 bg-gray-700 border border-gray-600 rounded-lg text-sm">
                             <div class="mt-2 flex flex-wrap items-center gap-2">
                                 <button type="button" onclick="uploadSiteVideo()" class="bg-pink-700 hover:bg-pink-600 text-white font-medium py-2 px-4 rounded-lg text-sm">Upload Video</button>
@@ -6650,6 +10302,7 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
 
     <script>
         const adminCsrfToken = document.querySelector('meta[name="csrf-token"]')?.getAttribute('content') || '';
+        const DIRECT_VIDEO_UPLOADS = {{ direct_video_uploads | tojson }};
 
         // Enhanced dashboard functionality
         async function fetchData(url, options = {}) {
@@ -6666,6 +10319,27 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             return response.json();
         }
 
+        // Admin lists come a page at a time: with ?limit the list endpoints answer
+        // {items, next_cursor, totals}, and the next page is fetched with ?cursor.
+        const LIST_PAGE_SIZE = 50;
+        function listPageUrl(url, cursor, limit) {
+            const params = new URLSearchParams({ limit: limit || LIST_PAGE_SIZE });
+            if (cursor) params.set('cursor', cursor);
+            return url + (url.includes('?') ? '&' : '?') + params.toString();
+        }
+        function setLoadMore(container, nextCursor, loadNext) {
+            container.querySelector('[data-load-more]')?.remove();
+            if (!nextCursor) return;
+            const inTable = container.tagName === 'TBODY';
+            const wrapper = document.createElement(inTable ? 'tr' : 'div');
+            wrapper.dataset.loadMore = '1';
+            const button = '<button type="button" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Load more</button>';
+            if (inTable) wrapper.innerHTML = `<td colspan="99" class="py-3 text-center">${button}</td>`;
+            else { wrapper.className = 'py-3 text-center'; wrapper.innerHTML = button; }
+            wrapper.querySelector('button').addEventListener('click', () => loadNext(nextCursor));
+            container.appendChild(wrapper);
+        }
+
         function fmtNGN(v) { return '\u20a6' + Number(v || 0).toLocaleString('en-NG'); }
         function fmtCompact(v) {
             const n = Number(v || 0);
@@ -6730,6 +10404,15 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             } catch(e) { console.warn('Could not load properties for filter', e); }
         }
 
+        async function retryFailedJobs() {
+            try {
+                await fetchData('/admin/api/jobs/retry', { method: 'POST' });
+                loadStats();
+            } catch (e) {
+                alert('Error retrying background jobs');
+            }
+        }
+
         async function loadStats(filterPropertyId) {
             try {
                 const qs = filterPropertyId ? ('?property_id=' + filterPropertyId) : '';
@@ -6752,6 +10435,13 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                     if (PENDING_SIGS_COUNT > 0) items.push(`<div class="flex flex-wrap items-center justify-between gap-2 bg-red-900/40 border border-red-700/50 rounded-xl px-3 sm:px-4 py-3"><div class="flex items-center gap-2 min-w-0"><span class="w-2 h-2 rounded-full bg-red-400 flex-shrink-0 animate-pulse"></span><p class="text-sm text-red-200 font-medium">${PENDING_SIGS_COUNT} contract${PENDING_SIGS_COUNT > 1 ? 's' : ''} waiting for your co-signature</p></div><button onclick="showSection('signaturesSection')" class="text-xs text-red-300 border border-red-600 rounded-lg px-3 py-1.5 hover:bg-red-800/40 transition-colors flex-shrink-0">Review Now</button></div>`);
                     if (stats.new_inquiries > 0) items.push(`<div class="flex flex-wrap items-center justify-between gap-2 bg-amber-900/30 border border-amber-700/40 rounded-xl px-3 sm:px-4 py-3"><div class="flex items-center gap-2 min-w-0"><span class="w-2 h-2 rounded-full bg-amber-400 flex-shrink-0"></span><p class="text-sm text-amber-200 font-medium">${stats.new_inquiries} new inquiry${stats.new_inquiries > 1 ? 'ies' : ''} not yet actioned</p></div><button onclick="showSection('inquiriesSection2')" class="text-xs text-amber-300 border border-amber-600 rounded-lg px-3 py-1.5 hover:bg-amber-800/30 transition-colors flex-shrink-0">View Inquiries</button></div>`);
                     if (stats.available_units > 0 && stats.active_tenants === 0) items.push(`<div class="flex flex-wrap items-center justify-between gap-2 bg-blue-900/30 border border-blue-700/40 rounded-xl px-3 sm:px-4 py-3"><div class="flex items-center gap-2 min-w-0"><span class="w-2 h-2 rounded-full bg-blue-400 flex-shrink-0"></span><p class="text-sm text-blue-200 font-medium">${stats.available_units} unit${stats.available_units > 1 ? 's' : ''} available — no active tenants recorded</p></div><button onclick="showSection('tenantsSection')" class="text-xs text-blue-300 border border-blue-600 rounded-lg px-3 py-1.5 hover:bg-blue-800/30 transition-colors flex-shrink-0">Manage Tenants</button></div>`);
+                    const jobs = await fetchData('/admin/api/jobs').catch(() => null);
+                    if (jobs && (jobs.failed > 0 || jobs.overdue > 0)) {
+                        const jobText = jobs.failed > 0
+                            ? `${jobs.failed} background job${jobs.failed > 1 ? 's' : ''} failed: ${jobs.recent_failures.filter(j => j.status === 'failed').map(j => j.name).slice(0, 3).join(', ')}`
+                            : `${jobs.overdue} background job${jobs.overdue > 1 ? 's' : ''} waiting more than 5 minutes — is a job worker running?`;
+                        items.push(`<div class="flex flex-wrap items-center justify-between gap-2 bg-red-900/30 border border-red-700/40 rounded-xl px-3 sm:px-4 py-3"><div class="flex items-center gap-2 min-w-0"><span class="w-2 h-2 rounded-full bg-red-400 flex-shrink-0"></span><p class="text-sm text-red-200 font-medium">${jobText}</p></div>${jobs.failed > 0 ? '<button onclick="retryFailedJobs()" class="text-xs text-red-300 border border-red-600 rounded-lg px-3 py-1.5 hover:bg-red-800/30 transition-colors flex-shrink-0">Retry</button>' : ''}</div>`);
+                    }
                     attnBar.innerHTML = items.join('');
                     attnBar.classList.toggle('hidden', items.length === 0);
                 }
@@ -6943,7 +10633,8 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                 }
                 // Expense categories donut
                 try {
-                    const expData = await fetchData('/admin/api/project-expenses' + qs);
+                    // Only the category totals are used here, so skip the rows.
+                    const expData = await fetchData(listPageUrl('/admin/api/project-expenses' + qs, null, 1));
                     const byCat = expData.by_category || {};
                     const catEntries = Object.entries(byCat).sort((a,b) => b[1]-a[1]).slice(0,6);
                     const catCtx = document.getElementById('ceoCategoryDonut');
@@ -7019,10 +10710,11 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             } catch (err) { alert(err.message || 'Error saving budget'); }
         }
 
-        async function loadInquiries() {
+        async function loadInquiries(cursor) {
             try {
-                const inquiries = await fetchData('/admin/api/inquiries');
-                document.getElementById('inquiriesTable').innerHTML = inquiries.map(inq => `
+                const data = await fetchData(listPageUrl('/admin/api/inquiries', cursor));
+                const table = document.getElementById('inquiriesTable');
+                const rows = data.items.map(inq => `
                     <tr class="border-b border-gray-600">
                         <td class="py-2">${inq.full_name}</td>
                         <td class="py-2">${inq.property_title}</td>
@@ -7042,15 +10734,19 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                         </td>
                     </tr>
                 `).join('');
+                if (cursor) table.insertAdjacentHTML('beforeend', rows);
+                else table.innerHTML = rows;
+                setLoadMore(table, data.next_cursor, loadInquiries);
             } catch (error) {
                 console.error('Error loading inquiries:', error);
             }
         }
 
-        async function loadMessages() {
+        async function loadMessages(cursor) {
             try {
-                const messages = await fetchData('/admin/api/contact-messages');
-                document.getElementById('messagesTable').innerHTML = messages.map(msg => `
+                const data = await fetchData(listPageUrl('/admin/api/contact-messages', cursor));
+                const table = document.getElementById('messagesTable');
+                const rows = data.items.map(msg => `
                     <tr class="border-b border-gray-600">
                         <td class="py-2">${msg.full_name}</td>
                         <td class="py-2"><span class="px-2 py-1 text-xs rounded bg-blue-600">${msg.form_origin}</span></td>
@@ -7069,6 +10765,9 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                         </td>
                     </tr>
                 `).join('');
+                if (cursor) table.insertAdjacentHTML('beforeend', rows);
+                else table.innerHTML = rows;
+                setLoadMore(table, data.next_cursor, loadMessages);
             } catch (error) {
                 console.error('Error loading messages:', error);
             }
@@ -7216,51 +10915,101 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                 return;
             }
             const file = fileInput.files[0];
-            if (file.size > 200 * 1024 * 1024) {
-                msgEl.textContent = 'File too large (max 200 MB).';
-                msgEl.className = 'text-sm text-red-400';
-                return;
-            }
             msgEl.textContent = '';
             progressWrap.classList.remove('hidden');
             progressBar.style.width = '0%';
             progressText.textContent = 'Uploading…';
-            const formData = new FormData();
-            formData.append('file', file);
+            // Chunks are resumable: the session id is remembered per file, and the server's
+            // byte count is the offset to continue from after a dropped connection.
+            const resumeKey = `brightwave.videoUpload.${file.name}.${file.size}.${file.lastModified}`;
+            const sha256Hex = async (blob) => {
+                if (!(window.crypto && crypto.subtle)) return '';
+                const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+                return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+            };
+            const showProgress = (offset) => {
+                const pct = Math.round((offset / file.size) * 100);
+                progressBar.style.width = pct + '%';
+                progressText.textContent = `Uploading… ${pct}%`;
+            };
             try {
-                await new Promise((resolve, reject) => {
-                    const xhr = new XMLHttpRequest();
-                    xhr.open('POST', '/admin/api/site-content/upload-video');
-                    xhr.setRequestHeader('X-CSRF-Token', adminCsrfToken);
-                    xhr.withCredentials = true;
-                    xhr.upload.onprogress = (e) => {
-                        if (e.lengthComputable) {
-                            const pct = Math.round((e.loaded / e.total) * 100);
-                            progressBar.style.width = pct + '%';
-                            progressText.textContent = `Uploading… ${pct}%`;
-                        }
-                    };
-                    xhr.onload = () => {
-                        const result = JSON.parse(xhr.responseText);
-                        if (result.success) {
-                            progressBar.style.width = '100%';
-                            progressText.textContent = 'Upload complete!';
-                            document.getElementById('home_video_url').value = result.url;
-                            // Auto-enable the video section checkbox
-                            const enabledCheck = document.getElementById('home_video_section_enabled');
-                            if (enabledCheck) enabledCheck.checked = true;
-                            msgEl.textContent = 'Video uploaded! Now click "Save Draft" below.';
-                            msgEl.className = 'text-sm text-green-400 font-medium';
-                            fileInput.value = '';
-                            loadDraftStatus();
-                            resolve();
-                        } else {
-                            reject(new Error(result.message || 'Upload failed'));
-                        }
-                    };
-                    xhr.onerror = () => reject(new Error('Network error'));
-                    xhr.send(formData);
+                let session = null;
+                const savedId = localStorage.getItem(resumeKey);
+                if (savedId) {
+                    const res = await fetch(`/admin/api/uploads/${savedId}`, { credentials: 'include' });
+                    const data = res.ok ? await res.json() : null;
+                    if (data && data.success && data.status === 'uploading') session = data;
+                }
+                if (!session) {
+                    // Only direct-to-bucket uploads are hashed up front: the bucket checks the body against it.
+                    // Chunked uploads are hashed per chunk and the server hashes the assembled file.
+                    // Whole-file hashing needs the file in memory, so only smaller videos are content-addressed.
+                    const sha256 = DIRECT_VIDEO_UPLOADS && file.size <= 256 * 1024 * 1024 ? await sha256Hex(file) : '';
+                    const res = await fetch('/admin/api/uploads/video', {
+                        method: 'POST',
+                        credentials: 'include',
+                        headers: { 'Content-Type': 'application/json', 'X-CSRF-Token': adminCsrfToken },
+                        body: JSON.stringify({ filename: file.name, size: file.size, sha256, direct: DIRECT_VIDEO_UPLOADS }),
+                    });
+                    session = await res.json();
+                    if (!session.success) throw new Error(session.message || 'Upload failed');
+                    if (session.direct === undefined) localStorage.setItem(resumeKey, session.upload_id);
+                }
+                if (session.direct) {
+                    // Object storage: the bytes go straight to the bucket, never through the web server.
+                    await new Promise((resolve, reject) => {
+                        const xhr = new XMLHttpRequest();
+                        xhr.open(session.direct.method, session.direct.url);
+                        Object.entries(session.direct.headers).forEach(([name, value]) => xhr.setRequestHeader(name, value));
+                        xhr.upload.onprogress = (e) => { if (e.lengthComputable) showProgress(e.loaded); };
+                        xhr.onload = () => (xhr.status < 300 ? resolve() : reject(new Error('Upload to storage failed')));
+                        xhr.onerror = () => reject(new Error('Network error'));
+                        xhr.send(file);
+                    });
+                }
+                let offset = session.direct === undefined ? session.offset : file.size;
+                let failures = 0;
+                while (offset < file.size) {
+                    showProgress(offset);
+                    const chunk = file.slice(offset, offset + session.chunk_size);
+                    const headers = { 'Content-Type': 'application/octet-stream', 'X-CSRF-Token': adminCsrfToken };
+                    const checksum = await sha256Hex(chunk);
+                    if (checksum) headers['X-Chunk-SHA256'] = checksum;
+                    let result = null;
+                    try {
+                        const res = await fetch(`/admin/api/uploads/${session.upload_id}?offset=${offset}`, {
+                            method: 'PUT', credentials: 'include', headers, body: chunk,
+                        });
+                        result = await res.json();
+                    } catch (err) {
+                        result = null;
+                    }
+                    if (result && result.success) {
+                        offset = result.offset;
+                        failures = 0;
+                        continue;
+                    }
+                    if (++failures > 5) throw new Error((result && result.message) || 'Network error');
+                    if (result && typeof result.offset === 'number') offset = result.offset;
+                    await new Promise(r => setTimeout(r, 1000 * failures));
+                }
+                progressText.textContent = 'Finishing…';
+                const res = await fetch(`/admin/api/uploads/${session.upload_id}/finalize`, {
+                    method: 'POST', credentials: 'include', headers: { 'X-CSRF-Token': adminCsrfToken },
                 });
+                const result = await res.json();
+                if (!result.success) throw new Error(result.message || 'Upload failed');
+                localStorage.removeItem(resumeKey);
+                progressBar.style.width = '100%';
+                progressText.textContent = 'Upload complete!';
+                document.getElementById('home_video_url').value = result.url;
+                // Auto-enable the video section checkbox
+                const enabledCheck = document.getElementById('home_video_section_enabled');
+                if (enabledCheck) enabledCheck.checked = true;
+                msgEl.textContent = 'Video uploaded! Now click "Save Draft" below.';
+                msgEl.className = 'text-sm text-green-400 font-medium';
+                fileInput.value = '';
+                loadDraftStatus();
             } catch (e) {
                 msgEl.textContent = e.message || 'Upload error.';
                 msgEl.className = 'text-sm text-red-400';
@@ -7913,7 +11662,7 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             } catch(e) {}
         }
 
-        async function loadMaintenanceRecords(prefix) {
+        async function loadMaintenanceRecords(prefix, cursor) {
             prefix = prefix || 'ceo';
             const listEl = document.getElementById(prefix + 'MaintList');
             const summaryEl = document.getElementById(prefix + 'MaintSummary');
@@ -7922,22 +11671,26 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             const cat = document.getElementById(prefix + 'MaintCategory')?.value || '';
             const params = new URLSearchParams();
             if (propId) params.set('property_id', propId);
+            if (cat) params.set('category', cat);
             const qs = params.toString() ? '?' + params.toString() : '';
             try {
-                listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">Loading...</p>';
-                const records = await fetchData('/admin/api/maintenance' + qs);
-                const filtered = cat ? records.filter(r => r.category === cat) : records;
-                _ceoMaintCache = filtered;
-                const totalCost = filtered.reduce((s, r) => s + (r.cost || 0), 0);
-                if (summaryEl) summaryEl.textContent = filtered.length + ' record' + (filtered.length !== 1 ? 's' : '') + (totalCost ? ' · Total cost: ' + formatNGN(totalCost) : '');
-                if (!filtered.length) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-8">No maintenance records found.</p>'; return; }
+                if (!cursor) listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">Loading...</p>';
+                const data = await fetchData(listPageUrl('/admin/api/maintenance' + qs, cursor));
+                const records = data.items;
+                _ceoMaintCache = cursor ? _ceoMaintCache.concat(records) : records;
+                const count = data.totals.count, totalCost = data.totals.cost;
+                if (summaryEl) summaryEl.textContent = count + ' record' + (count !== 1 ? 's' : '') + (totalCost ? ' · Total cost: ' + formatNGN(totalCost) : '');
+                if (!count) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-8">No maintenance records found.</p>'; return; }
                 const statusColors = { completed: 'bg-emerald-900/60 text-emerald-300', in_progress: 'bg-amber-900/60 text-amber-300', scheduled: 'bg-blue-900/60 text-blue-300' };
                 const statusLabels = { completed: 'Completed', in_progress: 'In Progress', scheduled: 'Scheduled' };
-                listEl.innerHTML = filtered.map(r => {
+                const cards = records.map(r => {
                     const sc = statusColors[r.status] || 'bg-gray-700 text-gray-300';
                     const sl = statusLabels[r.status] || r.status;
                     return `<div class="rounded-xl border border-gray-700/70 bg-gray-700/30 p-4"><div class="flex items-start justify-between gap-3"><div class="min-w-0"><div class="flex items-center gap-2 flex-wrap"><p class="font-semibold text-white text-sm">${r.title}</p><span class="px-2 py-0.5 rounded-full text-[11px] ${sc}">${sl}</span><span class="px-2 py-0.5 rounded-full text-[11px] bg-gray-700 text-gray-400">${r.category}</span></div><p class="text-xs text-gray-400 mt-1">${r.property_title || ''} · ${r.maintenance_date || ''}${r.vendor_name ? ' · ' + r.vendor_name : ''}</p>${r.description ? `<p class="text-xs text-gray-500 mt-1">${r.description}</p>` : ''}</div><div class="text-right flex-shrink-0">${r.cost ? '<p class="text-sm font-bold text-amber-300">' + formatNGN(r.cost) + '</p>' : ''}<p class="text-xs text-gray-500 mt-1">${r.recorded_by || ''}</p></div></div><div class="flex items-center gap-3 mt-3 text-xs"><button onclick="ceoEditMaint(${r.id},'${prefix}')" class="text-blue-400 hover:text-blue-300">Edit</button><button onclick="ceoDeleteMaint(${r.id},'${prefix}')" class="text-red-400 hover:text-red-300">Remove</button></div></div>`;
                 }).join('');
+                if (cursor) listEl.insertAdjacentHTML('beforeend', cards);
+                else listEl.innerHTML = cards;
+                setLoadMore(listEl, data.next_cursor, next => loadMaintenanceRecords(prefix, next));
             } catch(e) { listEl.innerHTML = '<p class="text-red-400 text-sm text-center py-6">Error loading records.</p>'; }
         }
 
@@ -8018,7 +11771,37 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
 
         window.expenseCache = window.expenseCache || { ceo: [], mgr: [], acc: [] };
         window.expPage = window.expPage || { ceo: 1, mgr: 1, acc: 1 };
+        window.expenseCursor = window.expenseCursor || { ceo: null, mgr: null, acc: null };
+        window.expenseCount = window.expenseCount || { ceo: 0, mgr: 0, acc: 0 };
+        window.expenseQuery = window.expenseQuery || { ceo: '', mgr: '', acc: '' };
         const _CEO_PAGE_SIZE = 20;
+        // Expenses arrive five screen pages per request; Next fetches the following batch once the loaded rows run out.
+        const _EXPENSE_FETCH_SIZE = _CEO_PAGE_SIZE * 5;
+
+        function expenseFetchLimit(prefix, preservePage) {
+            // A refresh that keeps the current page reloads everything already shown, up to the server's 200-row cap.
+            const loaded = preservePage ? (window.expenseCache[prefix] || []).length : 0;
+            return Math.min(200, Math.max(_EXPENSE_FETCH_SIZE, Math.ceil(loaded / _CEO_PAGE_SIZE) * _CEO_PAGE_SIZE));
+        }
+
+        function storeExpensePage(prefix, url, data, append) {
+            window.expenseQuery[prefix] = url;
+            window.expenseCache[prefix] = append ? (window.expenseCache[prefix] || []).concat(data.expenses || []) : (data.expenses || []);
+            window.expenseCursor[prefix] = data.next_cursor || null;
+            window.expenseCount[prefix] = data.count ?? window.expenseCache[prefix].length;
+        }
+
+        async function expenseNextPage(prefix) {
+            const loaded = (window.expenseCache[prefix] || []).length;
+            if (window.expPage[prefix] * _CEO_PAGE_SIZE >= loaded && window.expenseCursor[prefix]) {
+                try {
+                    const url = window.expenseQuery[prefix];
+                    storeExpensePage(prefix, url, await fetchData(listPageUrl(url, window.expenseCursor[prefix], _EXPENSE_FETCH_SIZE)), true);
+                } catch (err) { alert(err.message || 'Error loading expenses'); return; }
+            }
+            window.expPage[prefix]++;
+            renderExpensePage(prefix);
+        }
 
         function ceoExpenseCard(exp) {
             const st = exp.approval_status || 'pending';
@@ -8035,7 +11818,7 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             const listEl = document.getElementById(prefix + 'ExpenseList');
             if (!listEl) return;
             const all = (window.expenseCache[prefix]) || [];
-            const total = all.length;
+            const total = Math.max(window.expenseCount[prefix] || 0, all.length);
             const totalPages = Math.max(1, Math.ceil(total / _CEO_PAGE_SIZE));
             if (window.expPage[prefix] > totalPages) window.expPage[prefix] = totalPages;
             const start = (window.expPage[prefix] - 1) * _CEO_PAGE_SIZE;
@@ -8043,7 +11826,7 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             if (!total) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">No expenses recorded for this project yet.</p>'; return; }
             const cards = page.map(exp => ceoExpenseCard(exp)).join('');
             const prev = window.expPage[prefix] > 1 ? `<button onclick="window.expPage['${prefix}']--;renderExpensePage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">&#8592; Prev</button>` : '';
-            const next = window.expPage[prefix] < totalPages ? `<button onclick="window.expPage['${prefix}']++;renderExpensePage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Next &#8594;</button>` : '';
+            const next = window.expPage[prefix] < totalPages ? `<button onclick="expenseNextPage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Next &#8594;</button>` : '';
             const pager = totalPages > 1 ? `<div class="flex items-center justify-between mt-4 text-xs text-gray-400"><span>Showing ${start+1}&ndash;${Math.min(start+_CEO_PAGE_SIZE,total)} of ${total}</span><div class="flex items-center gap-3">${prev}<span>Page ${window.expPage[prefix]} / ${totalPages}</span>${next}</div></div>` : `<p class="text-xs text-gray-500 mt-3 text-right">${total} expense${total!==1?'s':''} total</p>`;
             listEl.innerHTML = cards + pager;
         }
@@ -8071,11 +11854,10 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             if (filters.status) params.set('approval_status', filters.status);
             if (filters.receiptsOnly) params.set('has_receipt', 'true');
             if (filters.category) params.set('category', filters.category);
-            const qs = params.toString() ? '?' + params.toString() : '';
+            const url = '/admin/api/project-expenses' + (params.toString() ? '?' + params.toString() : '');
             try {
-                const data = await fetchData('/admin/api/project-expenses' + qs);
-                window.expenseCache.ceo = data.expenses || [];
-                _ceoCachedExpenses = window.expenseCache.ceo;
+                const data = await fetchData(listPageUrl(url, null, expenseFetchLimit('ceo', preservePage)));
+                storeExpensePage('ceo', url, data);
                 const approvalTotals = data.approval_totals || {};
                 const el = (id) => document.getElementById(id);
                 if (el('capApprovedTotal')) el('capApprovedTotal').textContent = fmtCompact(approvalTotals.approved || 0);
@@ -8120,10 +11902,8 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
             } catch (err) { alert(err.message || 'Error deleting expense'); }
         }
 
-        let _ceoCachedExpenses = [];
-
         function ceoCopyEditExpense(id) {
-            const exp = _ceoCachedExpenses.find(e => e.id === id);
+            const exp = window.expenseCache.ceo.find(e => e.id === id);
             if (!exp) return;
             document.getElementById('ceoExpenseEditId').value = exp.id;
             document.getElementById('ceoExpenseDate').value = exp.expense_date || '';
@@ -8737,12 +12517,14 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
         });
 
         // ===== TENANTS =====
-        async function loadTenants(statusFilter) {
+        async function loadTenants(statusFilter, cursor) {
             try {
                 const url = statusFilter ? '/admin/api/tenants?status=' + statusFilter : '/admin/api/tenants';
-                const tenants = await fetchData(url);
+                const data = await fetchData(listPageUrl(url, cursor));
+                const tenants = data.items;
+                const container = document.getElementById('tenantsContainer');
                 const statusColors = {active:'bg-teal-800/60 text-teal-300 border border-teal-700/40', vacated:'bg-gray-700/60 text-gray-400 border border-gray-600/40'};
-                document.getElementById('tenantsContainer').innerHTML = tenants.length ? tenants.map(t => `
+                const cards = tenants.length ? tenants.map(t => `
                     <div class="bg-gray-700/40 border border-gray-600/50 rounded-xl p-4 space-y-3">
                         <div class="flex items-start justify-between gap-3">
                             <div class="min-w-0">
@@ -8786,6 +12568,9 @@ ENHANCED_ADMIN_DASHBOARD_TEMPLATE = """
                             </div>
                         </div>
                     </div>`).join('') : '<p class="text-gray-400 py-6 text-center text-sm">No tenants found</p>';
+                if (cursor) container.insertAdjacentHTML('beforeend', cards);
+                else container.innerHTML = cards;
+                setLoadMore(container, data.next_cursor, next => loadTenants(statusFilter, next));
             } catch (e) {
                 document.getElementById('tenantsContainer').innerHTML = '<p class="text-red-400 py-4 text-sm">Error loading tenants</p>';
             }
@@ -11073,6 +14858,27 @@ ROLE_DASHBOARD_TEMPLATE = """
             return response.json();
         }
 
+        // Admin lists come a page at a time: with ?limit the list endpoints answer
+        // {items, next_cursor, totals}, and the next page is fetched with ?cursor.
+        const LIST_PAGE_SIZE = 50;
+        function listPageUrl(url, cursor, limit) {
+            const params = new URLSearchParams({ limit: limit || LIST_PAGE_SIZE });
+            if (cursor) params.set('cursor', cursor);
+            return url + (url.includes('?') ? '&' : '?') + params.toString();
+        }
+        function setLoadMore(container, nextCursor, loadNext) {
+            container.querySelector('[data-load-more]')?.remove();
+            if (!nextCursor) return;
+            const inTable = container.tagName === 'TBODY';
+            const wrapper = document.createElement(inTable ? 'tr' : 'div');
+            wrapper.dataset.loadMore = '1';
+            const button = '<button type="button" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Load more</button>';
+            if (inTable) wrapper.innerHTML = `<td colspan="99" class="py-3 text-center">${button}</td>`;
+            else { wrapper.className = 'py-3 text-center'; wrapper.innerHTML = button; }
+            wrapper.querySelector('button').addEventListener('click', () => loadNext(nextCursor));
+            container.appendChild(wrapper);
+        }
+
         function formatNGN(v) { return '₦' + Number(v).toLocaleString('en-NG'); }
         function fmtCompact(v) {
             const n = Number(v || 0);
@@ -11210,13 +15016,43 @@ ROLE_DASHBOARD_TEMPLATE = """
 
         window.expenseCache = window.expenseCache || { ceo: [], mgr: [], acc: [] };
         window.expPage = window.expPage || { ceo: 1, mgr: 1, acc: 1 };
+        window.expenseCursor = window.expenseCursor || { ceo: null, mgr: null, acc: null };
+        window.expenseCount = window.expenseCount || { ceo: 0, mgr: 0, acc: 0 };
+        window.expenseQuery = window.expenseQuery || { ceo: '', mgr: '', acc: '' };
         const _PAGE_SIZE = 20;
+        // Expenses arrive five screen pages per request; Next fetches the following batch once the loaded rows run out.
+        const _EXPENSE_FETCH_SIZE = _PAGE_SIZE * 5;
+
+        function expenseFetchLimit(prefix, preservePage) {
+            // A refresh that keeps the current page reloads everything already shown, up to the server's 200-row cap.
+            const loaded = preservePage ? (window.expenseCache[prefix] || []).length : 0;
+            return Math.min(200, Math.max(_EXPENSE_FETCH_SIZE, Math.ceil(loaded / _PAGE_SIZE) * _PAGE_SIZE));
+        }
+
+        function storeExpensePage(prefix, url, data, append) {
+            window.expenseQuery[prefix] = url;
+            window.expenseCache[prefix] = append ? (window.expenseCache[prefix] || []).concat(data.expenses || []) : (data.expenses || []);
+            window.expenseCursor[prefix] = data.next_cursor || null;
+            window.expenseCount[prefix] = data.count ?? window.expenseCache[prefix].length;
+        }
+
+        async function expenseNextPage(prefix) {
+            const loaded = (window.expenseCache[prefix] || []).length;
+            if (window.expPage[prefix] * _PAGE_SIZE >= loaded && window.expenseCursor[prefix]) {
+                try {
+                    const url = window.expenseQuery[prefix];
+                    storeExpensePage(prefix, url, await fetchData(listPageUrl(url, window.expenseCursor[prefix], _EXPENSE_FETCH_SIZE)), true);
+                } catch (err) { alert(err.message || 'Error loading expenses'); return; }
+            }
+            window.expPage[prefix]++;
+            renderExpensePage(prefix);
+        }
 
         function renderExpensePage(prefix) {
             const listEl = document.getElementById(prefix + 'ExpenseList');
             if (!listEl) return;
             const all = (window.expenseCache[prefix]) || [];
-            const total = all.length;
+            const total = Math.max(window.expenseCount[prefix] || 0, all.length);
             const totalPages = Math.max(1, Math.ceil(total / _PAGE_SIZE));
             if (window.expPage[prefix] > totalPages) window.expPage[prefix] = totalPages;
             const start = (window.expPage[prefix] - 1) * _PAGE_SIZE;
@@ -11224,7 +15060,7 @@ ROLE_DASHBOARD_TEMPLATE = """
             if (!total) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">No expenses recorded for this project yet.</p>'; return; }
             const cards = page.map(exp => renderExpenseCard(prefix, exp)).join('');
             const prev = window.expPage[prefix] > 1 ? `<button onclick="window.expPage['${prefix}']--;renderExpensePage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">&#8592; Prev</button>` : '';
-            const next = window.expPage[prefix] < totalPages ? `<button onclick="window.expPage['${prefix}']++;renderExpensePage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Next &#8594;</button>` : '';
+            const next = window.expPage[prefix] < totalPages ? `<button onclick="expenseNextPage('${prefix}')" class="px-3 py-1 rounded bg-gray-700 hover:bg-gray-600 text-white text-xs">Next &#8594;</button>` : '';
             const pager = totalPages > 1 ? `<div class="flex items-center justify-between mt-4 text-xs text-gray-400"><span>Showing ${start+1}&ndash;${Math.min(start+_PAGE_SIZE,total)} of ${total}</span><div class="flex items-center gap-3">${prev}<span>Page ${window.expPage[prefix]} / ${totalPages}</span>${next}</div></div>` : `<p class="text-xs text-gray-500 mt-3 text-right">${total} expense${total!==1?'s':''} total</p>`;
             listEl.innerHTML = cards + pager;
         }
@@ -11408,8 +15244,9 @@ ROLE_DASHBOARD_TEMPLATE = """
             const selectedId = propertyId || document.getElementById(prefix + 'CapitalProperty')?.value || '';
             const filters = getExpenseFilters(prefix);
             try {
-                const data = await fetchData('/admin/api/project-expenses' + buildExpenseQuery(selectedId, filters));
-                window.expenseCache[prefix] = data.expenses || [];
+                const url = '/admin/api/project-expenses' + buildExpenseQuery(selectedId, filters);
+                const data = await fetchData(listPageUrl(url, null, expenseFetchLimit(prefix, preservePage)));
+                storeExpensePage(prefix, url, data);
                 totalEl.textContent = formatNGN(data.total_amount || 0);
                 const categoryBits = Object.entries(data.by_category || {}).map(([k, v]) => `${k}: ${formatNGN(v)}`);
                 const budgetParts = [];
@@ -11952,14 +15789,53 @@ ROLE_DASHBOARD_TEMPLATE = """
             if (window._mgrRevChart) { window._mgrRevChart.data.labels = d.labels; window._mgrRevChart.data.datasets[0].data = d.revenue; window._mgrRevChart.data.datasets[1].data = d.capital; window._mgrRevChart.update(); }
         }
 
+        function mgrInquiryRows(inquiries) {
+            const inqStatuses = ['new','contacted','viewing_scheduled','offer_made','closed','rejected'];
+            return inquiries.map(i => `
+                    <tr class="border-b border-gray-700/60 cursor-pointer hover:bg-gray-700/20" onclick="mgrToggleInqDetail(${i.id})">
+                        <td class="py-2.5 pr-3 font-medium text-sm">${i.full_name || '—'}</td>
+                        <td class="py-2.5 pr-3 text-gray-400 text-xs max-w-[120px] truncate">${i.property_title || 'General'}</td>
+                        <td class="py-2.5 pr-3 text-xs capitalize">${(i.inquiry_type || 'general').replace(/_/g,' ')}</td>
+                        <td class="py-2.5 pr-2">
+                            <select onclick="event.stopPropagation()" onchange="updateInquiry(${i.id}, this.value)" class="bg-gray-700 text-white text-xs px-2 py-1 rounded border border-gray-600">
+                                ${inqStatuses.map(s => `<option value="${s}" ${i.status === s ? 'selected' : ''}>${s.replace(/_/g,' ')}</option>`).join('')}
+                            </select>
+                        </td>
+                        <td class="py-2.5 text-xs text-gray-500 whitespace-nowrap">${new Date(i.created_at).toLocaleDateString()}</td>
+                    </tr>
+                    <tr id="mgrInqDetail_${i.id}" class="hidden bg-gray-800/60">
+                        <td colspan="5" class="px-3 pb-4 pt-2">
+                            <div class="grid grid-cols-1 sm:grid-cols-2 gap-x-6 gap-y-2 text-xs mb-3">
+                                <div><span class="text-gray-500">Phone:</span> <span class="text-gray-300">${i.phone || '—'}</span></div>
+                                <div><span class="text-gray-500">Email:</span> <a href="mailto:${i.email}" class="text-blue-400 hover:underline">${i.email || '—'}</a></div>
+                                <div><span class="text-gray-500">Budget:</span> <span class="text-gray-300">${i.budget_range || '—'}</span></div>
+                                <div><span class="text-gray-500">Move Date:</span> <span class="text-gray-300">${i.preferred_move_date || '—'}</span></div>
+                                ${i.message ? `<div class="sm:col-span-2"><span class="text-gray-500">Message:</span> <span class="text-gray-300">${i.message}</span></div>` : ''}
+                            </div>
+                            ${i.phone ? `<a href="https://wa.me/${relFmtWA(i.phone)}" target="_blank" rel="noopener" class="inline-flex items-center gap-1.5 text-xs bg-green-700 hover:bg-green-600 text-white px-3 py-1.5 rounded-lg font-medium"><svg class="w-3 h-3" viewBox="0 0 24 24" fill="currentColor"><path d="M17.472 14.382c-.297-.149-1.758-.867-2.03-.967-.273-.099-.471-.148-.67.15-.197.297-.767.966-.94 1.164-.173.199-.347.223-.644.075-.297-.15-1.255-.463-2.39-1.475-.883-.788-1.48-1.761-1.653-2.059-.173-.297-.018-.458.13-.606.134-.133.298-.347.446-.52.149-.174.198-.298.298-.497.099-.198.05-.371-.025-.52-.075-.149-.669-1.612-.916-2.207-.242-.579-.487-.5-.669-.51-.173-.008-.371-.01-.57-.01-.198 0-.52.074-.792.372-.272.297-1.04 1.016-1.04 2.479 0 1.462 1.065 2.875 1.213 3.074.149.198 2.096 3.2 5.077 4.487.709.306 1.262.489 1.694.625.712.227 1.36.195 1.871.118.571-.085 1.758-.719 2.006-1.413.248-.694.248-1.289.173-1.413-.074-.124-.272-.198-.57-.347m-5.421 7.403h-.004a9.87 9.87 0 01-5.031-1.378l-.361-.214-3.741.982.998-3.648-.235-.374a9.86 9.86 0 01-1.51-5.26c.001-5.45 4.436-9.884 9.888-9.884 2.64 0 5.122 1.03 6.988 2.898a9.825 9.825 0 012.893 6.994c-.003 5.45-4.437 9.884-9.885 9.884m8.413-18.297A11.815 11.815 0 0012.05 0C5.495 0 .16 5.335.157 11.892c0 2.096.547 4.142 1.588 5.945L.057 24l6.305-1.654a11.882 11.882 0 005.683 1.448h.005c6.554 0 11.89-5.335 11.893-11.893a11.821 11.821 0 00-3.48-8.413z"/></svg>WhatsApp</a>` : ''}
+                        </td>
+                    </tr>`).join('');
+        }
+
+        function showMgrInquiries(page, append) {
+            const table = document.getElementById('mgr_inquiriesTable');
+            const rows = mgrInquiryRows(page.items || []);
+            if (append) table.insertAdjacentHTML('beforeend', rows);
+            else table.innerHTML = rows || '<tr><td colspan="5" class="text-gray-400 py-3 text-center text-sm">No inquiries yet</td></tr>';
+            setLoadMore(table, page.next_cursor, async cursor => {
+                try { showMgrInquiries(await fetchData(listPageUrl('/admin/api/inquiries', cursor)), true); }
+                catch (e) { alert(e.message || 'Error loading inquiries'); }
+            });
+        }
+
         async function loadManagerDashboard() {
             try {
                 const [stats, inquiries, props, units, tenants] = await Promise.all([
                     fetchData('/admin/api/stats').catch(() => ({})),
-                    fetchData('/admin/api/inquiries').catch(() => []),
+                    fetchData(listPageUrl('/admin/api/inquiries')).catch(() => ({ items: [], next_cursor: null, totals: {} })),
                     fetchData('/admin/api/properties').catch(() => []),
                     fetchData('/admin/api/units').catch(() => []),
-                    fetchData('/admin/api/tenants').catch(() => [])
+                    fetchData('/admin/api/tenants?status=active').catch(() => [])
                 ]);
                 countUp('mgr_properties', stats.active_properties || 0, v => Math.round(v));
                 countUp('mgr_available_units', stats.available_units || 0, v => Math.round(v));
@@ -12003,40 +15879,14 @@ ROLE_DASHBOARD_TEMPLATE = """
                         {key:'closed',label:'Closed',cls:'bg-emerald-900/60 text-emerald-300 border-emerald-700/40'},
                         {key:'rejected',label:'Rejected',cls:'bg-red-900/60 text-red-300 border-red-700/40'},
                     ];
-                    const mgrCounts = {};
-                    (inquiries || []).forEach(i => { mgrCounts[i.status] = (mgrCounts[i.status] || 0) + 1; });
+                    const mgrCounts = (inquiries.totals || {}).by_status || {};
                     mgrPipeline.innerHTML = mgrStageCfg.map(s => {
                         const n = mgrCounts[s.key] || 0;
                         return `<div class="flex items-center gap-1.5 px-3 py-1.5 rounded-lg border ${s.cls} text-xs font-medium"><span>${s.label}</span><span class="font-bold">${n}</span></div>`;
                     }).join('');
                 }
                 // Inquiries table with expandable rows and WhatsApp
-                const inqStatuses = ['new','contacted','viewing_scheduled','offer_made','closed','rejected'];
-                const safeInquiries = Array.isArray(inquiries) ? inquiries : [];
-                document.getElementById('mgr_inquiriesTable').innerHTML = safeInquiries.map(i => `
-                    <tr class="border-b border-gray-700/60 cursor-pointer hover:bg-gray-700/20" onclick="mgrToggleInqDetail(${i.id})">
-                        <td class="py-2.5 pr-3 font-medium text-sm">${i.full_name || '—'}</td>
-                        <td class="py-2.5 pr-3 text-gray-400 text-xs max-w-[120px] truncate">${i.property_title || 'General'}</td>
-                        <td class="py-2.5 pr-3 text-xs capitalize">${(i.inquiry_type || 'general').replace(/_/g,' ')}</td>
-                        <td class="py-2.5 pr-2">
-                            <select onclick="event.stopPropagation()" onchange="updateInquiry(${i.id}, this.value)" class="bg-gray-700 text-white text-xs px-2 py-1 rounded border border-gray-600">
-                                ${inqStatuses.map(s => `<option value="${s}" ${i.status === s ? 'selected' : ''}>${s.replace(/_/g,' ')}</option>`).join('')}
-                            </select>
-                        </td>
-                        <td class="py-2.5 text-xs text-gray-500 whitespace-nowrap">${new Date(i.created_at).toLocaleDateString()}</td>
-                    </tr>
-                    <tr id="mgrInqDetail_${i.id}" class="hidden bg-gray-800/60">
-                        <td colspan="5" class="px-3 pb-4 pt-2">
-                            <div class="grid grid-cols-1 sm:grid-cols-2 gap-x-6 gap-y-2 text-xs mb-3">
-                                <div><span class="text-gray-500">Phone:</span> <span class="text-gray-300">${i.phone || '—'}</span></div>
-                                <div><span class="text-gray-500">Email:</span> <a href="mailto:${i.email}" class="text-blue-400 hover:underline">${i.email || '—'}</a></div>
-                                <div><span class="text-gray-500">Budget:</span> <span class="text-gray-300">${i.budget_range || '—'}</span></div>
-                                <div><span class="text-gray-500">Move Date:</span> <span class="text-gray-300">${i.preferred_move_date || '—'}</span></div>
-                                ${i.message ? `<div class="sm:col-span-2"><span class="text-gray-500">Message:</span> <span class="text-gray-300">${i.message}</span></div>` : ''}
-                            </div>
-                            ${i.phone ? `<a href="https://wa.me/${relFmtWA(i.phone)}" target="_blank" rel="noopener" class="inline-flex items-center gap-1.5 text-xs bg-green-700 hover:bg-green-600 text-white px-3 py-1.5 rounded-lg font-medium"><svg class="w-3 h-3" viewBox="0 0 24 24" fill="currentColor"><path d="M17.472 14.382c-.297-.149-1.758-.867-2.03-.967-.273-.099-.471-.148-.67.15-.197.297-.767.966-.94 1.164-.173.199-.347.223-.644.075-.297-.15-1.255-.463-2.39-1.475-.883-.788-1.48-1.761-1.653-2.059-.173-.297-.018-.458.13-.606.134-.133.298-.347.446-.52.149-.174.198-.298.298-.497.099-.198.05-.371-.025-.52-.075-.149-.669-1.612-.916-2.207-.242-.579-.487-.5-.669-.51-.173-.008-.371-.01-.57-.01-.198 0-.52.074-.792.372-.272.297-1.04 1.016-1.04 2.479 0 1.462 1.065 2.875 1.213 3.074.149.198 2.096 3.2 5.077 4.487.709.306 1.262.489 1.694.625.712.227 1.36.195 1.871.118.571-.085 1.758-.719 2.006-1.413.248-.694.248-1.289.173-1.413-.074-.124-.272-.198-.57-.347m-5.421 7.403h-.004a9.87 9.87 0 01-5.031-1.378l-.361-.214-3.741.982.998-3.648-.235-.374a9.86 9.86 0 01-1.51-5.26c.001-5.45 4.436-9.884 9.888-9.884 2.64 0 5.122 1.03 6.988 2.898a9.825 9.825 0 012.893 6.994c-.003 5.45-4.437 9.884-9.885 9.884m8.413-18.297A11.815 11.815 0 0012.05 0C5.495 0 .16 5.335.157 11.892c0 2.096.547 4.142 1.588 5.945L.057 24l6.305-1.654a11.882 11.882 0 005.683 1.448h.005c6.554 0 11.89-5.335 11.893-11.893a11.821 11.821 0 00-3.48-8.413z"/></svg>WhatsApp</a>` : ''}
-                        </td>
-                    </tr>`).join('') || '<tr><td colspan="5" class="text-gray-400 py-3 text-center text-sm">No inquiries yet</td></tr>';
+                showMgrInquiries(inquiries);
                 document.getElementById('mgr_propertiesTable').innerHTML = props.map(p => `<tr class="border-b border-gray-700"><td class="py-2 pr-3 font-medium">${p.title}</td><td class="py-2 pr-3 text-xs text-gray-400">${p.property_type}</td><td class="py-2 pr-3 text-xs text-gray-400">${p.location}</td><td class="py-2"><span class="text-xs px-2 py-0.5 rounded bg-gray-700">${p.construction_status || p.status}</span></td></tr>`).join('');
                 // Units table with status action column
                 const phase1Units = Array.isArray(units) ? units : [];
@@ -12144,8 +15994,9 @@ ROLE_DASHBOARD_TEMPLATE = """
         async function accFilterExpenses() {
             try {
                 const filters = getExpenseFilters('acc');
-                const expensesData = await fetchData('/admin/api/project-expenses' + buildExpenseQuery(filters.propertyId, filters));
-                window.expenseCache.acc = expensesData.expenses || [];
+                const expensesUrl = '/admin/api/project-expenses' + buildExpenseQuery(filters.propertyId, filters);
+                const expensesData = await fetchData(listPageUrl(expensesUrl, null, _EXPENSE_FETCH_SIZE));
+                storeExpensePage('acc', expensesUrl, expensesData);
                 window.expPage.acc = 1;
                 renderExpensePage('acc');
                 const approvalTotals = expensesData.approval_totals || {};
@@ -12194,7 +16045,8 @@ ROLE_DASHBOARD_TEMPLATE = """
         async function loadAccountantDashboard() {
             try {
                 const expenseFilters = getExpenseFilters('acc');
-                const [stats, payments, tenants, props, expensesData] = await Promise.all([fetchData('/admin/api/stats'), fetchData('/admin/api/payments'), fetchData('/admin/api/tenants?status=active'), fetchData('/admin/api/properties'), fetchData('/admin/api/project-expenses' + buildExpenseQuery(expenseFilters.propertyId, expenseFilters))]);
+                const expensesUrl = '/admin/api/project-expenses' + buildExpenseQuery(expenseFilters.propertyId, expenseFilters);
+                const [stats, payments, tenants, props, expensesData] = await Promise.all([fetchData('/admin/api/stats'), fetchData('/admin/api/payments'), fetchData('/admin/api/tenants?status=active'), fetchData('/admin/api/properties'), fetchData(listPageUrl(expensesUrl, null, _EXPENSE_FETCH_SIZE))]);
                 countUp('acc_total_revenue', stats.total_revenue || 0, fmtCompact);
                 countUp('acc_monthly_revenue', stats.monthly_revenue || 0, fmtCompact);
                 countUp('acc_tenants', stats.active_tenants || 0, v => Math.round(v));
@@ -12323,7 +16175,7 @@ ROLE_DASHBOARD_TEMPLATE = """
                 const approvalTotals = expensesData.approval_totals || {};
                 const approvalSummary = [`Approved: ${formatNGN(approvalTotals.approved || 0)}`, `Pending: ${formatNGN(approvalTotals.pending || 0)}`, `Rejected: ${formatNGN(approvalTotals.rejected || 0)}`].join('<br>');
                 document.getElementById('accExpenseBreakdown').innerHTML = `${approvalSummary}${expenseCategorySummary ? '<br>' + expenseCategorySummary : ''}`;
-                window.expenseCache.acc = expensesData.expenses || [];
+                storeExpensePage('acc', expensesUrl, expensesData);
                 window.expPage.acc = 1;
                 renderExpensePage('acc');
                 // Rent Roll
@@ -12367,9 +16219,60 @@ ROLE_DASHBOARD_TEMPLATE = """
             return d;
         }
 
+        function relInquiryRows(inquiries) {
+            const statuses = ['new','contacted','viewing_scheduled','offer_made','closed','rejected'];
+            const statusColors = {new:'bg-blue-900/50 text-blue-300',contacted:'bg-teal-900/50 text-teal-300',viewing_scheduled:'bg-purple-900/50 text-purple-300',offer_made:'bg-amber-900/50 text-amber-300',closed:'bg-emerald-900/50 text-emerald-300',rejected:'bg-red-900/50 text-red-300'};
+            return inquiries.map(i => `
+                    <tr class="border-b border-gray-700/60 cursor-pointer hover:bg-gray-700/20" onclick="relToggleDetail(${i.id})">
+                        <td class="py-2.5 pr-3 font-medium text-sm">${i.full_name || '—'}</td>
+                        <td class="py-2.5 pr-3 text-gray-400 text-xs max-w-[120px] truncate">${i.property_title || 'General'}</td>
+                        <td class="py-2.5 pr-3 text-xs capitalize">${(i.inquiry_type || 'general').replace(/_/g,' ')}</td>
+                        <td class="py-2.5 pr-2">
+                            <select onclick="event.stopPropagation()" onchange="relUpdateInquiryStatus(${i.id}, this.value)" class="text-xs bg-gray-700 border border-gray-600 rounded px-2 py-1 text-white">
+                                ${statuses.map(s => `<option value="${s}"${s === i.status ? ' selected' : ''}>${s.replace(/_/g,' ')}</option>`).join('')}
+                            </select>
+                        </td>
+                        <td class="py-2.5 text-xs text-gray-500">${new Date(i.created_at).toLocaleDateString()}</td>
+                    </tr>
+                    <tr id="relDetail_${i.id}" class="hidden bg-gray-800/60">
+                        <td colspan="5" class="px-3 pb-4 pt-2">
+                            <div class="grid grid-cols-1 sm:grid-cols-2 gap-x-6 gap-y-2 text-xs mb-3">
+                                <div><span class="text-gray-500">Phone:</span> <span class="text-gray-300">${i.phone || '—'}</span></div>
+                                <div><span class="text-gray-500">Email:</span> ${i.email && i.email !== 'manual@entry.local' ? `<a href="mailto:${i.email}" class="text-blue-400 hover:underline">${i.email}</a>` : '<span class="text-gray-500">—</span>'}</div>
+                                <div><span class="text-gray-500">Budget:</span> <span class="text-gray-300">${i.budget_range || '—'}</span></div>
+                                <div><span class="text-gray-500">Move Date:</span> <span class="text-gray-300">${i.preferred_move_date || '—'}</span></div>
+                                ${i.message && i.message !== 'Manually added by staff' ? `<div class="sm:col-span-2"><span class="text-gray-500">Message:</span> <span class="text-gray-300">${i.message}</span></div>` : ''}
+                            </div>
+                            <div class="flex items-end gap-3">
+                                <div class="flex-1"><label class="block text-[11px] text-gray-500 mb-1">Internal Notes</label><textarea id="relNote_${i.id}" rows="2" class="w-full px-2 py-1.5 bg-gray-700 border border-gray-600 rounded-lg text-xs text-white resize-none" placeholder="Add notes about this lead...">${i.inquiry_notes || ''}</textarea></div>
+                                <div class="flex flex-col gap-1.5 flex-shrink-0">
+                                    <button type="button" onclick="relSaveNotes(${i.id})" class="text-xs bg-emerald-700 hover:bg-emerald-600 text-white px-3 py-1.5 rounded-lg font-medium">Save Note</button>
+                                    <button type="button" onclick="event.stopPropagation();relEditLead(_relLeadsCache.find(x=>x.id===${i.id}))" class="text-xs bg-blue-700 hover:bg-blue-600 text-white px-3 py-1.5 rounded-lg font-medium">Edit</button>
+                                    <button type="button" onclick="event.stopPropagation();relDeleteLead(${i.id})" class="text-xs bg-red-800 hover:bg-red-700 text-white px-3 py-1.5 rounded-lg font-medium">Delete</button>
+                                    ${i.phone ? `<a href="https://wa.me/${relFmtWA(i.phone)}" target="_blank" rel="noopener" onclick="event.stopPropagation()" class="text-xs bg-green-700 hover:bg-green-600 text-white px-3 py-1.5 rounded-lg font-medium text-center flex items-center gap-1 justify-center"><svg class="w-3 h-3" viewBox="0 0 24 24" fill="currentColor"><path d="M17.472 14.382c-.297-.149-1.758-.867-2.03-.967-.273-.099-.471-.148-.67.15-.197.297-.767.966-.94 1.164-.173.199-.347.223-.644.075-.297-.15-1.255-.463-2.39-1.475-.883-.788-1.48-1.761-1.653-2.059-.173-.297-.018-.458.13-.606.134-.133.298-.347.446-.52.149-.174.198-.298.298-.497.099-.198.05-.371-.025-.52-.075-.149-.669-1.612-.916-2.207-.242-.579-.487-.5-.669-.51-.173-.008-.371-.01-.57-.01-.198 0-.52.074-.792.372-.272.297-1.04 1.016-1.04 2.479 0 1.462 1.065 2.875 1.213 3.074.149.198 2.096 3.2 5.077 4.487.709.306 1.262.489 1.694.625.712.227 1.36.195 1.871.118.571-.085 1.758-.719 2.006-1.413.248-.694.248-1.289.173-1.413-.074-.124-.272-.198-.57-.347m-5.421 7.403h-.004a9.87 9.87 0 01-5.031-1.378l-.361-.214-3.741.982.998-3.648-.235-.374a9.86 9.86 0 01-1.51-5.26c.001-5.45 4.436-9.884 9.888-9.884 2.64 0 5.122 1.03 6.988 2.898a9.825 9.825 0 012.893 6.994c-.003 5.45-4.437 9.884-9.885 9.884m8.413-18.297A11.815 11.815 0 0012.05 0C5.495 0 .16 5.335.157 11.892c0 2.096.547 4.142 1.588 5.945L.057 24l6.305-1.654a11.882 11.882 0 005.683 1.448h.005c6.554 0 11.89-5.335 11.893-11.893a11.821 11.821 0 00-3.48-8.413z"/></svg>WhatsApp</a>` : ''}
+                                </div>
+                            </div>
+                        </td>
+                    </tr>`).join('');
+        }
+
+        function showRelInquiries(page, append) {
+            const table = document.getElementById('rel_inquiriesTable');
+            _relLeadsCache = append ? _relLeadsCache.concat(page.items) : page.items;
+            const rows = relInquiryRows(page.items);
+            if (append) table.insertAdjacentHTML('beforeend', rows);
+            else table.innerHTML = rows || '<tr><td colspan="5" class="py-10 text-center"><p class="text-gray-300 text-sm font-medium mb-1">No leads yet</p><p class="text-gray-500 text-xs">Click "+ Add Lead" above to log your first lead manually, or wait for website inquiries.</p></td></tr>';
+            setLoadMore(table, page.next_cursor, async cursor => {
+                try { showRelInquiries(await fetchData(listPageUrl('/admin/api/inquiries', cursor)), true); }
+                catch (e) { alert(e.message || 'Error loading leads'); }
+            });
+        }
+
         async function loadRealtorDashboard() {
             try {
-                const [stats, props, inquiries, units] = await Promise.all([fetchData('/admin/api/stats'), fetchData('/admin/api/properties'), fetchData('/admin/api/inquiries'), fetchData('/admin/api/units')]);
+                const [stats, props, inquiries, units] = await Promise.all([fetchData('/admin/api/stats'), fetchData('/admin/api/properties'), fetchData(listPageUrl('/admin/api/inquiries')), fetchData('/admin/api/units')]);
+                // Commission is owed on every closed deal, so those come unpaged.
+                const closedInquiries = await fetchData('/admin/api/inquiries?status=closed');
                 countUp('rel_properties', stats.active_properties || 0, v => Math.round(v));
                 countUp('rel_available_units', stats.available_units || 0, v => Math.round(v));
                 countUp('rel_inquiries', stats.new_inquiries || 0, v => Math.round(v));
@@ -12383,8 +16286,7 @@ ROLE_DASHBOARD_TEMPLATE = """
                     {key:'closed', label:'Closed', bar:'bg-emerald-500', txt:'text-emerald-300', col:'rgba(52,211,153,0.85)'},
                     {key:'rejected', label:'Rejected', bar:'bg-red-500', txt:'text-red-400', col:'rgba(248,113,113,0.85)'},
                 ];
-                const counts = {};
-                (inquiries || []).forEach(i => { counts[i.status] = (counts[i.status] || 0) + 1; });
+                const counts = inquiries.totals.by_status || {};
                 const relTotal = Object.values(counts).reduce((s, n) => s + n, 0);
                 const convEl = document.getElementById('rel_conversionRate');
                 if (convEl) convEl.textContent = relTotal > 0 ? Math.round((counts['closed']||0) / relTotal * 100) + '% conversion' : '';
@@ -12421,7 +16323,6 @@ ROLE_DASHBOARD_TEMPLATE = """
                 // Commission tracker
                 const priceMap = {};
                 (props || []).forEach(p => { if (p.title) priceMap[p.title] = parseFloat(p.price) || 0; });
-                const closedInquiries = (inquiries || []).filter(i => i.status === 'closed');
                 const saleComm = closedInquiries.reduce((sum, i) => sum + (priceMap[i.property_title] || 0) * 0.10, 0);
                 const rentedUnits = (units || []).filter(u => u.status === 'occupied' && u.monthly_rent);
                 const rentalComm = rentedUnits.reduce((sum, u) => sum + (parseFloat(u.monthly_rent) || 0) * 0.10, 0);
@@ -12440,48 +16341,14 @@ ROLE_DASHBOARD_TEMPLATE = """
                     ];
                     relCD.innerHTML = rows.length ? rows.join('') : '<p class="text-xs text-gray-500 py-2">No closed deals or occupied units yet — commission will appear here once leases and sales are recorded.</p>';
                 }
-                _relLeadsCache = inquiries || [];
                 // Populate property dropdown in Add Lead form
                 const relPropSel = document.getElementById('relLeadProperty');
                 if (relPropSel) relPropSel.innerHTML = '<option value="">General Inquiry</option>' + props.map(p => `<option value="${p.id}">${p.title}</option>`).join('');
                 const relCountEl = document.getElementById('rel_leadsCount');
-                if (relCountEl) relCountEl.textContent = inquiries.length + ' lead' + (inquiries.length !== 1 ? 's' : '');
+                if (relCountEl) relCountEl.textContent = inquiries.totals.count + ' lead' + (inquiries.totals.count !== 1 ? 's' : '');
                 renderUnitsTable('rel_unitsTable', units.filter(unit => unit.status === 'available' || unit.status === 'reserved'), true);
                 document.getElementById('rel_propertiesTable').innerHTML = props.map(p => `<tr class="border-b border-gray-700"><td class="py-2 pr-3 font-medium">${p.title}</td><td class="py-2 pr-3 text-xs text-gray-400">${p.property_type === 'hostel' ? 'Apartment' : p.property_type}</td><td class="py-2 pr-3 text-xs text-gray-400">${p.location}</td><td class="py-2 pr-3 text-xs">${p.price ? formatNGN(p.price) : (p.price_type || 'Contact')}</td><td class="py-2"><span class="text-xs px-2 py-0.5 rounded bg-gray-700">${p.construction_status || p.status}</span></td></tr>`).join('');
-                const statuses = ['new','contacted','viewing_scheduled','offer_made','closed','rejected'];
-                const statusColors = {new:'bg-blue-900/50 text-blue-300',contacted:'bg-teal-900/50 text-teal-300',viewing_scheduled:'bg-purple-900/50 text-purple-300',offer_made:'bg-amber-900/50 text-amber-300',closed:'bg-emerald-900/50 text-emerald-300',rejected:'bg-red-900/50 text-red-300'};
-                document.getElementById('rel_inquiriesTable').innerHTML = inquiries.length ? inquiries.slice(0, 60).map(i => `
-                    <tr class="border-b border-gray-700/60 cursor-pointer hover:bg-gray-700/20" onclick="relToggleDetail(${i.id})">
-                        <td class="py-2.5 pr-3 font-medium text-sm">${i.full_name || '—'}</td>
-                        <td class="py-2.5 pr-3 text-gray-400 text-xs max-w-[120px] truncate">${i.property_title || 'General'}</td>
-                        <td class="py-2.5 pr-3 text-xs capitalize">${(i.inquiry_type || 'general').replace(/_/g,' ')}</td>
-                        <td class="py-2.5 pr-2">
-                            <select onclick="event.stopPropagation()" onchange="relUpdateInquiryStatus(${i.id}, this.value)" class="text-xs bg-gray-700 border border-gray-600 rounded px-2 py-1 text-white">
-                                ${statuses.map(s => `<option value="${s}"${s === i.status ? ' selected' : ''}>${s.replace(/_/g,' ')}</option>`).join('')}
-                            </select>
-                        </td>
-                        <td class="py-2.5 text-xs text-gray-500">${new Date(i.created_at).toLocaleDateString()}</td>
-                    </tr>
-                    <tr id="relDetail_${i.id}" class="hidden bg-gray-800/60">
-                        <td colspan="5" class="px-3 pb-4 pt-2">
-                            <div class="grid grid-cols-1 sm:grid-cols-2 gap-x-6 gap-y-2 text-xs mb-3">
-                                <div><span class="text-gray-500">Phone:</span> <span class="text-gray-300">${i.phone || '—'}</span></div>
-                                <div><span class="text-gray-500">Email:</span> ${i.email && i.email !== 'manual@entry.local' ? `<a href="mailto:${i.email}" class="text-blue-400 hover:underline">${i.email}</a>` : '<span class="text-gray-500">—</span>'}</div>
-                                <div><span class="text-gray-500">Budget:</span> <span class="text-gray-300">${i.budget_range || '—'}</span></div>
-                                <div><span class="text-gray-500">Move Date:</span> <span class="text-gray-300">${i.preferred_move_date || '—'}</span></div>
-                                ${i.message && i.message !== 'Manually added by staff' ? `<div class="sm:col-span-2"><span class="text-gray-500">Message:</span> <span class="text-gray-300">${i.message}</span></div>` : ''}
-                            </div>
-                            <div class="flex items-end gap-3">
-                                <div class="flex-1"><label class="block text-[11px] text-gray-500 mb-1">Internal Notes</label><textarea id="relNote_${i.id}" rows="2" class="w-full px-2 py-1.5 bg-gray-700 border border-gray-600 rounded-lg text-xs text-white resize-none" placeholder="Add notes about this lead...">${i.inquiry_notes || ''}</textarea></div>
-                                <div class="flex flex-col gap-1.5 flex-shrink-0">
-                                    <button type="button" onclick="relSaveNotes(${i.id})" class="text-xs bg-emerald-700 hover:bg-emerald-600 text-white px-3 py-1.5 rounded-lg font-medium">Save Note</button>
-                                    <button type="button" onclick="event.stopPropagation();relEditLead(_relLeadsCache.find(x=>x.id===${i.id}))" class="text-xs bg-blue-700 hover:bg-blue-600 text-white px-3 py-1.5 rounded-lg font-medium">Edit</button>
-                                    <button type="button" onclick="event.stopPropagation();relDeleteLead(${i.id})" class="text-xs bg-red-800 hover:bg-red-700 text-white px-3 py-1.5 rounded-lg font-medium">Delete</button>
-                                    ${i.phone ? `<a href="https://wa.me/${relFmtWA(i.phone)}" target="_blank" rel="noopener" onclick="event.stopPropagation()" class="text-xs bg-green-700 hover:bg-green-600 text-white px-3 py-1.5 rounded-lg font-medium text-center flex items-center gap-1 justify-center"><svg class="w-3 h-3" viewBox="0 0 24 24" fill="currentColor"><path d="M17.472 14.382c-.297-.149-1.758-.867-2.03-.967-.273-.099-.471-.148-.67.15-.197.297-.767.966-.94 1.164-.173.199-.347.223-.644.075-.297-.15-1.255-.463-2.39-1.475-.883-.788-1.48-1.761-1.653-2.059-.173-.297-.018-.458.13-.606.134-.133.298-.347.446-.52.149-.174.198-.298.298-.497.099-.198.05-.371-.025-.52-.075-.149-.669-1.612-.916-2.207-.242-.579-.487-.5-.669-.51-.173-.008-.371-.01-.57-.01-.198 0-.52.074-.792.372-.272.297-1.04 1.016-1.04 2.479 0 1.462 1.065 2.875 1.213 3.074.149.198 2.096 3.2 5.077 4.487.709.306 1.262.489 1.694.625.712.227 1.36.195 1.871.118.571-.085 1.758-.719 2.006-1.413.248-.694.248-1.289.173-1.413-.074-.124-.272-.198-.57-.347m-5.421 7.403h-.004a9.87 9.87 0 01-5.031-1.378l-.361-.214-3.741.982.998-3.648-.235-.374a9.86 9.86 0 01-1.51-5.26c.001-5.45 4.436-9.884 9.888-9.884 2.64 0 5.122 1.03 6.988 2.898a9.825 9.825 0 012.893 6.994c-.003 5.45-4.437 9.884-9.885 9.884m8.413-18.297A11.815 11.815 0 0012.05 0C5.495 0 .16 5.335.157 11.892c0 2.096.547 4.142 1.588 5.945L.057 24l6.305-1.654a11.882 11.882 0 005.683 1.448h.005c6.554 0 11.89-5.335 11.893-11.893a11.821 11.821 0 00-3.48-8.413z"/></svg>WhatsApp</a>` : ''}
-                                </div>
-                            </div>
-                        </td>
-                    </tr>`).join('') : '<tr><td colspan="5" class="py-10 text-center"><p class="text-gray-300 text-sm font-medium mb-1">No leads yet</p><p class="text-gray-500 text-xs">Click "+ Add Lead" above to log your first lead manually, or wait for website inquiries.</p></td></tr>';
+                showRelInquiries(inquiries);
             } catch (e) {
                 console.error('Realtor dashboard error:', e);
                 const tbl = document.getElementById('rel_inquiriesTable');
@@ -12950,7 +16817,7 @@ ROLE_DASHBOARD_TEMPLATE = """
             } catch(e) {}
         }
 
-        async function loadMaintenanceRecords(prefix) {
+        async function loadMaintenanceRecords(prefix, cursor) {
             prefix = prefix || 'mgr';
             const listEl = document.getElementById(prefix + 'MaintList');
             const summaryEl = document.getElementById(prefix + 'MaintSummary');
@@ -12959,22 +16826,26 @@ ROLE_DASHBOARD_TEMPLATE = """
             const cat = document.getElementById(prefix + 'MaintCategory')?.value || '';
             const params = new URLSearchParams();
             if (propId) params.set('property_id', propId);
+            if (cat) params.set('category', cat);
             const qs = params.toString() ? '?' + params.toString() : '';
             try {
-                listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">Loading...</p>';
-                const records = await fetchData('/admin/api/maintenance' + qs);
-                const filtered = cat ? records.filter(r => r.category === cat) : records;
-                _mgrMaintCache = filtered;
-                const totalCost = filtered.reduce((s, r) => s + (r.cost || 0), 0);
-                if (summaryEl) summaryEl.textContent = filtered.length + ' record' + (filtered.length !== 1 ? 's' : '') + (totalCost ? ' · Total cost: ' + formatNGN(totalCost) : '');
-                if (!filtered.length) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-8">No maintenance records found.</p>'; return; }
+                if (!cursor) listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-6">Loading...</p>';
+                const data = await fetchData(listPageUrl('/admin/api/maintenance' + qs, cursor));
+                const records = data.items;
+                _mgrMaintCache = cursor ? _mgrMaintCache.concat(records) : records;
+                const count = data.totals.count, totalCost = data.totals.cost;
+                if (summaryEl) summaryEl.textContent = count + ' record' + (count !== 1 ? 's' : '') + (totalCost ? ' · Total cost: ' + formatNGN(totalCost) : '');
+                if (!count) { listEl.innerHTML = '<p class="text-gray-500 text-sm text-center py-8">No maintenance records found.</p>'; return; }
                 const statusColors = { completed: 'bg-emerald-900/60 text-emerald-300', in_progress: 'bg-amber-900/60 text-amber-300', scheduled: 'bg-blue-900/60 text-blue-300' };
                 const statusLabels = { completed: 'Completed', in_progress: 'In Progress', scheduled: 'Scheduled' };
-                listEl.innerHTML = filtered.map(r => {
+                const cards = records.map(r => {
                     const sc = statusColors[r.status] || 'bg-gray-700 text-gray-300';
                     const sl = statusLabels[r.status] || r.status;
                     return `<div class="rounded-xl border border-gray-700/70 bg-gray-700/30 p-4"><div class="flex items-start justify-between gap-3"><div class="min-w-0"><div class="flex items-center gap-2 flex-wrap"><p class="font-semibold text-white text-sm">${r.title}</p><span class="px-2 py-0.5 rounded-full text-[11px] ${sc}">${sl}</span><span class="px-2 py-0.5 rounded-full text-[11px] bg-gray-700 text-gray-400">${r.category}</span></div><p class="text-xs text-gray-400 mt-1">${r.property_title || ''} · ${r.maintenance_date || ''}${r.vendor_name ? ' · ' + r.vendor_name : ''}</p>${r.description ? `<p class="text-xs text-gray-500 mt-1">${r.description}</p>` : ''}</div><div class="text-right flex-shrink-0">${r.cost ? '<p class="text-sm font-bold text-amber-300">' + formatNGN(r.cost) + '</p>' : ''}<p class="text-xs text-gray-500 mt-1">${r.recorded_by || ''}</p></div></div><div class="flex items-center gap-3 mt-3 text-xs"><button onclick="mgrEditMaint(${r.id})" class="text-blue-400 hover:text-blue-300">Edit</button><button onclick="mgrDeleteMaint(${r.id})" class="text-red-400 hover:text-red-300">Remove</button></div></div>`;
                 }).join('');
+                if (cursor) listEl.insertAdjacentHTML('beforeend', cards);
+                else listEl.innerHTML = cards;
+                setLoadMore(listEl, data.next_cursor, next => loadMaintenanceRecords(prefix, next));
             } catch(e) { listEl.innerHTML = '<p class="text-red-400 text-sm text-center py-6">Error loading records.</p>'; }
         }
 
@@ -13356,21 +17227,19 @@ body{font-family:'Times New Roman',serif;color:#000;background:#fff;font-size:11
 </html>
 """
 
-# Boot-time schema migration — runs on every gunicorn worker import.
-# Lazy `ensure_runtime_state()` is still kept for backfill safety, but this
-# guarantees schema is up-to-date the moment a worker starts taking traffic.
+# Worker boot only checks the schema version. `flask migrate` does the actual work
+# once per deploy; until it has run, requests are refused with a 503.
 try:
     with app.app_context():
-        db.create_all()
-        ensure_runtime_schema_updates()
+        if schema_is_current():
+            runtime_state_initialized = True
+        else:
+            logger.warning("Database schema is behind this release; run `flask --app app migrate`")
 except Exception as _boot_err:
-    try:
-        logger.error(f"Boot-time schema migration failed: {_boot_err}")
-    except Exception:
-        pass
+    logger.error(f"Boot-time schema check failed: {_boot_err}")
 
 
 if __name__ == '__main__':
-    with app.app_context():
-        ensure_runtime_state()
+    if not runtime_state_initialized:
+        raise SystemExit("Database schema is behind this release; run `flask --app app migrate` first")
     app.run(debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
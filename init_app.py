@@ -1,15 +1,26 @@
 import os
+import sys
 
-from app import app, initialize_app_state
+from app import app, build_image_derivatives, build_static_assets, migrate_database, run_job_worker
 
 
 def env_flag(name, default="False"):
     return os.environ.get(name, default).strip().lower() == "true"
 
 
-if __name__ == "__main__":
+if __name__ == "__main__" and sys.argv[1:] == ["worker"]:
+    # Long-running background job worker: `python init_app.py worker`.
+    run_job_worker()
+elif __name__ == "__main__":
+    # Run once per deploy: applies pending schema migrations, then seeds defaults.
+    # Same as `flask --app app migrate`; the migration lock makes concurrent runs safe.
     with app.app_context():
-        initialize_app_state(
+        migrate_database(
             include_sample_data=env_flag("INIT_SAMPLE_DATA", "True"),
             bootstrap_admin=env_flag("BOOTSTRAP_ADMIN", "False"),
+            force=True,
         )
+        # WebP/AVIF derivatives first, so the built pages can carry their srcsets.
+        build_image_derivatives()
+        # Fingerprinted, precompressed copies of assets/ and the public pages.
+        build_static_assets()
@@ -15,7 +15,7 @@ from datetime import date
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, ProjectExpense, Property
+from app import app, db, ProjectExpense, Property, rebuild_monthly_financial_rollup
 
 PROPERTY_NAME = 'Brightwave Apartment Phase 1'
 PAYEE          = 'Al-Ameen A.'
@@ -288,6 +288,8 @@ def main():
         if dry_run:
             print(f"\n[DRY RUN] Would insert {added} expenses. No changes written.")
         else:
+            # Bulk inserts bypass the per-write rollup hooks, so recompute it.
+            rebuild_monthly_financial_rollup()
             db.session.commit()
             print(f"Done — inserted {added} expenses for '{PROPERTY_NAME}'.")
 
@@ -5,14 +5,26 @@ Run with: pytest tests/test_app.py -v
 import os
 import json
 import io
+import fcntl
+import hashlib
 import shutil
+import socket
+import socketserver
+import sqlite3
 import tempfile
+import threading
+import time
 import pytest
-from datetime import date
+from contextlib import contextmanager
+from datetime import date, datetime
 from unittest.mock import patch
 
 os.environ.setdefault('SECRET_KEY', 'test-secret-key-brightwave')
 os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# A fresh limiter store per run under tests/tmp, so counters never leak between test runs
+os.makedirs(os.path.join(os.path.dirname(__file__), 'tmp'), exist_ok=True)
+RATE_LIMIT_DIR = tempfile.mkdtemp(prefix='brightwave-limits-', dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+os.environ.setdefault('RATELIMIT_STORAGE_URI', 'sqlite-wal://' + os.path.join(RATE_LIMIT_DIR, 'ratelimit.db'))
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -23,22 +35,35 @@ import app as app_module
 from app import app as flask_app, db, Admin, InvestorProfile, PaymentRecord, ProjectExpense
 
 
+@pytest.fixture(scope='session', autouse=True)
+def rate_limit_store():
+    yield
+    shutil.rmtree(RATE_LIMIT_DIR, ignore_errors=True)
+
+
 @pytest.fixture()
 def client():
     flask_app.config['TESTING'] = True
     flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     flask_app.config['WTF_CSRF_ENABLED'] = False
     flask_app.config['RATELIMIT_ENABLED'] = False
+    flask_app.config['BACKGROUND_JOBS_INLINE'] = True
+    flask_app.config['JOB_WORKER_THREADS'] = 0
     os.makedirs(os.path.join(os.path.dirname(__file__), 'tmp'), exist_ok=True)
     receipt_dir = tempfile.mkdtemp(
         prefix='brightwave-receipts-',
         dir=os.path.join(os.path.dirname(__file__), 'tmp')
     )
     flask_app.config['EXPENSE_RECEIPT_FOLDER'] = receipt_dir
+    flask_app.config['RENDERED_PAGE_FOLDER'] = os.path.join(receipt_dir, 'rendered')
+    flask_app.config['STATIC_BUILD_FOLDER'] = os.path.join(receipt_dir, 'static-build')
+    app_module.invalidate_published_cache()
+    app_module.rendered_page_cache.clear()
     with flask_app.test_client() as client:
         with flask_app.app_context():
+            # What `flask migrate` does once per deploy; web requests never migrate
+            app_module.migrate_database(include_sample_data=True, force=True)
             app_module.runtime_state_initialized = False
-            db.create_all()
             yield client
             db.drop_all()
             app_module.runtime_state_initialized = False
@@ -68,6 +93,31 @@ def login(client, username, password='testpass123'):
     )
 
 
+@contextmanager
+def capture_sql():
+    """Collect every SQL statement executed on the app engine inside the block."""
+    from sqlalchemy import event
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+
+def request_statement_count(client, url):
+    """SQL statements issued by one GET, with the session cleared so nothing comes from the identity map."""
+    db.session.expunge_all()
+    with capture_sql() as statements:
+        assert client.get(url).status_code == 200, url
+    return len(statements)
+
+
 def admin_headers(client):
     with client.session_transaction() as sess:
         token = sess.get('csrf_token', '')
@@ -178,6 +228,131 @@ def test_site_content_has_about_keys(client):
     assert 'about.intro_body' in data
 
 
+def test_schema_migrations_apply_once(client):
+    # The fixture migrated already; every step must also be safe to replay on a live schema
+    app_module.SchemaVersion.query.delete()
+    db.session.commit()
+    applied = app_module.run_schema_migrations()
+    assert applied == [version for version, _, _ in app_module.SCHEMA_MIGRATIONS]
+    assert app_module.run_schema_migrations() == []
+    assert app_module.get_applied_schema_versions() == set(applied)
+
+
+def test_site_content_request_is_read_only(client):
+    assert client.get('/api/site-content').status_code == 200
+    with capture_sql() as statements:
+        r = client.get('/api/site-content')
+    assert r.status_code == 200
+    assert len(statements) <= 1
+    assert all(stmt.lstrip().upper().startswith('SELECT') for stmt in statements)
+
+
+def test_site_content_etag_returns_304(client):
+    first = client.get('/api/site-content')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    repeat = client.get('/api/site-content', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+
+
+def test_publish_invalidates_site_content_cache_and_preview_bypasses_it(client):
+    with flask_app.app_context():
+        create_admin('ceo_cms', role='CEO')
+    assert login(client, 'ceo_cms').status_code == 200
+    before = client.get('/api/site-content')
+    assert before.status_code == 200
+
+    save_resp = client.put('/admin/api/site-content', headers=admin_headers(client), json={
+        'home.hero_title': 'Fresh headline'
+    })
+    assert save_resp.status_code == 200
+    preview = json.loads(client.get('/api/site-content?preview=1').data)
+    assert preview['home.hero_title'] == 'Fresh headline'
+    live = json.loads(client.get('/api/site-content').data)
+    assert live['home.hero_title'] != 'Fresh headline'
+
+    publish_resp = client.post('/admin/api/site-content/publish', headers=admin_headers(client))
+    assert publish_resp.status_code == 200
+    after = client.get('/api/site-content', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert json.loads(after.data)['home.hero_title'] == 'Fresh headline'
+
+
+def test_cache_version_bumps_are_a_single_upsert(client):
+    with capture_sql() as statements:
+        app_module.bump_cache_version('fresh.counter')
+        app_module.bump_cache_version('fresh.counter')
+        db.session.commit()
+    assert app_module.get_cache_version('fresh.counter') == 2
+    bumps = [sql for sql in statements if 'cache_version' in sql]
+    # Two first publishes racing on a new name must not both try a plain INSERT
+    assert len(bumps) == 2 and all('ON CONFLICT (name) DO UPDATE' in sql for sql in bumps)
+
+
+def test_homepage_is_pre_rendered_with_published_content(client):
+    with flask_app.app_context():
+        create_admin('ceo_render', role='CEO')
+    assert login(client, 'ceo_render').status_code == 200
+    client.put('/admin/api/site-content', headers=admin_headers(client), json={
+        'home.hero_title': 'Homes <built> right',
+        'site.contact_email': 'hello@brightwave.test',
+    })
+    assert client.post('/admin/api/site-content/publish', headers=admin_headers(client)).status_code == 200
+
+    r = client.get('/')
+    assert r.status_code == 200
+    page = r.data.decode('utf-8')
+    assert 'Homes &lt;built&gt; right</h1>' in page
+    assert '<span data-cms="contact_email">hello@brightwave.test</span>' in page
+    assert r.headers['Last-Modified']
+    assert client.get('/', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+    # A second publish replaces the homepage render on disk instead of adding to it.
+    client.get('/about')
+    client.put('/admin/api/site-content', headers=admin_headers(client), json={'home.hero_title': 'Homes, again'})
+    client.post('/admin/api/site-content/publish', headers=admin_headers(client))
+    assert 'Homes, again</h1>' in client.get('/').data.decode('utf-8')
+    rendered = sorted(name.split('-')[0] for name in os.listdir(flask_app.config['RENDERED_PAGE_FOLDER']))
+    assert rendered == ['about', 'index']
+
+
+def test_about_page_pre_renders_active_team(client):
+    r = client.get('/about')
+    assert r.status_code == 200
+    names = [member['name'] for member in json.loads(client.get('/api/team-members').data)]
+    assert names
+    page = r.data.decode('utf-8')
+    assert all(app_module._escape(name) in page for name in names)
+    assert 'class="section-kicker mb-2"' in page
+
+
+def test_static_build_fingerprints_and_precompresses_assets(client):
+    import gzip
+    manifest = app_module.build_static_assets()
+    css_path = manifest['assets']['assets/style.css']
+    assert css_path.startswith('assets/style.') and css_path != 'assets/style.css'
+    assert 'gzip' in manifest['files'][css_path]
+    assert not any(path.startswith('assets/uploads/') for path in manifest['assets'])
+
+    r = client.get('/' + css_path, headers={'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in r.headers['Cache-Control'] and 'Accept-Encoding' in r.headers['Vary']
+    with open(os.path.join(flask_app.root_path, 'assets', 'style.css'), 'rb') as source:
+        assert gzip.decompress(r.data) == source.read()
+    partial = client.get('/' + css_path, headers={'Range': 'bytes=0-9'})
+    assert partial.status_code == 206 and len(partial.data) == 10
+    assert client.get('/assets/style.css').status_code == 200
+
+    faq = client.get('/faq', headers={'Accept-Encoding': 'br;q=0, gzip'})
+    assert faq.headers['Content-Encoding'] == 'gzip'
+    assert css_path in gzip.decompress(faq.data).decode('utf-8')
+    home = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert home.headers['Content-Encoding'] == 'gzip' and css_path in gzip.decompress(home.data).decode('utf-8')
+    assert manifest['assets']['assets/images/brightwave-logo.png'] in client.get('/admin/login').data.decode('utf-8')
+
+
 # ── API: team members ─────────────────────────────────────────────────────────
 
 def test_team_members_api_returns_list(client):
@@ -244,6 +419,76 @@ def test_admin_dashboard_redirects_without_auth(client):
     assert r.status_code in (301, 302)
 
 
+def test_ceo_dashboard_only_hashes_videos_for_direct_uploads(client):
+    create_admin('ceo_direct', role='CEO')
+    assert login(client, 'ceo_direct').status_code == 200
+    assert b'const DIRECT_VIDEO_UPLOADS = false;' in client.get('/admin/dashboard').data
+    with patch.object(app_module.LocalStorage, 'remote', True):
+        assert b'const DIRECT_VIDEO_UPLOADS = true;' in client.get('/admin/dashboard').data
+
+
+def test_database_at_schema_version_5_upgrades_cleanly(client):
+    from app import Property, PaymentRecord, SchemaVersion, Tenant, MonthlyFinancialRollup
+
+    # Rewind a fresh schema to how version 5 left it: no rollup table, tenants linked by name only
+    app_module.run_schema_migrations()
+    prop = Property(title='Legacy Court', description='d', property_type='hostel', location='Malete')
+    db.session.add(prop)
+    db.session.commit()
+    tenant_columns = [column.name for column in Tenant.__table__.columns if column.name not in ('property_id', 'unit_id')]
+    for statement in (
+        'DROP TABLE monthly_financial_rollup',
+        'ALTER TABLE tenant RENAME TO tenant_linked',
+        f"CREATE TABLE tenant AS SELECT {', '.join(tenant_columns)} FROM tenant_linked",
+        'DROP TABLE tenant_linked',
+        "INSERT INTO tenant (id, name, property_name, status, monthly_rent) VALUES (1, 'Old Tenant', 'Legacy Court', 'active', 0)",
+        'DELETE FROM schema_version WHERE version > 5',
+    ):
+        db.session.execute(db.text(statement))
+    db.session.commit()
+    db.session.add(PaymentRecord(tenant_id=1, amount=4500, payment_date=date(2024, 11, 5)))
+    db.session.commit()
+
+    app_module.migrate_database(force=True)
+    applied = {row.version for row in SchemaVersion.query.all()}
+    assert applied == {version for version, _, _ in app_module.SCHEMA_MIGRATIONS}
+    assert db.session.get(Tenant, 1).property_id == prop.id
+    assert [(row.property_id, row.revenue) for row in MonthlyFinancialRollup.query.all()] == [(prop.id, 4500.0)]
+
+
+def test_migrate_runs_once_under_the_lock_and_workers_only_check_the_version(client):
+    lock_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    with patch.dict(flask_app.config, {'SCHEMA_LOCK_FILE': os.path.join(lock_dir, 'migrate.lock')}):
+        # A release with an unapplied step: workers refuse rather than migrate
+        app_module.SchemaVersion.query.filter_by(version=app_module.SCHEMA_MIGRATIONS[-1][0]).delete()
+        db.session.commit()
+        with patch('app.initialize_app_state') as initialize:
+            with pytest.raises(app_module.SchemaNotCurrent):
+                app_module.ensure_runtime_state()
+            refused = client.get('/api/properties')
+            assert refused.status_code == 503 and refused.headers['Retry-After'] == '30'
+            assert client.get('/health').status_code == 200
+        initialize.assert_not_called()
+
+        runner = flask_app.test_cli_runner()
+        assert 'Applied migrations' in runner.invoke(args=['migrate']).output
+        assert app_module.schema_is_current()
+        assert 'already up to date' in runner.invoke(args=['migrate']).output
+        assert client.get('/api/properties').status_code == 200
+
+        entered = threading.Event()
+        with app_module.schema_migration_lock():
+            def second_migrator():
+                with flask_app.app_context(), app_module.schema_migration_lock():
+                    entered.set()
+            waiter = threading.Thread(target=second_migrator)
+            waiter.start()
+            assert not entered.wait(0.2)
+        waiter.join(5)
+        assert entered.is_set()
+    shutil.rmtree(lock_dir, ignore_errors=True)
+
+
 def test_admin_login_page_loads(client):
     r = client.get('/admin/login')
     assert r.status_code == 200
@@ -259,6 +504,55 @@ def test_admin_bad_credentials_rejected(client):
     assert data.get('success') is False
 
 
+def test_login_upgrades_hashes_made_with_old_parameters(client):
+    admin = Admin(username='legacy_hash', email='legacy@example.com', role='CEO', is_active=True,
+                  password_hash=generate_password_hash('testpass123', 'pbkdf2:sha256:1000'))
+    db.session.add(admin)
+    db.session.commit()
+    with patch.dict(flask_app.config, {'PASSWORD_HASH_METHOD': 'scrypt:16384:8:1'}):
+        assert app_module.password_needs_rehash(admin.password_hash)
+        assert login(client, 'legacy_hash').status_code == 200
+        upgraded = db.session.get(Admin, admin.id).password_hash
+        assert upgraded.startswith('scrypt:16384:8:1$')
+        assert not app_module.password_needs_rehash(upgraded)
+        assert login(client, 'legacy_hash').status_code == 200
+        assert db.session.get(Admin, admin.id).password_hash == upgraded
+    assert app_module.normalized_hash_method('pbkdf2') == 'pbkdf2:sha256:600000'
+
+
+def test_login_answers_503_when_the_password_pool_is_saturated(client):
+    create_admin('burst_login', role='CEO')
+    with patch.dict(flask_app.config, {'PASSWORD_POOL_MAX_PENDING': 1, 'PASSWORD_POOL_WORKERS': 1,
+                                       'PASSWORD_POOL_WAIT': 0.05}):
+        _, slots = app_module.get_password_pool()
+        slots.acquire()
+        try:
+            busy = login(client, 'burst_login')
+        finally:
+            slots.release()
+        assert busy.status_code == 503 and busy.headers['Retry-After'] == '5'
+        assert login(client, 'burst_login').status_code == 200
+
+    # Sync workers never fill their own pool; the host-wide slots bound them together
+    slot_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    with patch.dict(flask_app.config, {'PASSWORD_HOST_SLOTS': 1, 'PASSWORD_SLOT_FOLDER': slot_dir,
+                                       'PASSWORD_POOL': 'inline', 'PASSWORD_POOL_WAIT': 0.05}):
+        with open(os.path.join(slot_dir, 'slot-0.lock'), 'a') as other_worker:
+            fcntl.flock(other_worker, fcntl.LOCK_EX)
+            busy = login(client, 'burst_login')
+            # New hashes give up too, after PASSWORD_HASH_WAIT
+            with patch.dict(flask_app.config, {'PASSWORD_HASH_WAIT': 0.05}):
+                signup = client.post('/api/signup', json={'full_name': 'Busy Realtor', 'email': 'busy@example.com',
+                                                          'role': 'REALTOR', 'password': 'longenough1'})
+            fcntl.flock(other_worker, fcntl.LOCK_UN)
+        assert busy.status_code == 503
+        assert signup.status_code == 503 and signup.headers['Retry-After'] == '5'
+        assert login(client, 'burst_login').status_code == 200
+    shutil.rmtree(slot_dir, ignore_errors=True)
+    rates = app_module.benchmark_password_hashing(['pbkdf2:sha256:1000'], seconds=0.05)
+    assert rates['pbkdf2:sha256:1000'] > 0
+
+
 def test_apple_touch_icon_route_returns_png(client):
     r = client.get('/apple-touch-icon.png')
     assert r.status_code == 200
@@ -289,6 +583,270 @@ def test_manager_can_create_tenant_and_units_seeded(client):
     assert payload.get('success') is True
 
 
+def test_unit_occupancy_syncs_incrementally_and_units_get_is_read_only(client):
+    from app import Property, PropertyUnit
+    with flask_app.app_context():
+        create_admin('manager_units', role='MANAGER')
+        prop = Property(title='Occupancy Court', description='Units fixture', property_type='hostel', location='Malete')
+        db.session.add(prop)
+        db.session.flush()
+        db.session.add_all([PropertyUnit(property_id=prop.id, unit_code=code, status='available', sort_order=i)
+                            for i, code in enumerate(['1A', '1B'])])
+        db.session.commit()
+        prop_id = prop.id
+    assert login(client, 'manager_units').status_code == 200
+    client.get('/admin/api/units')
+
+    tenant_resp = client.post('/admin/api/tenants', headers=admin_headers(client), json={
+        'name': 'Unit Tenant', 'property_name': 'occupancy court ', 'unit_number': '1b', 'status': 'active'
+    })
+    assert tenant_resp.status_code == 200
+    tenant_id = json.loads(tenant_resp.data)['id']
+
+    with capture_sql() as statements:
+        units = json.loads(client.get(f'/admin/api/units?property_id={prop_id}').data)
+    assert not [stmt for stmt in statements if stmt.lstrip().upper().startswith('UPDATE')]
+    assert {u['unit_code']: u['status'] for u in units} == {'1A': 'available', '1B': 'occupied'}
+    with flask_app.app_context():
+        assert db.session.get(Property, prop_id).available_rooms == 1
+
+    assert client.delete(f'/admin/api/tenants/{tenant_id}', headers=admin_headers(client)).status_code == 200
+    units = json.loads(client.get(f'/admin/api/units?property_id={prop_id}').data)
+    assert {u['unit_code']: u['status'] for u in units} == {'1A': 'available', '1B': 'available'}
+
+
+def test_tenant_links_backfill_and_property_filtered_stats(client):
+    from app import Property, PropertyUnit, Tenant
+    with flask_app.app_context():
+        create_admin('ceo_links', role='CEO')
+        court = Property(title='Link Court', description='FK fixture', property_type='hostel', location='Malete')
+        annex = Property(title='Link Court Annex', description='FK fixture', property_type='hostel', location='Malete')
+        db.session.add_all([court, annex])
+        db.session.flush()
+        unit = PropertyUnit(property_id=annex.id, unit_code='2C', status='available')
+        db.session.add(unit)
+        db.session.flush()
+        legacy = Tenant(name='Legacy', property_name=' link court annex', unit_number='2c', status='active')
+        db.session.add(legacy)
+        db.session.commit()
+
+        assert app_module.backfill_tenant_property_links() == 1
+        db.session.commit()
+        app_module.sync_property_units_from_tenants()
+        assert (legacy.property_id, legacy.unit_id) == (annex.id, unit.id)
+        court_id, annex_id, legacy_id = court.id, annex.id, legacy.id
+
+    assert login(client, 'ceo_links').status_code == 200
+    annex_stats = json.loads(client.get(f'/admin/api/stats?property_id={annex_id}').data)
+    court_stats = json.loads(client.get(f'/admin/api/stats?property_id={court_id}').data)
+    assert annex_stats['total_tenants'] == 1 and annex_stats['occupied_units'] == 1
+    assert court_stats['total_tenants'] == 0
+
+    # Moving a tenant by id also renames the property they display under
+    moved = client.put(f'/admin/api/tenants/{legacy_id}', headers=admin_headers(client), json={'property_id': court_id})
+    assert moved.status_code == 200
+    tenant = db.session.get(Tenant, legacy_id)
+    assert (tenant.property_id, tenant.property_name) == (court_id, 'Link Court')
+
+
+def test_admin_list_endpoints_issue_constant_queries(client):
+    from app import (Property, PropertyUnit, PropertyUnitType, Tenant, UserContract, PropertyInquiry,
+                     MaintenanceRecord, ConstructionUpdate)
+    with flask_app.app_context():
+        create_admin('ceo_lists', role='CEO')
+        prop = Property(title='List Court', description='N+1 fixture', property_type='hostel', location='Malete')
+        db.session.add(prop)
+        db.session.commit()
+        prop_id = prop.id
+    assert login(client, 'ceo_lists').status_code == 200
+
+    def add_rows(batch):
+        for i in range(batch * 3, batch * 3 + 3):
+            staff = create_admin(f'staff_{i}', role='MANAGER')
+            investor = create_admin(f'investor_{i}', role='INVESTOR')
+            unit_type = PropertyUnitType(property_id=prop_id, name=f'Type {i}', total_count=4)
+            db.session.add(unit_type)
+            db.session.flush()
+            db.session.add_all([
+                UserContract(user_id=staff.id, contract_type='MANAGER', status='pending_ceo_signature'),
+                UserContract(user_id=investor.id, contract_type='INVESTOR', status='completed', ceo_signed_at=datetime.utcnow()),
+                InvestorProfile(user_id=investor.id, investment_amount=1000000, property_id=prop_id),
+                Tenant(name=f'Tenant {i}', unit_type_id=unit_type.id, serviced_by_id=staff.id, property_id=prop_id),
+                PropertyUnit(property_id=prop_id, unit_code=f'U{i}'),
+                ProjectExpense(property_id=prop_id, item_name=f'Item {i}', amount=1000),
+                PropertyInquiry(property_id=prop_id, full_name=f'Lead {i}', email='lead@example.com', phone='080',
+                                inquiry_type='general', message='Hi'),
+                MaintenanceRecord(property_id=prop_id, title=f'Fix {i}'),
+                ConstructionUpdate(property_id=prop_id, title=f'Step {i}'),
+            ])
+        db.session.commit()
+
+    urls = ['/admin/api/accounts', '/admin/api/investors', '/admin/api/pending-contracts',
+            '/admin/api/completed-contracts', '/admin/api/unit-types', '/admin/api/tenants',
+            '/admin/api/project-expenses', '/admin/api/units', '/admin/api/inquiries',
+            '/admin/api/maintenance', '/admin/api/construction-updates']
+    add_rows(0)
+    baseline = {url: request_statement_count(client, url) for url in urls}
+    add_rows(1)
+    add_rows(2)
+    assert {url: request_statement_count(client, url) for url in urls} == baseline
+
+
+def test_admin_lists_page_by_cursor_with_filters_and_totals(client):
+    from app import PropertyInquiry
+    stamp = datetime(2026, 3, 1, 9, 0)
+    with flask_app.app_context():
+        create_admin('ceo_pages', role='CEO')
+        # Shared created_at values make sure ties are broken on id.
+        for i in range(7):
+            db.session.add(PropertyInquiry(full_name=f'Lead {i}', email=f'lead{i}@example.com', phone='080',
+                                           inquiry_type='general', message='Hi', created_at=stamp,
+                                           status='new' if i % 2 else 'contacted'))
+        for i in range(55):
+            db.session.add(PaymentRecord(tenant_name=f'Payer {i}', amount=100, payment_date=date(2026, 3, 1)))
+        db.session.commit()
+    assert login(client, 'ceo_pages').status_code == 200
+
+    legacy = client.get('/admin/api/inquiries')
+    assert isinstance(legacy.get_json(), list) and len(legacy.get_json()) == 7
+
+    seen, cursor = [], ''
+    while True:
+        body = client.get(f'/admin/api/inquiries?limit=3&fields=id,status&cursor={cursor}').get_json()
+        assert body['totals'] == {'count': 7, 'by_status': {'new': 3, 'contacted': 4}}
+        assert all(set(item) == {'id', 'status'} for item in body['items'])
+        seen.extend(item['id'] for item in body['items'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True) and len(set(seen)) == 7
+
+    filtered = client.get('/admin/api/inquiries?limit=10&q=lead3@&status=new').get_json()
+    assert [item['full_name'] for item in filtered['items']] == ['Lead 3']
+    assert client.get('/admin/api/inquiries?limit=10&date_from=2026-03-02').get_json()['totals']['count'] == 0
+    assert client.get('/admin/api/inquiries?cursor=not-a-cursor').status_code == 400
+
+    payments = client.get('/admin/api/payments')
+    assert len(payments.get_json()) == 50 and payments.headers['X-Next-Cursor']
+    rest = client.get(f"/admin/api/payments?cursor={payments.headers['X-Next-Cursor']}").get_json()
+    assert len(rest['items']) == 5 and rest['next_cursor'] is None
+    assert rest['totals']['count'] == 55 and rest['totals']['amount'] == 5500
+    for url in ('/admin/api/contact-messages', '/admin/api/tenants', '/admin/api/maintenance',
+                '/admin/api/project-expenses'):
+        resp = client.get(url + '?limit=2&q=x&date_from=2026-01-01&date_to=2026-12-31')
+        assert resp.status_code == 200 and 'next_cursor' in resp.get_json()
+
+
+def test_dashboards_request_list_pages_instead_of_whole_tables(client):
+    create_admin('ceo_dash_pages', role='CEO')
+    create_admin('manager_dash_pages', role='MANAGER')
+    assert login(client, 'ceo_dash_pages').status_code == 200
+    page = client.get('/admin/dashboard').get_data(as_text=True)
+    assert "listPageUrl('/admin/api/inquiries', cursor)" in page
+    assert "fetchData('/admin/api/inquiries')" not in page
+    assert "fetchData('/admin/api/maintenance' + qs)" not in page
+    manager_client = flask_app.test_client()
+    assert login(manager_client, 'manager_dash_pages').status_code == 200
+    page = manager_client.get('/admin/dashboard').get_data(as_text=True)
+    assert "fetchData(listPageUrl('/admin/api/inquiries'))" in page
+    assert "fetchData('/admin/api/tenants')" not in page
+
+
+def test_paged_lists_follow_the_unpaged_order_and_keep_undated_rows(client):
+    from app import ContactMessage, MaintenanceRecord, Property
+    with flask_app.app_context():
+        create_admin('ceo_order', role='CEO')
+        prop = Property(title='Order Court', description='d', property_type='hostel', location='Malete')
+        db.session.add(prop)
+        db.session.flush()
+        # Entered out of date order, as back-filled maintenance logs are
+        for day in (3, 9, 1, 9, 5):
+            db.session.add(MaintenanceRecord(property_id=prop.id, title=f'Fix {day}', maintenance_date=date(2026, 2, day)))
+        db.session.add(ContactMessage(full_name='Old', email='old@example.com', message='Hi'))
+        db.session.commit()
+        db.session.execute(db.text('UPDATE contact_message SET created_at = NULL'))
+        db.session.commit()
+    assert login(client, 'ceo_order').status_code == 200
+
+    unpaged = [row['id'] for row in client.get('/admin/api/maintenance').get_json()]
+    paged, cursor = [], ''
+    while True:
+        body = client.get(f'/admin/api/maintenance?limit=2&cursor={cursor}').get_json()
+        paged.extend(row['id'] for row in body['items'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert paged == unpaged and len(paged) == 5
+
+    app_module.SchemaVersion.query.filter_by(version=16).delete()
+    db.session.commit()
+    app_module.run_schema_migrations()
+    body = client.get('/admin/api/contact-messages?limit=1').get_json()
+    assert [item['full_name'] for item in body['items']] == ['Old']
+
+    bad = client.get('/admin/api/maintenance?date_to=March')
+    assert bad.status_code == 400 and bad.get_json()['message'] == 'date_to must be YYYY-MM-DD'
+
+
+def test_project_expense_summaries_come_from_aggregates(client):
+    from app import Property
+    with flask_app.app_context():
+        create_admin('ceo_expense_sums', role='CEO')
+        prop = Property(title='Sum Court', description='Summary fixture', property_type='hostel',
+                        location='Malete', capital_budget=10000)
+        db.session.add(prop)
+        db.session.commit()
+        prop_id = prop.id
+
+        def add_expenses(count):
+            for i in range(count):
+                db.session.add_all([
+                    ProjectExpense(property_id=prop_id, item_name='Cement', category='materials', amount=100.25,
+                                   approval_status='approved'),
+                    ProjectExpense(property_id=prop_id, item_name='Crew', category='labour', amount=50,
+                                   approval_status='pending'),
+                    ProjectExpense(property_id=prop_id, item_name='Truck', category='transport', amount=20,
+                                   approval_status='rejected'),
+                ])
+            db.session.commit()
+        add_expenses(1)
+    assert login(client, 'ceo_expense_sums').status_code == 200
+    url = f'/admin/api/project-expenses?property_id={prop_id}&limit=2'
+    baseline = request_statement_count(client, url)
+    with flask_app.app_context():
+        add_expenses(3)
+    assert request_statement_count(client, url) == baseline
+
+    body = client.get(url + '&approval_status=approved').get_json()
+    assert len(body['expenses']) == 2 and body['next_cursor']
+    assert body['count'] == 4 and body['total_amount'] == 401.0
+    assert body['by_category'] == {'materials': 401.0}
+    assert body['approval_totals'] == {'pending': 200.0, 'approved': 401.0, 'rejected': 80.0}
+    assert body['budget_remaining'] == 9599.0 and body['over_budget'] is False
+    legacy = client.get(f'/admin/api/project-expenses?property_id={prop_id}').get_json()
+    assert len(legacy['expenses']) == 12 and legacy['total_amount'] == 681.0
+
+
+def test_read_only_role_checks_use_session_claim_until_roles_change(client):
+    with flask_app.app_context():
+        create_admin('ceo_claims', role='CEO')
+        manager_id = create_admin('manager_claims', role='MANAGER').id
+    assert login(client, 'ceo_claims').status_code == 200
+    db.session.expunge_all()
+    with capture_sql() as statements:
+        assert client.get('/admin/api/pending-contracts').status_code == 200
+    assert not [sql for sql in statements if 'FROM admin' in sql and 'admin.id = ' in sql]
+
+    manager_client = flask_app.test_client()
+    assert login(manager_client, 'manager_claims').status_code == 200
+    assert manager_client.get('/admin/api/contact-messages').status_code == 200
+    demote = client.put(f'/admin/api/accounts/{manager_id}', json={'role': 'REALTOR'},
+                        headers=admin_headers(client))
+    assert demote.status_code == 200
+    assert manager_client.get('/admin/api/contact-messages').status_code == 403
+    assert manager_client.get('/admin/api/units').status_code == 200
+
+
 def test_accountant_can_update_and_delete_payment(client):
     with flask_app.app_context():
         create_admin('accountant1', role='ACCOUNTANT')
@@ -446,6 +1004,724 @@ def test_manager_can_create_update_and_delete_project_expense(client):
         assert ProjectExpense.query.get(expense_id) is None
 
 
+def test_admin_stats_aggregates_months_and_years_in_few_queries(client):
+    from app import Property
+    with flask_app.app_context():
+        create_admin('ceo_stats', role='CEO')
+        today = date.today()
+        last_year = date(today.year - 1, 6, 15)
+        prop = Property(title='Stats Block', description='Stats fixture', property_type='hostel', location='Malete', status='active', capital_budget=1000000)
+        db.session.add(prop)
+        db.session.flush()
+        db.session.add_all([
+            PaymentRecord(tenant_name='A', amount=50000, payment_date=today),
+            PaymentRecord(tenant_name='B', amount=20000, payment_date=last_year),
+            ProjectExpense(property_id=prop.id, item_name='Blocks', amount=30000, expense_date=today, approval_status='approved'),
+            ProjectExpense(property_id=prop.id, item_name='Sand', amount=7000, expense_date=last_year, approval_status='approved'),
+            ProjectExpense(property_id=prop.id, item_name='Paint', amount=4000, expense_date=today, approval_status='pending'),
+        ])
+        app_module.rebuild_monthly_financial_rollup()
+        db.session.commit()
+    assert login(client, 'ceo_stats').status_code == 200
+
+    with capture_sql() as statements:
+        r = client.get('/admin/api/stats')
+    assert r.status_code == 200
+    assert len(statements) <= 20
+    stats = json.loads(r.data)
+    assert stats['total_revenue'] == 70000
+    assert stats['monthly_revenue'] == 50000
+    assert stats['approved_capital_spent'] == 37000
+    assert stats['monthly_capital_spent'] == 30000
+    assert stats['pending_capital_spent'] == 4000
+    assert stats['monthly_trend'][-1]['revenue'] == 50000
+    yearly = {row['year']: row for row in stats['yearly_trend']}
+    assert yearly[str(today.year - 1)] == {'year': str(today.year - 1), 'revenue': 20000.0, 'capital': 7000.0}
+    assert yearly[str(today.year)]['capital'] == 30000
+
+
+def test_period_engine_months_are_contiguous_and_fiscal_aware():
+    months = app_module.last_n_periods('month', 24, today=date(2026, 3, 31))
+    assert len({period['key'] for period in months}) == 24
+    assert months[0]['start'] == date(2024, 4, 1) and months[-1]['end'] == date(2026, 4, 1)
+    assert all(a['end'] == b['start'] for a, b in zip(months, months[1:]))
+
+    quarter = app_module.period_for('quarter', date(2026, 2, 3), fiscal_start_month=7)
+    assert (quarter['key'], quarter['start'], quarter['end']) == ((2025, 3), date(2026, 1, 1), date(2026, 4, 1))
+    assert app_module.add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    years = app_module.iter_periods('year', date(2025, 1, 1), date(2026, 8, 1), fiscal_start_month=7)
+    assert [period['label'] for period in years] == ['FY2024', 'FY2025', 'FY2026']
+    totals = app_module.fold_into_periods(years, 'year', {(2025, 6): 10, (2025, 7): 5, (2026, 7): 1}, 7)
+    assert totals == {2024: 10.0, 2025: 5.0, 2026: 1.0}
+
+
+def test_financial_rollup_tracks_ledger_writes(client):
+    from app import Property, Tenant, MonthlyFinancialRollup
+
+    def snapshot():
+        return sorted(
+            (r.property_id, r.year, r.month, r.revenue, r.approved_capital, r.pending_capital,
+             r.rejected_capital, r.payment_count, r.expense_count)
+            for r in MonthlyFinancialRollup.query.all()
+            if r.payment_count or r.expense_count
+        )
+
+    with flask_app.app_context():
+        create_admin('ceo_rollup', role='CEO')
+        prop = Property(title='Rollup Court', description='Rollup fixture', property_type='hostel', location='Malete')
+        db.session.add(prop)
+        db.session.flush()
+        tenant = Tenant(name='Roll Tenant', property_name='Rollup Court', property_id=prop.id)
+        db.session.add(tenant)
+        db.session.commit()
+        prop_id, tenant_id = prop.id, tenant.id
+    assert login(client, 'ceo_rollup').status_code == 200
+    headers = admin_headers(client)
+
+    pay = client.post('/admin/api/payments', headers=headers, json={
+        'tenant_id': tenant_id, 'amount': 120000, 'payment_date': '2025-03-04'
+    })
+    assert pay.status_code == 200
+    exp = client.post('/admin/api/project-expenses', headers=headers, json={
+        'property_id': prop_id, 'item_name': 'Roof sheets', 'amount': 80000, 'expense_date': '2025-03-10'
+    })
+    assert exp.status_code == 200
+    expense_id = json.loads(exp.data)['expense']['id']
+    assert client.put(f'/admin/api/project-expenses/{expense_id}', headers=headers, json={
+        'approval_status': 'rejected', 'expense_date': '2025-04-01'
+    }).status_code == 200
+
+    with flask_app.app_context():
+        rows = snapshot()
+        assert rows == [
+            (prop_id, 2025, 3, 120000.0, 0.0, 0.0, 0.0, 1, 0),
+            (prop_id, 2025, 4, 0.0, 0.0, 0.0, 80000.0, 0, 1),
+        ]
+        app_module.rebuild_monthly_financial_rollup()
+        db.session.commit()
+        assert snapshot() == rows
+
+    payment_id = json.loads(client.get('/admin/api/payments').data)[0]['id']
+    assert client.delete(f'/admin/api/payments/{payment_id}', headers=headers).status_code == 200
+    with flask_app.app_context():
+        assert snapshot() == [(prop_id, 2025, 4, 0.0, 0.0, 0.0, 80000.0, 0, 1)]
+
+
+def test_unattributed_rollup_bucket_upserts_and_property_delete_is_incremental(client):
+    from app import Property, Tenant, MonthlyFinancialRollup
+
+    prop = Property(title='Doomed Court', description='d', property_type='hostel', location='Malete')
+    db.session.add(prop)
+    db.session.flush()
+    housed = Tenant(name='Housed', property_id=prop.id)
+    loose = Tenant(name='Loose')
+    db.session.add_all([housed, loose])
+    db.session.commit()
+    create_admin('ceo_rollup_key', role='CEO')
+    assert login(client, 'ceo_rollup_key').status_code == 200
+    headers = admin_headers(client)
+    for tenant_id, amount in ((loose.id, 1000), (loose.id, 2000), (housed.id, 5000)):
+        assert client.post('/admin/api/payments', headers=headers, json={
+            'tenant_id': tenant_id, 'amount': amount, 'payment_date': '2025-06-02'
+        }).status_code == 200
+    unattributed = MonthlyFinancialRollup.query.filter_by(property_key=0, year=2025, month=6).all()
+    assert [(row.property_id, row.revenue, row.payment_count) for row in unattributed] == [(None, 3000.0, 2)]
+
+    with patch('app.rebuild_monthly_financial_rollup') as rebuild:
+        assert client.delete(f'/admin/api/properties/{prop.id}', headers=headers).status_code == 200
+    rebuild.assert_not_called()
+    rows = [(row.property_key, row.revenue, row.payment_count) for row in MonthlyFinancialRollup.query.all()]
+    assert rows == [(0, 8000.0, 3)]
+    app_module.rebuild_monthly_financial_rollup()
+    db.session.commit()
+    assert [(row.property_key, row.revenue, row.payment_count) for row in MonthlyFinancialRollup.query.all()] == rows
+
+
+def test_batch_payroll_matches_per_user_path(client):
+    from app import Tenant, SalaryHistory, PayrollPayment
+
+    with flask_app.app_context():
+        create_admin('ceo_pay', role='CEO')
+        manager = create_admin('mgr_pay', role='MANAGER')
+        accountant = create_admin('acct_pay', role='ACCOUNTANT')
+        accountant.monthly_salary = 90000
+        db.session.add_all([
+            Tenant(name='T1', monthly_rent=330000, serviced_by_id=manager.id, created_at=datetime(2025, 3, 5, 9)),
+            Tenant(name='T2', monthly_rent=220000, serviced_by_id=manager.id, created_at=datetime(2025, 4, 1, 0)),
+            SalaryHistory(user_id=accountant.id, monthly_salary=70000, effective_from=date(2025, 1, 1)),
+            SalaryHistory(user_id=accountant.id, monthly_salary=80000, effective_from=date(2025, 3, 31)),
+            PayrollPayment(user_id=manager.id, period_year=2025, period_month=3, amount=10000, kind='commission'),
+        ])
+        db.session.commit()
+        users = [accountant, manager]  # summary orders by role, then username
+        expected = {m: [app_module.compute_user_payroll(u, 2025, m) for u in users] for m in (2, 3, 4)}
+    assert login(client, 'ceo_pay').status_code == 200
+
+    with capture_sql() as statements:
+        march = client.get('/admin/api/payroll/summary?year=2025&month=3')
+    assert march.status_code == 200
+    assert len(statements) <= 6
+    assert json.loads(march.data)['rows'] == json.loads(json.dumps(expected[3]))
+
+    annual = json.loads(client.get('/admin/api/payroll/summary?year=2025&scope=year').data)
+    assert [entry['month'] for entry in annual['months']] == list(range(1, 13))
+    for m in (2, 3, 4):
+        assert annual['months'][m - 1]['rows'] == json.loads(json.dumps(expected[m]))
+    assert annual['totals']['paid_total'] == 10000
+
+
+def explain(query):
+    """Return the query plan text for an ORM query on SQLite or PostgreSQL."""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    connection = db.session.connection()
+    if db.engine.dialect.name == 'postgresql':
+        # Tiny test tables would otherwise always be sequentially scanned.
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        return '\n'.join(row[0] for row in connection.exec_driver_sql('EXPLAIN ' + sql))
+    return '\n'.join(row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql))
+
+
+def test_ledger_and_payroll_filters_use_indexes(client):
+    from app import Tenant, SalaryHistory, PayrollPayment
+
+    app_module.run_schema_migrations()  # index migration must tolerate create_all having built them
+    start, end = date(2025, 3, 1), date(2025, 4, 1)
+    plans = {
+        'ix_tenant_serviced_by_created': Tenant.query.filter(
+            Tenant.serviced_by_id.in_([1, 2]), Tenant.created_at >= datetime(2025, 3, 1), Tenant.created_at < datetime(2025, 4, 1)),
+        'ix_payroll_payment_user_period': PayrollPayment.query.filter(
+            PayrollPayment.user_id.in_([1, 2]), PayrollPayment.period_year == 2025, PayrollPayment.period_month == 3),
+        'ix_salary_history_user_effective': SalaryHistory.query.filter(
+            SalaryHistory.user_id == 1, SalaryHistory.effective_from < end),
+        'ix_payment_record_payment_date': PaymentRecord.query.filter(
+            PaymentRecord.payment_date >= start, PaymentRecord.payment_date < end),
+        'ix_payment_record_tenant_id': PaymentRecord.query.filter(PaymentRecord.tenant_id == 1),
+        'ix_project_expense_property_status_date': ProjectExpense.query.filter(
+            ProjectExpense.property_id == 1, ProjectExpense.approval_status == 'approved',
+            ProjectExpense.expense_date >= start, ProjectExpense.expense_date < end),
+    }
+    for index_name, query in plans.items():
+        assert index_name in explain(query), index_name
+
+
+def test_uploaded_images_get_stripped_and_derivatives_are_negotiated(client):
+    Image = pytest.importorskip('PIL.Image')
+    from app import Property
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    photo = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    Image.new('RGB', (2000, 1000), (40, 90, 160)).save(photo, format='JPEG', exif=exif)
+    photo.seek(0)
+    with flask_app.app_context():
+        create_admin('ceo_images', role='CEO')
+    assert login(client, 'ceo_images').status_code == 200
+
+    with patch.dict(flask_app.config, {'UPLOAD_FOLDER': work_dir,
+                                       'IMAGE_DERIVATIVE_FOLDER': os.path.join(work_dir, 'derivatives')}):
+        upload = client.post('/admin/api/upload', headers=admin_headers(client), content_type='multipart/form-data',
+                             data={'file': (photo, 'gate.jpg')}).get_json()
+        source_path = upload['filename']
+        with Image.open(os.path.join(work_dir, source_path.rsplit('/', 1)[1])) as stored:
+            assert not stored.getexif()
+
+        variants = app_module.get_image_variants(source_path)
+        assert [v['width'] for v in variants['webp']] == [480, 960, 1600]
+        assert app_module.image_srcset(source_path).endswith('1600w')
+        with flask_app.app_context():
+            db.session.add(Property(title='Gallery Court', description='Images', property_type='hostel',
+                                    location='Malete', images=[source_path]))
+            db.session.commit()
+        listed = client.get('/api/properties').get_json()
+        assert [p['image_variants'][source_path] for p in listed if p['title'] == 'Gallery Court'] == [variants]
+
+        negotiated = client.get('/assets/' + source_path, headers={'Accept': 'image/webp,*/*'})
+        assert negotiated.mimetype == 'image/webp' and 'Accept' in negotiated.headers['Vary']
+        derivative = client.get('/assets/' + variants['webp'][0]['path'])
+        assert derivative.status_code == 200 and 'immutable' in derivative.headers['Cache-Control']
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_chunked_video_upload_resumes_and_finalizes_into_draft(client):
+    from app import SiteContent
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    payload = os.urandom(3000)
+    with flask_app.app_context():
+        create_admin('ceo_chunks', role='CEO')
+    assert login(client, 'ceo_chunks').status_code == 200
+    headers = admin_headers(client)
+
+    with patch.dict(flask_app.config, {'VIDEO_FOLDER': work_dir}), \
+            patch('app.shutil.which', return_value=None):
+        started = client.post('/admin/api/uploads/video', headers=headers, json={
+            'filename': 'tour.mp4', 'size': len(payload), 'sha256': hashlib.sha256(payload).hexdigest()}).get_json()
+        upload_url = f"/admin/api/uploads/{started['upload_id']}"
+        assert started['offset'] == 0
+
+        def put_chunk(offset, body, checksum=None):
+            return client.put(f'{upload_url}?offset={offset}', data=body, headers={
+                **headers, 'X-Chunk-SHA256': checksum or hashlib.sha256(body).hexdigest()})
+
+        assert put_chunk(0, payload[:1000]).get_json()['offset'] == 1000
+        bad = put_chunk(1000, payload[1000:2000], checksum='0' * 64)
+        assert bad.status_code == 400 and bad.get_json()['offset'] == 1000
+        stale = put_chunk(0, payload[:1000])
+        assert stale.status_code == 409 and stale.get_json()['offset'] == 1000
+        assert client.get(upload_url).get_json()['offset'] == 1000
+        assert put_chunk(1000, payload[1000:]).get_json()['offset'] == len(payload)
+
+        finalized = client.post(f'{upload_url}/finalize', headers=headers).get_json()
+        assert finalized['success'] and finalized['status'] == 'ready'
+        saved_path = os.path.join(work_dir, finalized['url'].rsplit('/', 1)[1])
+        with open(saved_path, 'rb') as saved:
+            assert saved.read() == payload
+        assert not [name for name in os.listdir(work_dir) if name.endswith('.part')]
+        with flask_app.app_context():
+            assert SiteContent.query.filter_by(slug='home.video_url').first().draft_value == finalized['url']
+            assert SiteContent.query.filter_by(slug='home.video_poster_url').first().draft_value == ''
+
+    def fake_ffmpeg(command, **kwargs):
+        with open(command[-1], 'wb') as output:
+            output.write(b'ffmpeg output')
+
+    # The poster is only drafted once ffmpeg has written it
+    second = os.urandom(500)
+    with patch.dict(flask_app.config, {'VIDEO_FOLDER': work_dir}), \
+            patch('app.shutil.which', return_value='/usr/bin/ffmpeg'), \
+            patch('app.subprocess.run', side_effect=fake_ffmpeg):
+        started = client.post('/admin/api/uploads/video', headers=headers, json={
+            'filename': 'tour2.mp4', 'size': len(second)}).get_json()
+        client.put(f"/admin/api/uploads/{started['upload_id']}?offset=0", data=second, headers=headers)
+        finalized = client.post(f"/admin/api/uploads/{started['upload_id']}/finalize", headers=headers).get_json()
+        poster_url = finalized['url'].rsplit('.', 1)[0] + '.poster.jpg'
+        assert os.path.exists(os.path.join(work_dir, poster_url.rsplit('/', 1)[1]))
+        with flask_app.app_context():
+            assert SiteContent.query.filter_by(slug='home.video_poster_url').first().draft_value == poster_url
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_site_videos_support_conditional_and_multi_range_requests(client):
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    payload = bytes(range(256)) * 8
+    with open(os.path.join(work_dir, 'tour.mp4'), 'wb') as video:
+        video.write(payload)
+
+    with patch.dict(flask_app.config, {'VIDEO_FOLDER': work_dir}):
+        full = client.get('/assets/videos/site/tour.mp4')
+        etag = full.headers['ETag']
+        assert full.status_code == 200 and full.data == payload
+        assert client.get('/assets/videos/site/tour.mp4', headers={'If-None-Match': etag}).status_code == 304
+
+        single = client.get('/assets/videos/site/tour.mp4', headers={'Range': 'bytes=100-199'})
+        assert single.status_code == 206 and single.data == payload[100:200]
+        assert single.headers['Content-Range'] == f'bytes 100-199/{len(payload)}'
+
+        multi = client.get('/assets/videos/site/tour.mp4', headers={'Range': 'bytes=0-9,-10'})
+        assert multi.status_code == 206 and multi.mimetype == 'multipart/byteranges'
+        assert int(multi.headers['Content-Length']) == len(multi.data)
+        assert f'Content-Range: bytes 0-9/{len(payload)}'.encode() in multi.data
+        assert payload[-10:] + b'\r\n--' in multi.data
+
+        stale = client.get('/assets/videos/site/tour.mp4', headers={'Range': 'bytes=0-9,20-29', 'If-Range': '"old"'})
+        assert stale.status_code == 200 and stale.data == payload
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_expense_receipts_require_a_finance_role_and_can_be_offloaded_to_nginx(client):
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    with open(os.path.join(work_dir, 'invoice.pdf'), 'wb') as receipt:
+        receipt.write(b'%PDF-1.4 receipt')
+    with flask_app.app_context():
+        create_admin('receipt_realtor', role='REALTOR')
+        create_admin('receipt_accountant', role='ACCOUNTANT')
+
+    with patch.dict(flask_app.config, {'EXPENSE_RECEIPT_FOLDER': work_dir}):
+        assert client.get('/assets/uploads/expense-receipts/invoice.pdf').status_code == 403
+        assert login(client, 'receipt_realtor').status_code == 200
+        assert client.get('/assets/uploads/expense-receipts/invoice.pdf').status_code == 403
+        client.get('/admin/logout')
+
+        assert login(client, 'receipt_accountant').status_code == 200
+        served = client.get('/assets/uploads/expense-receipts/invoice.pdf')
+        assert served.status_code == 200 and served.data == b'%PDF-1.4 receipt'
+        assert 'private' in served.headers['Cache-Control']
+        with patch.dict(flask_app.config, {'X_ACCEL_REDIRECT_PREFIX': '/_protected/assets/'}):
+            offloaded = client.get('/assets/uploads/expense-receipts/invoice.pdf')
+        assert offloaded.headers['X-Accel-Redirect'] == '/_protected/assets/uploads/expense-receipts/invoice.pdf'
+        assert offloaded.data == b''
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_duplicate_uploads_share_one_blob_and_gc_removes_unreferenced_ones(client):
+    from app import StoredUpload
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    with flask_app.app_context():
+        create_admin('manager_dedup', role='MANAGER')
+    assert login(client, 'manager_dedup').status_code == 200
+    headers = admin_headers(client)
+
+    def upload(content, name):
+        return client.post('/admin/api/upload-expense-receipt', headers=headers, content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(content), name)}).get_json()['filename']
+
+    with patch.dict(flask_app.config, {'EXPENSE_RECEIPT_FOLDER': work_dir}):
+        first = upload(b'same-invoice', 'invoice.pdf')
+        second = upload(b'same-invoice', 'invoice-copy.pdf')
+        orphan = upload(b'abandoned-draft', 'draft.pdf')
+        assert first == second == f"uploads/expense-receipts/{hashlib.sha256(b'same-invoice').hexdigest()}.pdf"
+        assert sorted(os.listdir(work_dir)) == sorted([first.rsplit('/', 1)[1], orphan.rsplit('/', 1)[1]])
+
+        properties = client.get('/admin/api/properties').get_json()
+        assert client.post('/admin/api/project-expenses', headers=headers, json={
+            'property_id': properties[0]['id'], 'expense_date': '2026-04-11', 'category': 'materials',
+            'item_name': 'Cement', 'amount': 1000, 'receipt_path': first}).status_code == 200
+        with flask_app.app_context():
+            assert [row.original_name for row in StoredUpload.query.filter_by(path=first)] == ['invoice.pdf', 'invoice-copy.pdf']
+            # Fresh uploads are protected by the grace period until they are old enough.
+            assert app_module.collect_unreferenced_uploads() == []
+            StoredUpload.query.update({'created_at': datetime(2020, 1, 1)})
+            db.session.commit()
+            assert app_module.collect_unreferenced_uploads() == [orphan]
+            assert StoredUpload.query.filter_by(path=orphan).count() == 0
+        assert os.listdir(work_dir) == [first.rsplit('/', 1)[1]]
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_s3_storage_backend_stores_redirects_presigns_and_migrates(client):
+    moto_server = pytest.importorskip('moto.server')
+    boto3 = pytest.importorskip('boto3')
+    import urllib.request
+    server = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    endpoint = 'http://%s:%d' % server.get_host_and_port()
+    s3 = boto3.client('s3', endpoint_url=endpoint, region_name='us-east-1',
+                      aws_access_key_id='test', aws_secret_access_key='test')
+    s3.create_bucket(Bucket='brightwave-test')
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    folders = {key: os.path.join(work_dir, key.lower()) for key in (
+        'UPLOAD_FOLDER', 'EXPENSE_RECEIPT_FOLDER', 'HERO_BG_FOLDER', 'VIDEO_FOLDER', 'IMAGE_DERIVATIVE_FOLDER')}
+    for folder in folders.values():
+        os.makedirs(folder)
+    with flask_app.app_context():
+        create_admin('ceo_storage', role='CEO')
+    assert login(client, 'ceo_storage').status_code == 200
+    headers = admin_headers(client)
+    settings = {
+        **folders, 'STORAGE_BACKEND': 's3', 'S3_BUCKET': 'brightwave-test', 'S3_ENDPOINT_URL': endpoint,
+        'S3_REGION': 'us-east-1', 'S3_ACCESS_KEY_ID': 'test', 'S3_SECRET_ACCESS_KEY': 'test',
+        'S3_KEY_PREFIX': 'site/',
+    }
+
+    try:
+        with patch.dict(flask_app.config, settings), patch('app.shutil.which', return_value=None):
+            receipt = client.post('/admin/api/upload-expense-receipt', headers=headers, content_type='multipart/form-data',
+                                  data={'file': (io.BytesIO(b'%PDF receipt'), 'invoice.pdf')}).get_json()['filename']
+            assert s3.get_object(Bucket='brightwave-test', Key='site/' + receipt)['Body'].read() == b'%PDF receipt'
+            assert not os.listdir(folders['EXPENSE_RECEIPT_FOLDER'])
+            redirected = client.get('/assets/' + receipt)
+            assert redirected.status_code == 302 and redirected.headers['Cache-Control'] == 'private, no-store'
+            assert urllib.request.urlopen(redirected.headers['Location']).read() == b'%PDF receipt'
+
+            video = b'\x00\x00\x00\x18ftypmp42 direct upload'
+            digest = hashlib.sha256(video).hexdigest()
+            started = client.post('/admin/api/uploads/video', headers=headers, json={
+                'filename': 'tour.mp4', 'size': len(video), 'sha256': digest, 'direct': True}).get_json()
+            direct = started['direct']
+            urllib.request.urlopen(urllib.request.Request(direct['url'], data=video, method='PUT', headers=direct['headers']))
+            finalized = client.post(f"/admin/api/uploads/{started['upload_id']}/finalize", headers=headers).get_json()
+            assert finalized['success'] and finalized['url'] == f'/assets/videos/site/{digest}.mp4'
+            assert s3.head_object(Bucket='brightwave-test', Key=f'site/videos/site/{digest}.mp4')['ContentLength'] == len(video)
+
+            with open(os.path.join(folders['UPLOAD_FOLDER'], 'legacy.jpg'), 'wb') as legacy:
+                legacy.write(b'legacy-photo')
+            with flask_app.app_context():
+                assert app_module.migrate_local_uploads(delete_local=True) == 1
+            assert s3.get_object(Bucket='brightwave-test', Key='site/images/properties/legacy.jpg')['Body'].read() == b'legacy-photo'
+            assert not os.listdir(folders['UPLOAD_FOLDER'])
+
+            # Presigned links expire, so only the browser may cache them and only briefly
+            presigned = client.get('/assets/images/properties/legacy.jpg')
+            assert presigned.status_code == 302 and 'X-Amz-Expires=300' in presigned.headers['Location']
+            assert presigned.headers['Cache-Control'] == 'private, max-age=60'
+            with patch.dict(flask_app.config, {'STORAGE_PUBLIC_URL': 'https://cdn.example.test'}):
+                public = client.get('/assets/images/properties/legacy.jpg')
+            assert public.headers['Location'] == 'https://cdn.example.test/site/images/properties/legacy.jpg'
+            assert public.headers['Cache-Control'] == 'public, max-age=300'
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class FakeRespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for the rate-limit storage."""
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        command = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            command.append(self.rfile.read(length + 2)[:-2].decode())
+        return command
+
+    def handle(self):
+        store, expiries = self.server.store, self.server.expiries
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            name, args = command[0].upper(), command[1:]
+            for key in [key for key, at in expiries.items() if at <= time.time()]:
+                store.pop(key, None)
+                expiries.pop(key)
+            if name == 'PING':
+                reply = b'+PONG\r\n'
+            elif name == 'GET':
+                value = store.get(args[0])
+                reply = b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(str(value)), str(value).encode())
+            elif name in ('INCRBY', 'DECRBY'):
+                store[args[0]] = int(store.get(args[0], 0)) + int(args[1]) * (1 if name == 'INCRBY' else -1)
+                reply = b':%d\r\n' % store[args[0]]
+            elif name == 'PEXPIRE':
+                expiries[args[0]] = time.time() + int(args[1]) / 1000
+                reply = b':1\r\n'
+            elif name == 'PTTL':
+                reply = b':%d\r\n' % (int((expiries[args[0]] - time.time()) * 1000) if args[0] in expiries else -1)
+            elif name == 'HINCRBY':
+                field = store.setdefault(args[0], {})
+                field[args[1]] = field.get(args[1], 0) + int(args[2])
+                reply = b':%d\r\n' % field[args[1]]
+            elif name == 'HGETALL':
+                items = [str(part).encode() for pair in store.get(args[0], {}).items() for part in pair]
+                reply = b'*%d\r\n' % len(items) + b''.join(b'$%d\r\n%s\r\n' % (len(item), item) for item in items)
+            else:
+                reply = b'-ERR unknown command\r\n'
+            self.wfile.write(reply)
+
+
+def hit_contact_limit(storage, times):
+    from limits import parse
+    from limits.strategies import SlidingWindowCounterRateLimiter
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    return [limiter.hit(parse('3/minute'), 'contact', '203.0.113.7') for _ in range(times)]
+
+
+def test_sqlite_rate_limit_storage_is_shared_between_workers(client):
+    work_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    uri = 'sqlite-wal://' + os.path.join(work_dir, 'ratelimit.db')
+    worker_a, worker_b = app_module.SQLiteRateLimitStorage(uri), app_module.SQLiteRateLimitStorage(uri)
+    with patch('app.time', return_value=1_000_010.0):
+        assert hit_contact_limit(worker_a, 2) == [True, True]
+        assert hit_contact_limit(worker_b, 2) == [True, False]
+        assert hit_contact_limit(worker_a, 1) == [False]
+        worker_b.flush_metrics()
+        assert worker_a.metrics() == {'hits': 3, 'misses': 1, 'throttled': 2}
+
+        # A throttled request only reads, so it is answered while another worker holds the write lock
+        writer = sqlite3.connect(uri[len('sqlite-wal://'):], isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            assert hit_contact_limit(worker_b, 1) == [False]
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+
+    with flask_app.app_context():
+        create_admin('ceo_ratelimit', role='CEO')
+    assert login(client, 'ceo_ratelimit').status_code == 200
+    surface = client.get('/admin/api/rate-limit-metrics').get_json()
+    assert surface['storage'] == 'sqlite-wal' and surface['strategy'] == 'sliding-window-counter'
+    assert set(surface['metrics']) == {'hits', 'misses', 'throttled'}
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_resp_rate_limit_storage_against_a_fake_redis_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRespHandler)
+    server.daemon_threads = True
+    server.store, server.expiries = {}, {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        uri = 'resp://127.0.0.1:%d/0' % server.server_address[1]
+        worker_a, worker_b = app_module.RespRateLimitStorage(uri), app_module.RespRateLimitStorage(uri)
+        assert worker_a.check()
+        with patch('app.time', return_value=1_000_010.0):
+            assert hit_contact_limit(worker_a, 3) == [True, True, True]
+            assert hit_contact_limit(worker_b, 1) == [False]
+        assert any(key.startswith('brightwave:ratelimit:') and at > time.time() for key, at in server.expiries.items())
+        worker_b.flush_metrics()
+        assert worker_a.metrics() == {'hits': 3, 'misses': 1, 'throttled': 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_background_jobs_retry_coalesce_and_surface_failures_to_the_ceo(client):
+    calls = []
+
+    @app_module.background_job(max_attempts=2, unique=True)
+    def flaky_test_job(value):
+        calls.append(value)
+        if len(calls) == 1:
+            raise RuntimeError('first attempt fails')
+
+    prop = app_module.Property(title='Jobs Court', description='d', property_type='hostel', location='Malete')
+    db.session.add(prop)
+    db.session.commit()
+    create_admin('ceo_jobs', role='CEO')
+    assert login(client, 'ceo_jobs').status_code == 200
+    with patch.dict(flask_app.config, {'BACKGROUND_JOBS_INLINE': False}):
+        first = flaky_test_job.delay(7)
+        assert flaky_test_job.delay(7).id == first.id  # coalesced while pending
+        assert app_module.work_jobs() == 1
+        job = db.session.get(app_module.BackgroundJob, first.id)
+        assert job.status == 'pending' and job.attempts == 1 and job.run_at > datetime.utcnow()
+        assert app_module.work_jobs() == 0  # backing off
+
+        job.run_at = datetime.utcnow()
+        db.session.commit()
+        assert app_module.work_jobs() == 1 and calls == [7, 7]
+        assert db.session.get(app_module.BackgroundJob, first.id).status == 'done'
+
+        response = client.put(f'/admin/api/properties/{prop.id}', headers=admin_headers(client), json={
+            'title': 'Jobs Court', 'description': 'd', 'property_type': 'hostel', 'location': 'Malete',
+        })
+        assert response.get_json()['success'] is True
+        reconcile = app_module.BackgroundJob.query.filter_by(name='sync_property_units_from_tenants').one()
+        assert reconcile.status == 'pending' and reconcile.args == [prop.id]
+
+        db.session.add(app_module.BackgroundJob(name='no_such_job', max_attempts=1))
+        db.session.commit()
+        app_module.work_jobs()
+        summary = client.get('/admin/api/jobs').get_json()
+        assert summary['failed'] == 1 and summary['by_name']['flaky_test_job'] == {'done': 1}
+        assert summary['recent_failures'][0]['name'] == 'no_such_job'
+        assert client.post('/admin/api/jobs/retry', headers=admin_headers(client), json={}).get_json()['retried'] == 1
+        assert app_module.BackgroundJob.query.filter_by(status='failed').count() == 0
+    app_module.BACKGROUND_JOBS.pop('flaky_test_job')
+
+    # A web process starts its workers with its first request, not only on its first enqueue
+    with patch.dict(flask_app.config, {'JOB_WORKER_THREADS': 2}), \
+            patch.object(app_module, 'job_worker_pid', None), \
+            patch.object(app_module, 'wake_job_workers') as wake:
+        client.get('/health')
+        assert wake.call_count == 1
+
+
+def test_failed_media_processing_is_retried(client):
+    with patch.dict(flask_app.config, {'BACKGROUND_JOBS_INLINE': False}), \
+            patch.object(app_module, 'strip_image_metadata', side_effect=OSError('disk full')):
+        job = app_module.process_uploaded_image.delay('images/uploads/missing.jpg', False)
+        assert app_module.work_jobs() == 1
+        job = db.session.get(app_module.BackgroundJob, job.id)
+        assert job.status == 'pending' and job.attempts == 1 and 'disk full' in job.last_error
+
+    with patch.object(app_module, 'strip_image_metadata', side_effect=OSError('disk full')):
+        app_module.queue_image_processing('images/uploads/missing.jpg', False)  # inline: logged, not raised
+
+
+def free_local_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def smtp_sink_mail(port):
+    config = {
+        'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': port, 'MAIL_USE_TLS': False,
+        'MAIL_DEFAULT_SENDER': 'noreply@brightwavehabitat.com',
+    }
+    return app_module.mail.init_mail(config)
+
+
+def test_contact_emails_go_through_the_outbox_in_one_smtp_batch(client):
+    controller_module = pytest.importorskip('aiosmtpd.controller')
+
+    class Sink:
+        def __init__(self):
+            self.envelopes, self.sessions = [], set()
+
+        async def handle_DATA(self, server, session, envelope):
+            self.envelopes.append(envelope)
+            self.sessions.add(id(session))
+            return '250 OK'
+
+    sink = Sink()
+    port = free_local_port()
+    controller = controller_module.Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        with patch.dict(flask_app.extensions, {'mail': smtp_sink_mail(port)}), \
+                patch.object(app_module, 'NOTIFICATION_EMAILS', ['ops@brightwavehabitat.com']), \
+                patch.dict(flask_app.config, {'BACKGROUND_JOBS_INLINE': False}):
+            response = client.post('/api/contact', json={
+                'fullName': 'Ada Tenant', 'email': 'ada@example.com', 'message': 'Is block B still open?',
+            }, environ_overrides={'REMOTE_ADDR': '10.0.1.22'})
+            assert response.get_json()['success'] is True
+            queued = app_module.EmailOutbox.query.order_by(app_module.EmailOutbox.id).all()
+            assert [row.status for row in queued] == ['pending', 'pending']
+            assert not app_module.queue_email(queued[0].idempotency_key, 'dup', ['x@example.com'], 'dup')
+
+            assert app_module.BackgroundJob.query.filter_by(name='deliver_outbox_emails').count() == 1
+            assert app_module.work_jobs() == 1
+        assert len(sink.envelopes) == 2 and len(sink.sessions) == 1
+        assert sorted(tuple(envelope.rcpt_tos) for envelope in sink.envelopes) == [
+            ('ada@example.com',), ('ops@brightwavehabitat.com',)]
+        assert b'Reply-To: ada@example.com' in sink.envelopes[0].content
+        assert {row.status for row in app_module.EmailOutbox.query.all()} == {'sent'}
+    finally:
+        controller.stop()
+
+    create_admin('ceo_outbox', role='CEO')
+    assert login(client, 'ceo_outbox').status_code == 200
+    metrics = client.get('/admin/api/email-outbox').get_json()
+    assert metrics['queue_depth'] == 0 and metrics['last_24h']['sent'] == 2
+
+
+def test_outbox_keys_follow_the_submission_not_reusable_row_ids(client):
+    addresses = iter(range(30, 40))
+
+    def post(message, **headers):  # a fresh client address each time stays under the 3/minute limit
+        return client.post('/api/contact', json={
+            'fullName': 'Ada Tenant', 'email': 'ada@example.com', 'message': message,
+        }, headers=headers, environ_overrides={'REMOTE_ADDR': f'10.0.1.{next(addresses)}'})
+
+    with patch.object(app_module, 'NOTIFICATION_EMAILS', ['ops@brightwavehabitat.com']), \
+            patch.dict(flask_app.config, {'BACKGROUND_JOBS_INLINE': False}):
+        assert post('Is block B still open?').get_json()['success'] is True
+        assert post('Is block B still open?').get_json()['success'] is True  # double submit
+        assert app_module.EmailOutbox.query.count() == 2
+
+        # SQLite reuses the id of a deleted last row; the next message must still be mailed
+        app_module.ContactMessage.query.delete()
+        db.session.commit()
+        assert post('Is block C open instead?').get_json()['success'] is True
+        assert app_module.EmailOutbox.query.count() == 4
+
+        assert post('Retried', **{'Idempotency-Key': 'form-7f3a'}).get_json()['success'] is True
+        assert post('Retried with an edit', **{'Idempotency-Key': 'form-7f3a'}).get_json()['success'] is True
+        assert app_module.EmailOutbox.query.count() == 6
+
+
+def test_outbox_retries_with_backoff_when_smtp_is_down(client):
+    closed_port = free_local_port()
+    app_module.queue_email('test:retry', 'Hello', ['ops@example.com'], 'Body')
+    db.session.commit()
+    with patch.dict(flask_app.extensions, {'mail': smtp_sink_mail(closed_port)}):
+        assert app_module.drain_email_outbox() == (0, 1)
+    email = app_module.EmailOutbox.query.filter_by(idempotency_key='test:retry').one()
+    assert email.status == 'pending' and email.attempts == 1 and email.last_error
+    assert 25 <= (email.next_attempt_at - datetime.utcnow()).total_seconds() <= 30
+    assert app_module.drain_email_outbox() == (0, 0)  # not due yet
+
+    email.attempts = app_module.EMAIL_MAX_ATTEMPTS - 1
+    email.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    with patch.dict(flask_app.extensions, {'mail': smtp_sink_mail(closed_port)}):
+        app_module.drain_email_outbox()
+    assert app_module.EmailOutbox.query.filter_by(idempotency_key='test:retry').one().status == 'failed'
+
+
 def test_manager_can_upload_expense_receipt_and_vendor_is_captured(client):
     with flask_app.app_context():
         create_admin('manager_receipts', role='MANAGER')
@@ -453,7 +1729,8 @@ def test_manager_can_upload_expense_receipt_and_vendor_is_captured(client):
     assert login_resp.status_code == 200
     headers = admin_headers(client)
 
-    with patch('werkzeug.datastructures.FileStorage.save', autospec=True) as mocked_save:
+    receipt_dir = tempfile.mkdtemp(dir=os.path.join(os.path.dirname(__file__), 'tmp'))
+    with patch.dict(flask_app.config, {'EXPENSE_RECEIPT_FOLDER': receipt_dir}):
         upload_resp = client.post(
             '/admin/api/upload-expense-receipt',
             headers=headers,
@@ -464,7 +1741,8 @@ def test_manager_can_upload_expense_receipt_and_vendor_is_captured(client):
     upload_data = json.loads(upload_resp.data)
     assert upload_data['success'] is True
     assert upload_data['filename'].startswith('uploads/expense-receipts/')
-    mocked_save.assert_called_once()
+    assert os.listdir(receipt_dir) == [upload_data['filename'].rsplit('/', 1)[1]]
+    shutil.rmtree(receipt_dir, ignore_errors=True)
 
     properties_resp = client.get('/admin/api/properties')
     properties = json.loads(properties_resp.data)